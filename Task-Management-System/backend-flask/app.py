@@ -1,23 +1,139 @@
-from flask import Flask
+from flask import Flask, jsonify, request
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from tasks.email_remainder import send_remainder
+from tasks.dates import parse_due_date
+from tasks.db import get_pool
+from tasks.leader import SchedulerCoordinator
+from tasks.reminder_scheduler import ReminderScheduler, ensure_reminder_schema
+from tasks.store import TASKS_PAGE_SIZE, TaskStore
 import atexit
+import os
 
 app = Flask(__name__)
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=send_remainder, trigger="interval", hours=5)
-scheduler.start()
+# Per-task reminders fire at each task's due time, batched into one digest
+# per assignee; task writes below keep the schedule current instead of
+# rescanning the table on an interval.
+reminders = ReminderScheduler()
+store = TaskStore(listeners=[reminders])
+
+# Every worker records task writes, but only the worker(s) holding the
+# scheduler lock send reminders (SCHEDULER_MODE=leader|sharded).
+with get_pool().connection() as _conn:
+    ensure_reminder_schema(_conn)
+
+coordinator = SchedulerCoordinator(reminders)
+
+# The debug reloader runs this module in a watcher process that never
+# serves requests; only the serving child (WERKZEUG_RUN_MAIN) competes.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    coordinator.start()
 
 def shutdown_scheduler():
-    if scheduler.running:
-        scheduler.shutdown()
+    coordinator.stop()
 
 atexit.register(shutdown_scheduler)
+
+def _bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+def _due_date_error(data):
+    """Error message when data has a due_date the reminders cannot schedule"""
+    if data.get("due_date") is None:
+        return None
+    try:
+        parse_due_date(data["due_date"])
+    except ValueError:
+        return "due_date must be an ISO 8601 date, e.g. 2026-10-20T09:00:00Z"
+    return None
+
 @app.route('/')
 def index():
-    return "Flask server running. Sending emails every 1 hour!"
+    return "Flask server running. Sending task reminders when they are due!"
+
+@app.route('/tasks', methods=['GET'])
+def list_tasks():
+    tasks, next_after = store.list(
+        completed=_bool_arg("completed"),
+        assignee=request.args.get("assignee"),
+        after=request.args.get("after", 0, type=int),
+        limit=request.args.get("limit", TASKS_PAGE_SIZE, type=int)
+    )
+    return jsonify({"tasks": tasks, "next_after": next_after})
+
+@app.route('/tasks/search', methods=['GET'])
+def search_tasks():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    tasks = store.search(
+        query,
+        limit=request.args.get("limit", TASKS_PAGE_SIZE, type=int),
+        completed=_bool_arg("completed")
+    )
+    return jsonify({"tasks": tasks})
+
+@app.route('/tasks/summary', methods=['GET'])
+def task_summary():
+    return jsonify(store.summary(assignee=request.args.get("assignee")))
+
+@app.route('/tasks/<int:task_id>', methods=['GET'])
+def get_task(task_id):
+    task = store.get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify(task)
+
+@app.route('/tasks', methods=['POST'])
+def create_task():
+    data = request.get_json() or {}
+    if not data.get("title"):
+        return jsonify({"error": "title is required"}), 400
+    error = _due_date_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(store.create(data)), 201
+
+@app.route('/tasks/bulk', methods=['POST'])
+def create_tasks():
+    data = request.get_json() or {}
+    items = data.get("tasks") or []
+    for item in items if isinstance(items, list) else []:
+        error = _due_date_error(item) if isinstance(item, dict) else None
+        if error:
+            return jsonify({"error": error}), 400
+    try:
+        tasks = store.create_many(items)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"tasks": tasks}), 201
+
+@app.route('/tasks/complete', methods=['POST'])
+def complete_tasks():
+    data = request.get_json() or {}
+    try:
+        completed = store.complete_many(data.get("ids") or [])
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"completed": completed})
+
+@app.route('/tasks/<int:task_id>', methods=['PUT'])
+def update_task(task_id):
+    data = request.get_json() or {}
+    error = _due_date_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+    task = store.update(task_id, data)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify(task)
+
+@app.route('/tasks/<int:task_id>', methods=['DELETE'])
+def delete_task(task_id):
+    store.delete(task_id)
+    return "", 204
 
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
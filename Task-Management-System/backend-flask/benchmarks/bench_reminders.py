@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Reminder pipeline benchmark against a local SMTP stand-in.
+
+Seeds a throwaway SQLite database with open tasks spread over many
+assignees, runs send_remainder() against a local SMTP server and reports
+throughput plus peak Python memory:
+
+    python benchmarks/bench_reminders.py --tasks 100000 --assignees 5000
+
+Uses aiosmtpd when installed, otherwise a minimal built-in SMTP sink.
+"""
+
+import argparse
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages from smtplib"""
+
+    def handle(self):
+        self.wfile.write(b"220 localhost ready\r\n")
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    self.server.messages += 1
+                    self.wfile.write(b"250 OK\r\n")
+                continue
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command == b"DATA":
+                in_data = True
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            elif command == b"QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+class _SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    messages = 0
+
+
+def start_smtp_server():
+    """Return (port, message_counter, stop)"""
+    try:
+        from aiosmtpd.controller import Controller
+
+        class CountingHandler:
+            messages = 0
+
+            async def handle_DATA(self, server, session, envelope):
+                CountingHandler.messages += 1
+                return "250 OK"
+
+        controller = Controller(CountingHandler(), hostname="127.0.0.1", port=0)
+        controller.start()
+        return controller.server.sockets[0].getsockname()[1], lambda: CountingHandler.messages, controller.stop
+    except ImportError:
+        server = _SinkServer(("127.0.0.1", 0), _SinkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server.server_address[1], lambda: server.messages, server.shutdown
+
+
+def seed(db_path, tasks, assignees, batch=10000):
+    from tasks.db import ensure_schema, get_connection
+
+    rng = random.Random(42)
+    conn = get_connection(db_path)
+    ensure_schema(conn)
+    for offset in range(0, tasks, batch):
+        conn.executemany(
+            "INSERT INTO tasks (title, description, completed, due_date, assignee) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"Task {i}", "Benchmark task", int(rng.random() < 0.3),
+                 f"2026-01-{rng.randint(1, 28):02d}T09:00:00Z", f"user{rng.randrange(assignees)}@company.com")
+                for i in range(offset, min(offset + batch, tasks))
+            ]
+        )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--assignees", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    port, delivered, stop = start_smtp_server()
+    os.environ["SMTP_HOST"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = str(port)
+    os.environ["REMINDER_CONCURRENCY"] = str(args.concurrency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.tasks, args.assignees)
+
+        from tasks.email_remainder import send_remainder
+
+        tracemalloc.start()
+        stats = send_remainder(db_path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stop()
+    print(f"Tasks in table:   {args.tasks}")
+    print(f"Tasks reminded:   {stats['tasks']}")
+    print(f"Digests sent:     {stats['sent']} ({stats['failed']} failed, {stats['retries']} retries)")
+    print(f"SMTP received:    {delivered()}")
+    print(f"Elapsed:          {stats['elapsed_s']} s")
+    print(f"Throughput:       {stats['digests_per_s']} digests/s, {stats['tasks_per_s']} tasks/s")
+    print(f"Peak memory:      {peak / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
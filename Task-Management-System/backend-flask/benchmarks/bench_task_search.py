@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Full-text task search (FTS5, bm25) against LIKE scans.
+
+Grows a throwaway SQLite database of tasks with generated titles and
+descriptions and, at each size, times TaskStore.search() against the
+equivalent LIKE '%term%' query for a few typical lookups:
+
+    python benchmarks/bench_task_search.py --sizes 10000,100000,1000000,3000000
+
+LIKE returns the first matches it happens to scan, unranked; for very common
+terms that can be quicker than ranking every match, but selective lookups
+and prefix lookups degrade to full table scans.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "report review budget sprint release deploy invoice client meeting design "
+    "audit migrate onboarding hiring roadmap security backup database api mobile "
+    "dashboard quarterly forecast contract vendor training support incident "
+    "analytics payroll compliance marketing campaign launch feedback survey"
+).split()
+QUARTERS = ("Q1", "Q2", "Q3", "Q4")
+SYLLABLES = ("ka", "zo", "ri", "mel", "tor", "vex", "lan", "qu", "dri", "sol", "nax", "pe")
+
+# (search text, LIKE terms): common words, a rare project name, and a prefix
+QUERIES = (
+    ("Q3 report", ("q3", "report")),
+    ("zovexkaqu", ("zovexkaqu",)),
+    ("zovex", ("zovex",)),
+)
+
+
+def project_names(rng, count=5000):
+    """Rare words, so some lookups match only a handful of tasks"""
+    names = {"zovexkaqu"}
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(4)))
+    return sorted(names)
+
+
+def grow(conn, start, end, rng, projects, batch=50000):
+    for offset in range(start, end, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, end)):
+            title = " ".join(rng.sample(WORDS, 2) + [rng.choice(projects), rng.choice(QUARTERS)])
+            description = " ".join(rng.choice(WORDS) for _ in range(12))
+            rows.append((title.capitalize(), description, int(rng.random() < 0.5)))
+        conn.executemany("INSERT INTO tasks (title, description, completed) VALUES (?, ?, ?)", rows)
+        conn.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def like_search(conn, terms, limit):
+    where = " AND ".join("(title LIKE ? OR description LIKE ?)" for _ in terms)
+    params = [pattern for term in terms for pattern in (f"%{term}%", f"%{term}%")]
+    return conn.execute(f"SELECT * FROM tasks WHERE {where} LIMIT ?", (*params, limit)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated row counts")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        from tasks.db import get_pool
+        from tasks.search import build_match_query
+        from tasks.store import TaskStore
+
+        store = TaskStore(db_path)
+        pool = get_pool(db_path)
+        rng = random.Random(42)
+        projects = project_names(rng)
+        rows = 0
+        print(f"{'rows':>10}  {'query':<16} {'matches':>9} {'fts p50':>9} {'like p50':>9} {'speedup':>8}")
+        for size in sizes:
+            with pool.connection() as conn:
+                grow(conn, rows, size, rng, projects)
+            rows = size
+            for text, terms in QUERIES:
+                fts, _ = timed(lambda: store.search(text, limit=args.limit), args.repeat)
+                with pool.connection() as conn:
+                    like, _ = timed(lambda: like_search(conn, terms, args.limit), args.repeat)
+                    matches = conn.execute(
+                        "SELECT COUNT(*) FROM tasks_fts WHERE tasks_fts MATCH ?", (build_match_query(text),)
+                    ).fetchone()[0]
+                print(f"{size:>10}  {text:<16} {matches:>9} {fts:>8.2f}ms {like:>8.2f}ms {like / fts:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Task list/filter latency as the tasks table grows.
+
+Grows one throwaway SQLite database through each size and times the
+TaskStore queries behind the task API and dashboard at every step: the
+first page, a page deep in the table (keyset cursor), filters on
+completion state and assignee, and the dashboard summary for one assignee:
+
+    python benchmarks/bench_task_store.py --sizes 1000,100000,1000000,10000000
+
+With the indexes in tasks.db the page queries should stay flat as the
+table grows.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def grow(conn, start, end, assignees, rng, batch=50000):
+    for offset in range(start, end, batch):
+        conn.executemany(
+            "INSERT INTO tasks (title, description, completed, due_date, assignee) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"Task {i}", "Benchmark task", int(rng.random() < 0.7),
+                 f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T09:00:00Z",
+                 f"user{rng.randrange(assignees)}@company.com")
+                for i in range(offset, min(offset + batch, end))
+            ]
+        )
+        conn.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1 if len(samples) >= 100 else -1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma separated row counts (add 10000000 for the full run)")
+    parser.add_argument("--assignees", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        from tasks.db import get_pool
+        from tasks.store import TaskStore
+
+        store = TaskStore(db_path)
+        rng = random.Random(42)
+        rows = 0
+        print(f"{'rows':>10}  {'query':<28} {'p50 ms':>8} {'p99 ms':>8}")
+        for size in sizes:
+            with get_pool(db_path).connection() as conn:
+                grow(conn, rows, size, args.assignees, rng)
+                conn.execute("ANALYZE")
+            rows = size
+            assignee = f"user{rng.randrange(args.assignees)}@company.com"
+            middle = size // 2
+
+            queries = {
+                "first page": lambda: store.list(limit=args.page_size),
+                "deep page (keyset)": lambda: store.list(after=middle, limit=args.page_size),
+                "open tasks": lambda: store.list(completed=False, after=middle, limit=args.page_size),
+                "assignee": lambda: store.list(assignee=assignee, limit=args.page_size),
+                "assignee + open": lambda: store.list(assignee=assignee, completed=False, limit=args.page_size),
+                "assignee summary": lambda: store.summary(assignee=assignee),
+            }
+            for name, query in queries.items():
+                p50, p99 = timed(query, args.repeat)
+                print(f"{size:>10}  {name:<28} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+# Every stored time (due dates, reminder times, change log) is UTC in this
+# fixed-width form, so SQL string comparisons order them correctly.
+UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def parse_due_date(value):
+    """Parse an ISO 8601 date or datetime as aware UTC.
+
+    Values without an offset are taken as UTC, as SQLite's datetime() does.
+    Raises ValueError for anything else.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"not an ISO 8601 date: {value!r}")
+    parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def utc_text(value):
+    """The stored form of an aware datetime"""
+    return value.astimezone(timezone.utc).strftime(UTC_FORMAT)
+
+
+def normalize_due_date(value):
+    """The stored form of a due date from the API; None stays None"""
+    return None if value is None else utc_text(parse_due_date(value))
@@ -0,0 +1,143 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from tasks.dates import UTC_FORMAT
+from tasks.search import ensure_search_index
+
+# SQLite database shared with the reminder jobs
+TASKS_DB_PATH = os.getenv("TASKS_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "tasks.db"))
+# Connections kept open per process
+TASKS_POOL_SIZE = int(os.getenv("TASKS_POOL_SIZE", "8"))
+# How long a writer waits for another process's write lock
+TASKS_BUSY_TIMEOUT = float(os.getenv("TASKS_BUSY_TIMEOUT", "5"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    due_date TEXT,
+    assignee TEXT
+);
+DROP INDEX IF EXISTS idx_tasks_reminders;
+-- Reminder scans: open tasks per assignee in id order, due date read from the index
+CREATE INDEX IF NOT EXISTS idx_tasks_reminder_queue ON tasks (completed, assignee, id, due_date);
+-- Task lists filtered by completion state, paged by id
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed, id);
+-- Per-assignee lists and dashboard counts
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks (assignee, completed, id);
+"""
+
+# Columns added after the original tasks(id, title, description, completed)
+MIGRATIONS = {
+    "due_date": "ALTER TABLE tasks ADD COLUMN due_date TEXT",
+    "assignee": "ALTER TABLE tasks ADD COLUMN assignee TEXT"
+}
+# PRAGMA user_version once due dates are stored as UTC (see tasks.dates)
+UTC_DUE_DATES_VERSION = 1
+
+
+def get_connection(path=None):
+    conn = sqlite3.connect(path or TASKS_DB_PATH, timeout=TASKS_BUSY_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_schema(conn):
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if columns:
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+    conn.executescript(SCHEMA)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < UTC_DUE_DATES_VERSION:
+        # Unparseable values are left as they are rather than lost
+        conn.execute(
+            "UPDATE tasks SET due_date = COALESCE(strftime(?1, due_date), due_date) WHERE due_date IS NOT NULL",
+            (UTC_FORMAT,)
+        )
+        conn.execute(f"PRAGMA user_version = {UTC_DUE_DATES_VERSION}")
+    conn.commit()
+
+
+class ConnectionPool:
+    """Fixed-size pool of WAL-mode SQLite connections.
+
+    WAL lets readers proceed while a write is in progress, so request
+    threads and the reminder scheduler do not serialise on the database.
+    Connections are opened lazily up to `size`; callers beyond that wait
+    for one to be returned.
+    """
+
+    def __init__(self, path=None, size=TASKS_POOL_SIZE):
+        self.path = path or TASKS_DB_PATH
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = get_connection(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if not can_open:
+            return self._idle.get()
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Per-process pool for `path`, with the schema and search index in place"""
+    key = (os.getpid(), path or TASKS_DB_PATH)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(path)
+            with pool.connection() as conn:
+                ensure_schema(conn)
+                ensure_search_index(conn)
+            _pools[key] = pool
+        return pool
@@ -1,2 +1,97 @@
-def send_remainder():
-    print("[Remainder]  Sending remainder email ....")
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from tasks.dates import utc_now
+from tasks.mailer import SMTPPool, build_message
+from tasks.store import TaskStore
+
+# Remind about tasks due within this many hours (overdue and undated included)
+REMINDER_LOOKAHEAD_HOURS = int(os.getenv("REMINDER_LOOKAHEAD_HOURS", "24"))
+# Parallel SMTP deliveries (and pooled connections)
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "8"))
+# Rows fetched per database page
+REMINDER_PAGE_SIZE = int(os.getenv("REMINDER_PAGE_SIZE", "1000"))
+# Tasks listed in one digest; the rest are summarised
+DIGEST_MAX_TASKS = int(os.getenv("DIGEST_MAX_TASKS", "50"))
+
+
+def iter_digests(rows):
+    """Group rows ordered by assignee into (recipient, tasks, total) digests"""
+    recipient, tasks, total = None, [], 0
+    for row in rows:
+        if row["assignee"] != recipient:
+            if recipient is not None:
+                yield recipient, tasks, total
+            recipient, tasks, total = row["assignee"], [], 0
+        total += 1
+        if len(tasks) < DIGEST_MAX_TASKS:
+            tasks.append({"id": row["id"], "title": row["title"], "due_date": row["due_date"]})
+    if recipient is not None:
+        yield recipient, tasks, total
+
+
+def format_digest(tasks, total):
+    lines = ["You have open tasks that need attention:", ""]
+    for task in tasks:
+        due = f" (due {task['due_date']})" if task["due_date"] else ""
+        lines.append(f"- #{task['id']} {task['title']}{due}")
+    if total > len(tasks):
+        lines.append(f"... and {total - len(tasks)} more")
+    return "\n".join(lines)
+
+
+def digest_message(recipient, tasks, total):
+    subject = f"Reminder: {total} open task{'s' if total != 1 else ''}"
+    return build_message(recipient, subject, format_digest(tasks, total))
+
+
+def send_remainder(db_path=None):
+    """Send one reminder digest per assignee for open tasks that are due.
+
+    Tasks are streamed from the database page by page and digests are
+    delivered through a pooled SMTP transport with bounded concurrency.
+    Returns run metrics.
+    """
+    print("[Remainder]  Sending remainder email ....")
+    started = time.perf_counter()
+    due_before = utc_now() + timedelta(hours=REMINDER_LOOKAHEAD_HOURS)
+    stats = {"tasks": 0, "digests": 0, "sent": 0, "failed": 0, "retries": 0}
+    stats_lock = threading.Lock()
+
+    # Cap digests waiting for a worker so memory stays flat on huge runs
+    in_flight = threading.BoundedSemaphore(REMINDER_CONCURRENCY * 2)
+    pool = SMTPPool(REMINDER_CONCURRENCY)
+
+    def deliver(recipient, tasks, total):
+        try:
+            retries = pool.send(digest_message(recipient, tasks, total))
+            with stats_lock:
+                stats["sent"] += 1
+                stats["retries"] += retries
+        except Exception as e:
+            print(f"[Remainder]  Failed to send to {recipient}: {e}")
+            with stats_lock:
+                stats["failed"] += 1
+        finally:
+            in_flight.release()
+
+    store = TaskStore(db_path)
+    try:
+        with ThreadPoolExecutor(max_workers=REMINDER_CONCURRENCY) as executor:
+            for recipient, tasks, total in iter_digests(store.iter_reminder_tasks(due_before, REMINDER_PAGE_SIZE)):
+                stats["tasks"] += total
+                stats["digests"] += 1
+                in_flight.acquire()
+                executor.submit(deliver, recipient, tasks, total)
+    finally:
+        pool.close()
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["digests_per_s"] = round(stats["sent"] / elapsed, 1) if elapsed else 0.0
+    stats["tasks_per_s"] = round(stats["tasks"] / elapsed, 1) if elapsed else 0.0
+    print(f"[Remainder]  {stats}")
+    return stats
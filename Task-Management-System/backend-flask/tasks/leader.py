@@ -0,0 +1,130 @@
+import os
+import threading
+
+from tasks.db import TASKS_DB_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# "leader": one worker runs every reminder; "sharded": up to REMINDER_SHARDS
+# workers each run the reminders for their slice of task ids
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "leader")
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "1"))
+SCHEDULER_LOCK_DIR = os.getenv("SCHEDULER_LOCK_DIR", os.path.dirname(os.path.abspath(TASKS_DB_PATH)))
+# How often a follower retries the lock, so it takes over if the holder dies
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "15"))
+
+
+class FileLease:
+    """Exclusive, non-blocking OS file lock.
+
+    The lock is released by the OS when the holding process exits, so a
+    crashed leader never blocks a successor.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SchedulerCoordinator:
+    """Runs the reminder scheduler only in the worker(s) holding a lease.
+
+    In leader mode there is a single lease; in sharded mode there is one
+    lease per shard and each worker claims the first free one at start.
+    Every worker keeps retrying in the background and takes over leases
+    that are free, whether their holder exited or there are fewer workers
+    than shards, so no shard is left without a scheduler.
+    """
+
+    def __init__(self, scheduler, mode=SCHEDULER_MODE, shards=REMINDER_SHARDS, lock_dir=SCHEDULER_LOCK_DIR):
+        self.scheduler = scheduler
+        self.shards = shards if mode == "sharded" else 1
+        self.lock_dir = lock_dir
+        self.leases = {}
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _lock_path(self, index):
+        if self.shards == 1:
+            return os.path.join(self.lock_dir, "reminders.lock")
+        return os.path.join(self.lock_dir, f"reminders.shard-{index}-of-{self.shards}.lock")
+
+    def _try_acquire(self, limit=None):
+        """Take up to `limit` free leases (all of them by default)"""
+        with self._lock:
+            for index in range(self.shards):
+                if self._stopping.is_set() or (limit is not None and limit <= 0):
+                    return
+                if index in self.leases:
+                    continue
+                lease = FileLease(self._lock_path(index))
+                if not lease.acquire():
+                    continue
+                self.leases[index] = lease
+                if limit is not None:
+                    limit -= 1
+                if self.shards == 1:
+                    self.scheduler.start()
+                elif len(self.leases) == 1:
+                    self.scheduler.start(shard=(index, self.shards))
+                else:
+                    self.scheduler.add_shard(index)
+                print(f"[Scheduler]  Worker {os.getpid()} runs reminders" +
+                      (f" for shard {index + 1}/{self.shards}" if self.shards > 1 else ""))
+
+    def start(self):
+        # One lease each at start so workers starting together spread the shards
+        self._try_acquire(limit=1)
+
+        def follow():
+            while len(self.leases) < self.shards and not self._stopping.wait(LEADER_RETRY_SECONDS):
+                self._try_acquire()
+
+        self._thread = threading.Thread(target=follow, name="scheduler-follower", daemon=True)
+        self._thread.start()
+
+    @property
+    def is_leader(self):
+        return bool(self.leases)
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            if self.leases:
+                self.scheduler.stop()
+            for lease in self.leases.values():
+                lease.release()
+            self.leases.clear()
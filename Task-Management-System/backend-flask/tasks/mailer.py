@@ -0,0 +1,88 @@
+import os
+import queue
+import random
+import smtplib
+import time
+from email.message import EmailMessage
+
+# SMTP configuration
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+REMINDER_FROM = os.getenv("REMINDER_FROM", "reminders@company.com")
+
+# Retry policy for transient SMTP failures
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+SMTP_BACKOFF_BASE = float(os.getenv("SMTP_BACKOFF_BASE", "0.5"))
+
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPPool:
+    """Fixed-size pool of reusable SMTP connections.
+
+    Connections are opened lazily and kept open between messages; a broken
+    connection is dropped and reopened on the next attempt.
+    """
+
+    def __init__(self, size, host=SMTP_HOST, port=SMTP_PORT):
+        self.host = host
+        self.port = port
+        self._pool = queue.LifoQueue()
+        for _ in range(size):
+            self._pool.put(None)
+
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        if SMTP_STARTTLS:
+            conn.starttls()
+        if SMTP_USER:
+            conn.login(SMTP_USER, SMTP_PASSWORD)
+        return conn
+
+    def send(self, message):
+        """Send with exponential backoff; raises once retries are exhausted"""
+        for attempt in range(SMTP_MAX_RETRIES + 1):
+            conn = self._pool.get()
+            try:
+                if conn is None:
+                    conn = self._connect()
+                conn.send_message(message)
+                return attempt
+            except TRANSIENT_ERRORS + (smtplib.SMTPResponseException,) as e:
+                permanent = isinstance(e, smtplib.SMTPResponseException) and not 400 <= e.smtp_code < 500
+                self._discard(conn)
+                conn = None
+                if permanent or attempt == SMTP_MAX_RETRIES:
+                    raise
+                time.sleep(SMTP_BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random()))
+            finally:
+                self._pool.put(conn)
+
+    def _discard(self, conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while not self._pool.empty():
+            conn = self._pool.get_nowait()
+            if conn is not None:
+                try:
+                    conn.quit()
+                except Exception:
+                    self._discard(conn)
+
+
+def build_message(recipient, subject, body):
+    message = EmailMessage()
+    message["From"] = REMINDER_FROM
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
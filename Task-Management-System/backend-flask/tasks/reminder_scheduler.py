@@ -0,0 +1,393 @@
+import heapq
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from tasks.dates import UTC_FORMAT, parse_due_date, utc_now, utc_text
+from tasks.db import ensure_schema, get_connection, get_pool
+from tasks.email_remainder import digest_message, iter_digests
+from tasks.mailer import SMTPPool
+
+# Send a task's reminder this long before it is due
+REMINDER_LEAD_MINUTES = int(os.getenv("REMINDER_LEAD_MINUTES", "60"))
+# Delay before retrying a reminder whose delivery failed
+REMINDER_RETRY_SECONDS = int(os.getenv("REMINDER_RETRY_SECONDS", "300"))
+# Reminders falling due within this many seconds of each other go out as one
+# digest per assignee
+REMINDER_BATCH_SECONDS = float(os.getenv("REMINDER_BATCH_SECONDS", "60"))
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "8"))
+# How often the scheduler picks up task writes made by other worker processes
+REMINDER_POLL_SECONDS = float(os.getenv("REMINDER_POLL_SECONDS", "5"))
+# Sharded mode assigns contiguous blocks of this many task ids round-robin
+REMINDER_SHARD_RANGE_SIZE = int(os.getenv("REMINDER_SHARD_RANGE_SIZE", "1000"))
+# Change log rows older than this are pruned
+REMINDER_CHANGES_RETENTION_HOURS = 24
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminder_jobs (
+    task_id INTEGER PRIMARY KEY,
+    remind_at TEXT NOT NULL,
+    due_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reminder_jobs_remind_at ON reminder_jobs (remind_at);
+CREATE TABLE IF NOT EXISTS reminder_ledger (
+    task_id INTEGER NOT NULL,
+    due_date TEXT NOT NULL,
+    claimed_at TEXT NOT NULL,
+    sent_at TEXT,
+    PRIMARY KEY (task_id, due_date)
+);
+CREATE TABLE IF NOT EXISTS reminder_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    changed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reminder_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def ensure_reminder_schema(conn):
+    ensure_schema(conn)
+    conn.executescript(SCHEMA)
+    # The job store is filled from tasks exactly once; afterwards it is
+    # maintained incrementally by task writes.
+    backfilled = conn.execute("SELECT value FROM reminder_meta WHERE key = 'backfilled'").fetchone()
+    if not backfilled:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO reminder_jobs (task_id, remind_at, due_date)
+            SELECT id, strftime(?, due_date, ?), due_date FROM tasks
+            WHERE completed = 0 AND due_date IS NOT NULL AND assignee IS NOT NULL
+            """,
+            (UTC_FORMAT, f"-{REMINDER_LEAD_MINUTES} minutes")
+        )
+        conn.execute("INSERT OR REPLACE INTO reminder_meta (key, value) VALUES ('backfilled', '1')")
+        conn.execute("INSERT OR REPLACE INTO reminder_meta (key, value) VALUES ('utc', '1')")
+    # Jobs written before every time was stored as UTC (see tasks.dates)
+    utc = conn.execute("SELECT value FROM reminder_meta WHERE key = 'utc'").fetchone()
+    if not utc:
+        conn.execute(
+            """
+            UPDATE reminder_jobs SET due_date = COALESCE(strftime(?1, due_date), due_date),
+                                     remind_at = COALESCE(strftime(?1, due_date, ?2), remind_at)
+            """,
+            (UTC_FORMAT, f"-{REMINDER_LEAD_MINUTES} minutes")
+        )
+        conn.execute("UPDATE reminder_ledger SET due_date = COALESCE(strftime(?, due_date), due_date)", (UTC_FORMAT,))
+        conn.execute("INSERT OR REPLACE INTO reminder_meta (key, value) VALUES ('utc', '1')")
+    conn.commit()
+
+
+def shard_of(task_id, shards):
+    return (task_id // REMINDER_SHARD_RANGE_SIZE) % shards
+
+
+def remind_at_for(due_date):
+    """The UTC reminder time for a due date, in the stored form"""
+    return utc_text(parse_due_date(due_date) - timedelta(minutes=REMINDER_LEAD_MINUTES))
+
+
+class ReminderScheduler:
+    """Per-task reminders fired at their due time from an in-memory min-heap.
+
+    The heap is loaded once from the persistent reminder_jobs table and then
+    kept current through on_task_saved()/on_task_deleted(), which task writes
+    call inside their own transaction. Before sending, a reminder is claimed
+    in reminder_ledger keyed by (task_id, due_date), so a restart or a second
+    worker never sends the same reminder twice. Reminders due together are
+    sent as one digest per assignee, as send_remainder() does.
+
+    Task writes in other processes reach the heap through reminder_changes,
+    which the running scheduler polls every REMINDER_POLL_SECONDS. Started
+    with shard=(index, count), it only handles tasks whose id range maps to
+    that shard, plus any shards handed to it later with add_shard().
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._heap = []
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._executor = None
+        self._pool = None
+        # (set of shard indices, shard count), or None for every task
+        self.shard = None
+        self._last_change = 0
+        self._last_poll = 0.0
+        self.stats = {"loaded": 0, "sent": 0, "digests": 0, "duplicates": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    # Task write hooks -------------------------------------------------
+
+    def on_task_saved(self, conn, task):
+        """Upsert or drop the task's job; call inside the task's transaction"""
+        if task["completed"] or not task["due_date"] or not task["assignee"]:
+            self.on_task_deleted(conn, task["id"])
+            return
+        remind_at = remind_at_for(task["due_date"])
+        conn.execute(
+            "INSERT OR REPLACE INTO reminder_jobs (task_id, remind_at, due_date) VALUES (?, ?, ?)",
+            (task["id"], remind_at, task["due_date"])
+        )
+        self._log_change(conn, task["id"])
+        if self._owns(task["id"]):
+            self._push(task["id"], remind_at)
+
+    def on_task_deleted(self, conn, task_id):
+        conn.execute("DELETE FROM reminder_jobs WHERE task_id = ?", (task_id,))
+        self._log_change(conn, task_id)
+        with self._cond:
+            self._jobs.pop(task_id, None)
+
+    def on_tasks_completed(self, conn, task_ids):
+        """Drop the jobs of a batch of completed tasks in one statement"""
+        conn.execute("DELETE FROM reminder_jobs WHERE task_id IN (SELECT value FROM json_each(?))", (json.dumps(task_ids),))
+        now = utc_text(utc_now())
+        conn.executemany(
+            "INSERT INTO reminder_changes (task_id, changed_at) VALUES (?, ?)",
+            [(task_id, now) for task_id in task_ids]
+        )
+        with self._cond:
+            for task_id in task_ids:
+                self._jobs.pop(task_id, None)
+
+    # Lifecycle --------------------------------------------------------
+
+    def start(self, shard=None):
+        self.shard = ({shard[0]}, shard[1]) if shard else None
+        with get_pool(self.db_path).connection() as conn:
+            ensure_reminder_schema(conn)
+            # Read the change log position first so no concurrent write is missed
+            self._last_change = conn.execute("SELECT COALESCE(MAX(id), 0) FROM reminder_changes").fetchone()[0]
+            if shard:
+                rows = self._shard_jobs(conn, *shard)
+            else:
+                rows = conn.execute("SELECT task_id, remind_at FROM reminder_jobs").fetchall()
+
+        with self._cond:
+            for row in rows:
+                self._jobs[row["task_id"]] = row["remind_at"]
+            self._heap = [(remind_at, task_id) for task_id, remind_at in self._jobs.items()]
+            heapq.heapify(self._heap)
+            self.stats["loaded"] = len(self._heap)
+
+        self._pool = SMTPPool(REMINDER_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=REMINDER_CONCURRENCY)
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def add_shard(self, index):
+        """Also handle shard `index` of a running sharded scheduler"""
+        with self._cond:
+            # Owned before loading, so writes from now on are pushed by the hooks
+            self.shard[0].add(index)
+        with get_pool(self.db_path).connection() as conn:
+            rows = self._shard_jobs(conn, index, self.shard[1])
+        for row in rows:
+            self._push(row["task_id"], row["remind_at"])
+        self._count("loaded", len(rows))
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stopping
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        if self._pool:
+            self._pool.close()
+
+    # Internals --------------------------------------------------------
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _owns(self, task_id):
+        if not self.running:
+            return False
+        return self.shard is None or shard_of(task_id, self.shard[1]) in self.shard[0]
+
+    def _shard_jobs(self, conn, index, count):
+        return conn.execute(
+            "SELECT task_id, remind_at FROM reminder_jobs WHERE (task_id / ?) % ? = ?",
+            (REMINDER_SHARD_RANGE_SIZE, count, index)
+        ).fetchall()
+
+    def _log_change(self, conn, task_id):
+        conn.execute(
+            "INSERT INTO reminder_changes (task_id, changed_at) VALUES (?, ?)",
+            (task_id, utc_text(utc_now()))
+        )
+
+    def _poll_changes(self):
+        """Apply task writes logged since the last poll to the heap"""
+        with get_pool(self.db_path).connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT c.id, c.task_id, j.remind_at FROM reminder_changes c
+                LEFT JOIN reminder_jobs j ON j.task_id = c.task_id
+                WHERE c.id > ? ORDER BY c.id
+                """,
+                (self._last_change,)
+            ).fetchall()
+            # Prune old entries once every thousand changes
+            if rows and rows[-1]["id"] // 1000 != self._last_change // 1000:
+                cutoff = utc_now() - timedelta(hours=REMINDER_CHANGES_RETENTION_HOURS)
+                conn.execute("DELETE FROM reminder_changes WHERE changed_at < ?", (utc_text(cutoff),))
+
+        for row in rows:
+            self._last_change = row["id"]
+            task_id, remind_at = row["task_id"], row["remind_at"]
+            if not self._owns(task_id):
+                continue
+            with self._cond:
+                current = self._jobs.get(task_id)
+            if remind_at is None:
+                with self._cond:
+                    self._jobs.pop(task_id, None)
+            elif remind_at != current:
+                self._push(task_id, remind_at)
+
+    def _push(self, task_id, remind_at):
+        with self._cond:
+            self._jobs[task_id] = remind_at
+            heapq.heappush(self._heap, (remind_at, task_id))
+            # Wake the timer in case this is now the earliest reminder
+            self._cond.notify()
+
+    def _next_due(self):
+        """Pop the due reminders as [(task_id, remind_at)], or return None when it is time to poll"""
+        with self._cond:
+            while not self._stopping:
+                until_poll = REMINDER_POLL_SECONDS - (time.monotonic() - self._last_poll)
+                if until_poll <= 0:
+                    return None
+                if not self._heap:
+                    self._cond.wait(timeout=until_poll)
+                    continue
+                remind_at, task_id = self._heap[0]
+                if self._jobs.get(task_id) != remind_at:
+                    # Superseded by a later update, or cancelled
+                    heapq.heappop(self._heap)
+                    continue
+                try:
+                    delay = (parse_due_date(remind_at) - utc_now()).total_seconds()
+                except ValueError:
+                    print(f"[Remainder]  Dropping task {task_id}: bad reminder time {remind_at!r}")
+                    heapq.heappop(self._heap)
+                    del self._jobs[task_id]
+                    continue
+                if delay <= 0:
+                    return self._pop_due()
+                self._cond.wait(timeout=min(delay, until_poll))
+        return None
+
+    def _pop_due(self):
+        """Pop every live reminder due within REMINDER_BATCH_SECONDS; call with _cond held"""
+        horizon = utc_text(utc_now() + timedelta(seconds=REMINDER_BATCH_SECONDS))
+        due = []
+        while self._heap and self._heap[0][0] <= horizon:
+            remind_at, task_id = heapq.heappop(self._heap)
+            if self._jobs.get(task_id) == remind_at:
+                del self._jobs[task_id]
+                due.append((task_id, remind_at))
+        return due
+
+    def _run(self):
+        while not self._stopping:
+            if time.monotonic() - self._last_poll >= REMINDER_POLL_SECONDS:
+                self._last_poll = time.monotonic()
+                try:
+                    self._poll_changes()
+                except Exception as e:
+                    print(f"[Remainder]  Failed to read task changes: {e}")
+            # One bad row must not stop every other reminder
+            try:
+                due = self._next_due()
+                if due:
+                    for recipient, jobs in self._claim(due).items():
+                        self._executor.submit(self._deliver, recipient, jobs)
+            except Exception as e:
+                print(f"[Remainder]  Scheduler error: {e}")
+                time.sleep(1)
+
+    def _claim(self, due):
+        """Claim a batch of due reminders in one transaction.
+
+        Returns {assignee: [(task, remind_at), ...]} for the reminders this
+        worker now owns; the rest were rescheduled, removed or already sent.
+        """
+        conn = get_connection(self.db_path)
+        try:
+            claimed = {}
+            for task_id, remind_at in due:
+                job = conn.execute("SELECT remind_at, due_date FROM reminder_jobs WHERE task_id = ?", (task_id,)).fetchone()
+                if not job or job["remind_at"] != remind_at:
+                    # Rescheduled or removed by another worker since we loaded it
+                    continue
+                task = conn.execute(
+                    "SELECT id, title, due_date, assignee, completed FROM tasks WHERE id = ?", (task_id,)
+                ).fetchone()
+                if not task or task["completed"] or task["due_date"] != job["due_date"]:
+                    conn.execute("DELETE FROM reminder_jobs WHERE task_id = ? AND remind_at = ?", (task_id, remind_at))
+                    continue
+                if not conn.execute(
+                    "INSERT OR IGNORE INTO reminder_ledger (task_id, due_date, claimed_at) VALUES (?, ?, ?)",
+                    (task_id, task["due_date"], utc_text(utc_now()))
+                ).rowcount:
+                    self._count("duplicates")
+                    continue
+                claimed.setdefault(task["assignee"], []).append((task, remind_at))
+            conn.commit()
+            return claimed
+        finally:
+            conn.close()
+
+    def _deliver(self, recipient, jobs):
+        """Send one digest for a recipient's claimed reminders"""
+        tasks = sorted((task for task, _ in jobs), key=lambda task: task["id"])
+        conn = get_connection(self.db_path)
+        try:
+            for _, listed, total in iter_digests(tasks):
+                try:
+                    self._pool.send(digest_message(recipient, listed, total))
+                except Exception as e:
+                    print(f"[Remainder]  Failed to send reminders to {recipient}: {e}")
+                    self._count("failed")
+                    # Release the claims and try again later
+                    retry_at = utc_text(utc_now() + timedelta(seconds=REMINDER_RETRY_SECONDS))
+                    for task, _ in jobs:
+                        conn.execute("DELETE FROM reminder_ledger WHERE task_id = ? AND due_date = ?",
+                                     (task["id"], task["due_date"]))
+                        conn.execute("UPDATE reminder_jobs SET remind_at = ? WHERE task_id = ?", (retry_at, task["id"]))
+                    conn.commit()
+                    for task, _ in jobs:
+                        self._push(task["id"], retry_at)
+                    return
+
+            sent_at = utc_text(utc_now())
+            for task, remind_at in jobs:
+                conn.execute(
+                    "UPDATE reminder_ledger SET sent_at = ? WHERE task_id = ? AND due_date = ?",
+                    (sent_at, task["id"], task["due_date"])
+                )
+                conn.execute("DELETE FROM reminder_jobs WHERE task_id = ? AND remind_at = ?", (task["id"], remind_at))
+            conn.commit()
+            self._count("digests")
+            self._count("sent", len(jobs))
+        finally:
+            conn.close()
@@ -0,0 +1,78 @@
+import re
+
+# Title matches count this many times more than description matches
+TITLE_WEIGHT = 10.0
+
+# External-content FTS5 index over tasks: the text lives only in tasks and
+# the triggers keep the index in step with every write.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title, description,
+    content='tasks', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_index(conn):
+    """Create the index and triggers; index existing rows the first time"""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone()
+    conn.executescript(SEARCH_SCHEMA)
+    if not exists:
+        conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+    conn.commit()
+
+
+def build_match_query(text, operator="AND"):
+    """Turn free text into an FTS5 query of quoted prefix terms.
+
+    Quoting keeps user input from being parsed as FTS5 syntax; the trailing
+    * makes every term a prefix match ("rep" finds "report").
+    """
+    terms = TOKEN_PATTERN.findall(text.lower())
+    return f" {operator} ".join(f'"{term}"*' for term in terms)
+
+
+def search_tasks(conn, text, limit=20, completed=None):
+    """Return task rows matching `text`, best bm25 rank first.
+
+    All terms must match; if nothing does, any term may match, so
+    conversational queries ("task about the Q3 report") still find results.
+    """
+    where, params = "", []
+    if completed is not None:
+        where = "AND t.completed = ?"
+        params.append(int(bool(completed)))
+
+    for operator in ("AND", "OR"):
+        query = build_match_query(text, operator)
+        if not query:
+            return []
+        # Ordering by the hidden rank column lets FTS5 sort matches itself
+        rows = conn.execute(
+            f"""
+            SELECT t.*, tasks_fts.rank AS rank,
+                   snippet(tasks_fts, 1, '[', ']', '...', 12) AS snippet
+            FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ? AND tasks_fts.rank MATCH ? {where}
+            ORDER BY tasks_fts.rank
+            LIMIT ?
+            """,
+            (query, f"bm25({TITLE_WEIGHT}, 1.0)", *params, limit)
+        ).fetchall()
+        if rows:
+            return rows
+    return []
@@ -0,0 +1,207 @@
+import json
+import os
+from tasks.dates import normalize_due_date, utc_now, utc_text
+from tasks.db import get_pool
+from tasks.search import search_tasks
+
+# Default and maximum number of tasks returned per page
+TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", "50"))
+TASKS_MAX_PAGE_SIZE = int(os.getenv("TASKS_MAX_PAGE_SIZE", "500"))
+# Largest batch accepted by create_many() / complete_many()
+TASKS_BULK_LIMIT = int(os.getenv("TASKS_BULK_LIMIT", "1000"))
+
+TASK_FIELDS = ("title", "description", "completed", "due_date", "assignee")
+
+
+def _task_dict(row):
+    task = dict(row)
+    task["completed"] = bool(task["completed"])
+    return task
+
+
+class TaskStore:
+    """Data access for the tasks table.
+
+    Lists use keyset pagination on id (`after` is the last id of the previous
+    page), so every page costs the same index seek however deep it is. Each
+    filter combination is served by one of the indexes in tasks.db.SCHEMA.
+
+    `listeners` are notified inside the write transaction through
+    on_task_saved(conn, task) / on_task_deleted(conn, task_id), and
+    on_tasks_completed(conn, task_ids) for bulk completion.
+    """
+
+    def __init__(self, db_path=None, listeners=()):
+        self.db_path = db_path
+        self.listeners = list(listeners)
+
+    @property
+    def pool(self):
+        return get_pool(self.db_path)
+
+    # Reads ------------------------------------------------------------
+
+    def get(self, task_id):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _task_dict(row) if row else None
+
+    def list(self, completed=None, assignee=None, after=0, limit=TASKS_PAGE_SIZE):
+        """Return (tasks, next_after); next_after is None on the last page"""
+        limit = max(1, min(limit, TASKS_MAX_PAGE_SIZE))
+        where, params = ["id > ?"], [after]
+        if completed is not None:
+            where.append("completed = ?")
+            params.append(int(bool(completed)))
+        if assignee is not None:
+            where.append("assignee = ?")
+            params.append(assignee)
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM tasks WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+        tasks = [_task_dict(row) for row in rows[:limit]]
+        return tasks, (tasks[-1]["id"] if len(rows) > limit else None)
+
+    def search(self, text, limit=TASKS_PAGE_SIZE, completed=None):
+        """Full-text search over titles and descriptions, best match first"""
+        limit = max(1, min(limit, TASKS_MAX_PAGE_SIZE))
+        with self.pool.connection() as conn:
+            rows = search_tasks(conn, text, limit, completed)
+        return [_task_dict(row) for row in rows]
+
+    def summary(self, assignee=None):
+        """Dashboard counts, answered from the indexes alone"""
+        now = utc_text(utc_now())
+        with self.pool.connection() as conn:
+            if assignee is None:
+                counts = dict(conn.execute("SELECT completed, COUNT(*) FROM tasks GROUP BY completed").fetchall())
+                overdue = conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE completed = 0 AND due_date < ?", (now,)
+                ).fetchone()[0]
+            else:
+                counts = dict(conn.execute(
+                    "SELECT completed, COUNT(*) FROM tasks WHERE assignee = ? GROUP BY completed", (assignee,)
+                ).fetchall())
+                overdue = conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE completed = 0 AND assignee = ? AND due_date < ?",
+                    (assignee, now)
+                ).fetchone()[0]
+        done, open_ = counts.get(1, 0), counts.get(0, 0)
+        return {"total": done + open_, "completed": done, "open": open_, "overdue": overdue}
+
+    def iter_reminder_tasks(self, due_before, page_size=1000):
+        """Yield incomplete, assigned tasks due before the aware datetime
+        `due_before` (or undated).
+
+        Rows come ordered by (assignee, id) one page at a time using keyset
+        pagination, so memory use does not grow with the table.
+        """
+        last_assignee, last_id = "", 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, title, due_date, assignee FROM tasks
+                    WHERE completed = 0 AND assignee IS NOT NULL
+                      AND (assignee, id) > (?, ?)
+                      AND (due_date IS NULL OR due_date <= ?)
+                    ORDER BY assignee, id
+                    LIMIT ?
+                    """,
+                    (last_assignee, last_id, utc_text(due_before), page_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_assignee, last_id = rows[-1]["assignee"], rows[-1]["id"]
+
+    # Writes -----------------------------------------------------------
+
+    def _saved(self, conn, task_id):
+        row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        for listener in self.listeners:
+            listener.on_task_saved(conn, row)
+        return _task_dict(row)
+
+    def create(self, data):
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO tasks (title, description, completed, due_date, assignee) VALUES (?, ?, ?, ?, ?)",
+                (data["title"], data.get("description"), int(bool(data.get("completed"))),
+                 normalize_due_date(data.get("due_date")), data.get("assignee"))
+            )
+            return self._saved(conn, cursor.lastrowid)
+
+    def update(self, task_id, data):
+        """Apply the TASK_FIELDS present in `data`; returns None if missing"""
+        updates = {field: data[field] for field in TASK_FIELDS if field in data}
+        if "completed" in updates:
+            updates["completed"] = int(bool(updates["completed"]))
+        if "due_date" in updates:
+            updates["due_date"] = normalize_due_date(updates["due_date"])
+        with self.pool.connection() as conn:
+            if updates:
+                assignments = ", ".join(f"{field} = ?" for field in updates)
+                conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*updates.values(), task_id))
+            return self._saved(conn, task_id)
+
+    def delete(self, task_id):
+        with self.pool.connection() as conn:
+            deleted = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount
+            for listener in self.listeners:
+                listener.on_task_deleted(conn, task_id)
+        return bool(deleted)
+
+    # Bulk writes --------------------------------------------------------
+    #
+    # The whole batch travels as one JSON parameter and is expanded with
+    # json_each(), so a batch is a single statement however large it is.
+
+    def create_many(self, items):
+        """Insert every task in one statement; returns the created tasks"""
+        if not isinstance(items, list) or any(not isinstance(item, dict) for item in items):
+            raise ValueError("tasks must be a list of task objects")
+        if len(items) > TASKS_BULK_LIMIT:
+            raise ValueError(f"at most {TASKS_BULK_LIMIT} tasks per batch")
+        if any(not item.get("title") for item in items):
+            raise ValueError("title is required")
+        items = [dict(item, due_date=normalize_due_date(item.get("due_date"))) for item in items]
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                """
+                INSERT INTO tasks (title, description, completed, due_date, assignee)
+                SELECT json_extract(value, '$.title'), json_extract(value, '$.description'),
+                       COALESCE(json_extract(value, '$.completed'), 0) != 0,
+                       json_extract(value, '$.due_date'), json_extract(value, '$.assignee')
+                FROM json_each(?)
+                RETURNING *
+                """,
+                (json.dumps(items),)
+            ).fetchall()
+            for row in rows:
+                for listener in self.listeners:
+                    listener.on_task_saved(conn, row)
+        return sorted((_task_dict(row) for row in rows), key=lambda task: task["id"])
+
+    def complete_many(self, task_ids):
+        """Mark tasks completed in one statement; returns the ids changed"""
+        if len(task_ids) > TASKS_BULK_LIMIT:
+            raise ValueError(f"at most {TASKS_BULK_LIMIT} tasks per batch")
+        with self.pool.connection() as conn:
+            completed = [row[0] for row in conn.execute(
+                """
+                UPDATE tasks SET completed = 1
+                WHERE completed = 0 AND id IN (SELECT value FROM json_each(?))
+                RETURNING id
+                """,
+                (json.dumps([int(task_id) for task_id in task_ids]),)
+            )]
+            if completed:
+                for listener in self.listeners:
+                    listener.on_tasks_completed(conn, completed)
+        return sorted(completed)
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from tasks.db import get_pool
+from tasks.leader import SchedulerCoordinator
+from tasks.reminder_scheduler import REMINDER_SHARD_RANGE_SIZE, ReminderScheduler, ensure_reminder_schema
+
+
+@pytest.fixture
+def coordinators(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr("tasks.leader.LEADER_RETRY_SECONDS", 0.05)
+    with get_pool(db_path).connection() as conn:
+        ensure_reminder_schema(conn)
+    started = []
+
+    def start(shards):
+        coordinator = SchedulerCoordinator(ReminderScheduler(db_path), mode="sharded", shards=shards, lock_dir=str(tmp_path))
+        coordinator.start()
+        started.append(coordinator)
+        return coordinator
+
+    yield start
+    for coordinator in started:
+        coordinator.stop()
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_fewer_workers_than_shards_still_cover_every_shard(db_path, coordinators):
+    # A reminder in the last shard's id range
+    task_id = 2 * REMINDER_SHARD_RANGE_SIZE + 1
+    with get_pool(db_path).connection() as conn:
+        conn.execute("INSERT INTO reminder_jobs (task_id, remind_at, due_date) VALUES (?, ?, ?)",
+                     (task_id, "2099-01-01T00:00:00Z", "2099-01-01T01:00:00Z"))
+
+    first, second = coordinators(3), coordinators(3)
+    # Each worker starts with one shard of its own
+    assert len(first.leases) == len(second.leases) == 1
+    assert wait_until(lambda: len(first.leases) + len(second.leases) == 3)
+    assert not set(first.leases) & set(second.leases)
+
+    owner = first if 2 in first.leases else second
+    assert owner.scheduler.shard == (set(owner.leases), 3)
+    assert owner.scheduler._jobs[task_id] == "2099-01-01T00:00:00Z"
+
+
+def test_shards_of_a_stopped_worker_are_taken_over(coordinators):
+    first, second = coordinators(2), coordinators(2)
+    assert wait_until(lambda: len(first.leases) + len(second.leases) == 2)
+    first.stop()
+    assert wait_until(lambda: len(second.leases) == 2)
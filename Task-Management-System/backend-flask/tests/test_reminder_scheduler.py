@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tasks.dates import parse_due_date
+from tasks.db import get_pool
+from tasks.reminder_scheduler import REMINDER_LEAD_MINUTES, ReminderScheduler, ensure_reminder_schema, remind_at_for
+from tasks.store import TaskStore
+
+
+@pytest.fixture
+def scheduler(db_path):
+    with get_pool(db_path).connection() as conn:
+        ensure_reminder_schema(conn)
+    scheduler = ReminderScheduler(db_path)
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+@pytest.fixture
+def kolkata(monkeypatch):
+    """Run with a server clock well away from UTC"""
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_reminder_times_are_utc_whatever_the_server_zone(kolkata):
+    assert remind_at_for("2026-10-20T09:00:00Z") == "2026-10-20T08:00:00Z"
+    assert remind_at_for("2026-10-20T14:30:00+05:30") == "2026-10-20T08:00:00Z"
+    # Without an offset a due date is UTC, never the server's local time
+    assert remind_at_for("2026-10-20T09:00:00") == "2026-10-20T08:00:00Z"
+    assert remind_at_for("2026-10-20") == "2026-10-19T23:00:00Z"
+
+
+def test_reminder_for_a_utc_due_date_fires_on_time(db_path, kolkata):
+    scheduler = ReminderScheduler(db_path)
+    scheduler.start()
+    try:
+        store = TaskStore(db_path, listeners=[scheduler])
+        due = datetime.now(timezone.utc) + timedelta(minutes=REMINDER_LEAD_MINUTES, hours=1)
+        task = store.create({"title": "Review", "due_date": due.strftime("%Y-%m-%dT%H:%M:%SZ"), "assignee": "dev@company.com"})
+        remind_at = scheduler._jobs[task["id"]]
+        delay = (parse_due_date(remind_at) - datetime.now(timezone.utc)).total_seconds()
+        assert 3500 < delay <= 3600
+    finally:
+        scheduler.stop()
+
+
+@pytest.mark.parametrize("value", ["next friday", "20/10/2026", "", 20261020])
+def test_bad_due_dates_raise_value_error(value):
+    with pytest.raises(ValueError):
+        parse_due_date(value)
+
+
+def test_aware_due_date_does_not_stop_the_scheduler(db_path, scheduler):
+    store = TaskStore(db_path, listeners=[scheduler])
+    store.create({"title": "Review", "due_date": "2099-10-20T09:00:00Z", "assignee": "dev@company.com"})
+    time.sleep(0.2)
+    assert scheduler._thread.is_alive()
+
+
+def test_bad_reminder_row_is_dropped(scheduler):
+    scheduler._push(1, "not a date")
+    time.sleep(0.2)
+    assert scheduler._thread.is_alive()
+    assert 1 not in scheduler._jobs
+    # Later reminders are still scheduled
+    scheduler._push(2, "2099-01-01 00:00:00")
+    time.sleep(0.1)
+    assert scheduler._jobs == {2: "2099-01-01 00:00:00"}
+
+
+class Outbox:
+    """Collects the messages an SMTPPool would send"""
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append(message)
+        return 0
+
+    def close(self):
+        pass
+
+
+def test_reminders_due_together_go_out_as_one_digest_per_assignee(db_path, monkeypatch):
+    outbox = Outbox()
+    monkeypatch.setattr("tasks.reminder_scheduler.SMTPPool", lambda size: outbox)
+    with get_pool(db_path).connection() as conn:
+        ensure_reminder_schema(conn)
+    scheduler = ReminderScheduler(db_path)
+    store = TaskStore(db_path, listeners=[scheduler])
+    due = (datetime.now(timezone.utc) + timedelta(minutes=30)).isoformat()
+    store.create_many([
+        {"title": "Review", "due_date": due, "assignee": "dev@company.com"},
+        {"title": "Ship", "due_date": due, "assignee": "dev@company.com"},
+        {"title": "Plan", "due_date": due, "assignee": "lead@company.com"},
+        {"title": "Later", "due_date": "2099-01-01T00:00:00Z", "assignee": "dev@company.com"}
+    ])
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 2
+        while scheduler.stats["sent"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        scheduler.stop()
+
+    assert sorted(message["To"] for message in outbox.messages) == ["dev@company.com", "lead@company.com"]
+    digest = next(message for message in outbox.messages if message["To"] == "dev@company.com")
+    assert digest["Subject"] == "Reminder: 2 open tasks"
+    assert "Review" in digest.get_content() and "Ship" in digest.get_content()
+    assert scheduler.stats["digests"] == 2
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tasks.db import get_connection
+from tasks.store import TaskStore
+
+
+@pytest.mark.parametrize("items", [[1, "x"], [{"title": "Review"}, None], {"title": "Review"}, "Review"])
+def test_create_many_rejects_items_that_are_not_tasks(db_path, items):
+    store = TaskStore(db_path)
+    with pytest.raises(ValueError):
+        store.create_many(items)
+    assert store.list()[0] == []
+
+
+def test_create_many_inserts_every_task(db_path):
+    store = TaskStore(db_path)
+    tasks = store.create_many([{"title": "Review"}, {"title": "Ship", "completed": True}])
+    assert [(task["title"], task["completed"]) for task in tasks] == [("Review", False), ("Ship", True)]
+
+
+def test_due_dates_are_stored_as_utc(db_path):
+    store = TaskStore(db_path)
+    task = store.create({"title": "Review", "due_date": "2026-10-20T14:30:00+05:30"})
+    assert task["due_date"] == "2026-10-20T09:00:00Z"
+    assert store.update(task["id"], {"due_date": "2026-10-21"})["due_date"] == "2026-10-21T00:00:00Z"
+    assert store.create_many([{"title": "Ship", "due_date": "2026-10-20T09:00:00"}])[0]["due_date"] == "2026-10-20T09:00:00Z"
+
+
+def test_overdue_count_compares_utc_times(db_path):
+    store = TaskStore(db_path)
+    # An hour ago in India is overdue; tomorrow UTC is not, whatever form it arrived in
+    past = (datetime.now(timezone(timedelta(hours=5, minutes=30))) - timedelta(hours=1)).isoformat(timespec="seconds")
+    future = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    store.create_many([{"title": "Late", "due_date": past}, {"title": "Soon", "due_date": future}])
+    assert store.summary()["overdue"] == 1
+    store.create({"title": "Mine", "due_date": past, "assignee": "dev@company.com"})
+    assert [row["title"] for row in store.iter_reminder_tasks(datetime.now(timezone.utc))] == ["Mine"]
+
+
+def test_existing_due_dates_are_migrated_to_utc(db_path):
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, description TEXT, "
+                 "completed INTEGER NOT NULL DEFAULT 0, due_date TEXT, assignee TEXT)")
+    conn.executemany("INSERT INTO tasks (title, due_date) VALUES (?, ?)",
+                     [("a", "2026-10-20T14:30:00+05:30"), ("b", "2026-10-20 09:00:00"), ("c", "someday")])
+    conn.commit()
+    conn.close()
+    tasks, _ = TaskStore(db_path).list()
+    assert [task["due_date"] for task in tasks] == ["2026-10-20T09:00:00Z", "2026-10-20T09:00:00Z", "someday"]
@@ -1,7 +1,16 @@
-
-CREATE TABLE tasks (
- id BIGINT AUTO_INCREMENT PRIMARY KEY,
- title VARCHAR(255) NOT NULL,
- description TEXT,
- completed BOOLEAN DEFAULT FALSE
-);
+
+CREATE TABLE tasks (
+ id BIGINT AUTO_INCREMENT PRIMARY KEY,
+ title VARCHAR(255) NOT NULL,
+ description TEXT,
+ completed BOOLEAN DEFAULT FALSE,
+ due_date DATETIME NULL,
+ assignee VARCHAR(255) NULL
+);
+
+-- Reminder scans: open tasks per assignee in id order, due date read from the index
+CREATE INDEX idx_tasks_reminder_queue ON tasks (completed, assignee, id, due_date);
+-- Task lists filtered by completion state, paged by id
+CREATE INDEX idx_tasks_completed ON tasks (completed, id);
+-- Per-assignee lists and dashboard counts
+CREATE INDEX idx_tasks_assignee ON tasks (assignee, completed, id);
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Conversations processed at once (one OutlookAgent per worker thread)
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "8"))
+# Conversations allowed to wait for a worker before new ones are rejected
+AGENT_QUEUE_SIZE = int(os.getenv("AGENT_QUEUE_SIZE", "32"))
+# Build the pool's agents in the background as soon as a server starts
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "true").lower() == "true"
+
+
+class PoolFullError(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class AgentPool:
+    """Bounded pool of OutlookAgent workers.
+
+    A worker takes an idle agent for each conversation and returns it
+    afterwards, so an agent never serves two conversations at once, and
+    every request starts from a fresh workflow state. At most `size` agents
+    are built. Clients, caches, conversation memory and the intent
+    router underneath are process-wide and thread-safe, so any worker can
+    pick up any session.
+
+    At most `size` conversations run and `queue_size` wait; beyond that
+    submissions raise PoolFullError so servers can answer 429 right away
+    instead of piling up requests.
+
+    Creating the pool is cheap: LangChain is imported and agents are built
+    on first use, or ahead of it by warm_up(). Each agent takes requests as
+    soon as it is built. `ready` is set once an agent exists, which servers
+    report as readiness.
+    """
+
+    def __init__(self, factory=None, size=AGENT_POOL_SIZE, queue_size=AGENT_QUEUE_SIZE):
+        self.factory = factory
+        self.size = size
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="agent")
+        self._admission = threading.BoundedSemaphore(size + queue_size)
+        self._idle = queue.LifoQueue()
+        self._built = 0
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.warmup_error = None
+        self._stats = {"agents": 0, "active": 0, "admitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._stats[name] += delta
+
+    def _build(self):
+        try:
+            if self.factory is None:
+                from outlook_agent import OutlookAgent
+                self.factory = OutlookAgent
+            agent = self.factory()
+        except Exception:
+            with self._lock:
+                self._built -= 1
+            raise
+        self._count("agents")
+        self.ready.set()
+        return agent
+
+    def _reserve(self):
+        """Claim one of the `size` agent slots; False when all are taken"""
+        with self._lock:
+            if self._built >= self.size:
+                return False
+            self._built += 1
+            return True
+
+    def _checkout(self):
+        """An idle agent, a new one while fewer than `size` exist, or the next one returned"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._reserve():
+                return self._build()
+            # Every slot is taken; check again in case a build fails
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                pass
+
+    def warm_up(self):
+        """Build up to `size` agents in the background; returns immediately.
+
+        Each agent joins the idle pool as soon as it is built, so requests
+        are served by the first agents while the rest are still building.
+        """
+        def build():
+            if not self._reserve():
+                return
+            try:
+                self._idle.put(self._build())
+            except Exception as e:
+                self.warmup_error = str(e)
+                print(f"Agent warm-up failed: {e}")
+
+        for _ in range(self.size):
+            self._executor.submit(build)
+
+    def _call(self, job):
+        agent = self._checkout()
+        self._count("active")
+        try:
+            return job(agent)
+        finally:
+            self._count("active", -1)
+            self._idle.put(agent)
+
+    def _done(self, future):
+        self._admission.release()
+        self._count("failed" if future.exception() else "completed")
+
+    def submit(self, job):
+        """Run job(agent) on a worker; returns a Future or raises PoolFullError"""
+        if not self._admission.acquire(blocking=False):
+            self._count("rejected")
+            raise PoolFullError(f"{self.size} conversations running and {self.queue_size} waiting")
+        self._count("admitted")
+        future = self._executor.submit(self._call, job)
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, user_input, session_id=None):
+        """Answer a message; blocks the caller until a worker has finished"""
+        return self.submit(lambda agent: agent.run(user_input, session_id)).result()
+
+    async def arun(self, user_input, session_id=None):
+        return await asyncio.wrap_future(self.submit(lambda agent: agent.run(user_input, session_id)))
+
+    def stream(self, user_input, session_id=None):
+        """Return a generator of OutlookAgent.stream() events.
+
+        Admission happens here, before the first event, so PoolFullError is
+        raised by this call rather than while iterating.
+        """
+        events = queue.Queue()
+
+        def job(agent):
+            try:
+                for event in agent.stream(user_input, session_id):
+                    events.put(event)
+            finally:
+                events.put(None)
+
+        self.submit(job)
+
+        def iterate():
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                yield event
+
+        return iterate()
+
+    def astream(self, user_input, session_id=None):
+        """Async version of stream() for the aiohttp server"""
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def job(agent):
+            try:
+                for event in agent.stream(user_input, session_id):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        self.submit(job)
+
+        async def iterate():
+            while True:
+                event = await events.get()
+                if event is None:
+                    return
+                yield event
+
+        return iterate()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["ready"] = self.ready.is_set()
+        stats["size"] = self.size
+        stats["queue_size"] = self.queue_size
+        stats["waiting"] = max(0, stats["admitted"] - stats["completed"] - stats["failed"] - stats["active"])
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_agent_pool():
+    """Return the process-wide AgentPool, creating it on first use"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = AgentPool()
+                _pool_pid = pid
+    return _pool
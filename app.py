@@ -1,9 +1,8 @@
-from flask import Flask, request, Response
-from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
-from botbuilder.schema import Activity
-from teams_bot import TeamsInterviewBot
+from flask import Flask, request, Response, jsonify
+from tracing import PROMETHEUS_CONTENT_TYPE, get_metrics
 import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,15 +11,47 @@ load_dotenv()
 # Create Flask app
 app = Flask(__name__)
 
-# Bot Framework Adapter Settings
-SETTINGS = BotFrameworkAdapterSettings(
-    app_id=os.getenv("MICROSOFT_APP_ID"),
-    app_password=os.getenv("MICROSOFT_APP_PASSWORD")
-)
+# One long-lived event loop serves every activity; Flask threads submit to it
+LOOP = asyncio.new_event_loop()
+threading.Thread(target=LOOP.run_forever, name="bot-event-loop", daemon=True).start()
 
-# Create adapter and bot
-ADAPTER = BotFrameworkAdapter(SETTINGS)
-BOT = TeamsInterviewBot()
+# The Bot Framework SDK, OpenAI client and Graph token are loaded by
+# get_bot(), so the worker answers health checks before they are ready
+_adapter = None
+_bot = None
+_bot_lock = threading.Lock()
+READY = threading.Event()
+_warmup_error = None
+
+def get_bot():
+    """Return (adapter, bot), importing and building them on first use"""
+    global _adapter, _bot
+    if _bot is None:
+        with _bot_lock:
+            if _bot is None:
+                from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
+                from teams_bot import TeamsInterviewBot
+                _adapter = BotFrameworkAdapter(BotFrameworkAdapterSettings(
+                    app_id=os.getenv("MICROSOFT_APP_ID"),
+                    app_password=os.getenv("MICROSOFT_APP_PASSWORD")
+                ))
+                _bot = TeamsInterviewBot()
+    return _adapter, _bot
+
+def warm_up():
+    """Build the bot and fetch its Graph token in the background"""
+    global _warmup_error
+    try:
+        _, bot = get_bot()
+        asyncio.run_coroutine_threadsafe(bot.warm_up(), LOOP).result()
+        READY.set()
+    except Exception as e:
+        _warmup_error = str(e)
+        print(f"Bot warm-up failed: {e}")
+
+# The debug reloader's watcher process serves nothing; only its child warms up
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    threading.Thread(target=warm_up, name="bot-warm-up", daemon=True).start()
 
 @app.route("/api/messages", methods=["POST"])
 def messages():
@@ -29,17 +60,17 @@ def messages():
     else:
         return Response(status=415)
 
+    from botbuilder.schema import Activity
+    adapter, bot = get_bot()
     activity = Activity().deserialize(body)
     auth_header = request.headers["Authorization"] if "Authorization" in request.headers else ""
 
     async def aux_func(turn_context):
-        await BOT.on_message_activity(turn_context)
+        await bot.on_message_activity(turn_context)
 
     try:
-        task = ADAPTER.process_activity(activity, auth_header, aux_func)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(task)
+        task = adapter.process_activity(activity, auth_header, aux_func)
+        asyncio.run_coroutine_threadsafe(task, LOOP).result()
         return Response(status=200)
     except Exception as e:
         print(f"Error: {e}")
@@ -49,5 +80,23 @@ def messages():
 def health_check():
     return {"status": "Teams Interview Bot is running!", "version": "1.0"}
 
+@app.route("/api/health", methods=["GET"])
+def liveness():
+    """Liveness: the worker is up; never waits on the bot"""
+    return jsonify({"status": "healthy"})
+
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness: 503 until the bot is built and its Graph token fetched"""
+    if not READY.is_set():
+        status = "failed" if _warmup_error else "warming_up"
+        return jsonify({"status": status, "error": _warmup_error}), 503
+    return jsonify({"status": "ready", "graph_token": bool(_bot.graph_token)})
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    """Span latency histograms, errors, LLM tokens and payload sizes for Prometheus"""
+    return Response(get_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=3978, debug=True)
\ No newline at end of file
@@ -1,63 +1,241 @@
+import json
 import os
+import threading
+import time
 import requests
-from azure.identity import ClientSecretCredential
 from datetime import datetime, timedelta
 
-class GraphAuthHelper:
+from tracing import start_span
+
+# Refresh tokens this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("GRAPH_TOKEN_REFRESH_MARGIN", "300"))
+# Optional file used to persist tokens across restarts
+TOKEN_CACHE_PATH = os.getenv("GRAPH_TOKEN_CACHE_PATH")
+
+
+class _Flight:
+    """A token fetch in progress that other callers can wait on"""
+
     def __init__(self):
+        self.done = threading.Event()
+        self.token = None
+
+
+class TokenCache:
+    """In-process access token cache keyed by tenant/client/scope.
+
+    Tokens are served until `refresh_margin` seconds before `expires_on`,
+    then refreshed in the background. Concurrent refreshes for the same key
+    are collapsed into a single request to the identity endpoint.
+    """
+
+    def __init__(self, refresh_margin=TOKEN_REFRESH_MARGIN, path=TOKEN_CACHE_PATH):
+        self.refresh_margin = refresh_margin
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flights = {}
+        self._timers = {}
+        self._load()
+
+    def get(self, key, fetch):
+        """Return a valid token for key, calling fetch() only when needed.
+
+        fetch() must return (token, expires_on) or None on failure.
+        """
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry and entry["expires_on"] - now > self.refresh_margin:
+            return entry["token"]
+        if entry and entry["expires_on"] > now:
+            # Still valid: serve it and refresh without blocking the caller
+            self._refresh_in_background(key, fetch)
+            return entry["token"]
+        return self._refresh(key, fetch)
+
+    def get_cached(self, key):
+        """Return the cached token for key if it has not expired"""
+        entry = self._entries.get(key)
+        if entry and entry["expires_on"] > time.time():
+            return entry["token"]
+        return None
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        self._save()
+
+    def _refresh(self, key, fetch):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.token
+
+        try:
+            result = fetch()
+            if result:
+                token, expires_on = result
+                self._store(key, token, expires_on, fetch)
+                flight.token = token
+            else:
+                # Fall back to a token that has not expired yet, if any
+                flight.token = self.get_cached(key)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.token
+
+    def _refresh_in_background(self, key, fetch):
+        if key in self._flights:
+            return
+        threading.Thread(target=self._refresh, args=(key, fetch), name="token-refresh", daemon=True).start()
+
+    def _store(self, key, token, expires_on, fetch):
+        with self._lock:
+            self._entries[key] = {"token": token, "expires_on": expires_on}
+            old_timer = self._timers.pop(key, None)
+            delay = expires_on - self.refresh_margin - time.time()
+            if delay > 0:
+                # Proactively refresh before expiry even if nobody asks
+                timer = threading.Timer(delay, self._refresh, args=(key, fetch))
+                timer.daemon = True
+                timer.start()
+                self._timers[key] = timer
+        if old_timer:
+            old_timer.cancel()
+        self._save()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            now = time.time()
+            self._entries = {
+                tuple(key.split("|")): entry
+                for key, entry in stored.items()
+                if entry.get("expires_on", 0) > now
+            }
+        except Exception as e:
+            print(f"Ignoring unreadable token cache {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                stored = {"|".join(key): entry for key, entry in self._entries.items()}
+            tmp_path = f"{self.path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Could not persist token cache: {e}")
+
+
+# Shared by every GraphAuthHelper in the process
+_token_cache = TokenCache()
+
+
+class GraphAuthHelper:
+    def __init__(self, token_cache=None):
         self.tenant_id = os.getenv("AZURE_TENANT_ID")
         self.client_id = os.getenv("MICROSOFT_APP_ID")
         self.client_secret = os.getenv("MICROSOFT_APP_PASSWORD")
         self.scope = "https://graph.microsoft.com/.default"
-        
+        self.token_cache = token_cache or _token_cache
+        self._credential = None
+
+    @property
+    def cache_key(self):
+        return (str(self.tenant_id), str(self.client_id), self.scope)
+
+    def get_cached_token(self):
+        """Return a cached, unexpired token without any network I/O"""
+        return self.token_cache.get_cached(self.cache_key)
+
     def get_access_token(self):
         """Get access token for Microsoft Graph API using client credentials flow"""
-        try:
-            credential = ClientSecretCredential(
-                tenant_id=self.tenant_id,
-                client_id=self.client_id,
-                client_secret=self.client_secret
-            )
-            
-            token = credential.get_token(self.scope)
-            return token.token
-            
-        except Exception as e:
-            print(f"Error getting access token: {e}")
-            return None
-    
+        with start_span("auth.get_access_token", **{"auth.method": "client_credentials"}) as span:
+            token = self.token_cache.get(self.cache_key, self._fetch_credential_token)
+            if token is None:
+                span.fail("no token")
+            return token
+
+    def _fetch_credential_token(self):
+        with start_span("auth.fetch_token", **{"auth.method": "client_credentials"}) as span:
+            try:
+                if self._credential is None:
+                    # azure.identity is slow to import; tokens served from the cache never need it
+                    from azure.identity import ClientSecretCredential
+                    self._credential = ClientSecretCredential(
+                        tenant_id=self.tenant_id,
+                        client_id=self.client_id,
+                        client_secret=self.client_secret
+                    )
+
+                token = self._credential.get_token(self.scope)
+                return token.token, token.expires_on
+
+            except Exception as e:
+                print(f"Error getting access token: {e}")
+                span.fail(e)
+                return None
+
     def get_token_via_rest(self):
         """Alternative method using REST API directly"""
-        try:
-            url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-            
-            data = {
-                'grant_type': 'client_credentials',
-                'client_id': self.client_id,
-                'client_secret': self.client_secret,
-                'scope': self.scope
-            }
-            
-            response = requests.post(url, data=data)
-            
-            if response.status_code == 200:
-                return response.json().get('access_token')
-            else:
-                print(f"Token request failed: {response.text}")
+        with start_span("auth.get_access_token", **{"auth.method": "rest"}) as span:
+            token = self.token_cache.get(self.cache_key, self._fetch_rest_token)
+            if token is None:
+                span.fail("no token")
+            return token
+
+    def _fetch_rest_token(self):
+        with start_span("auth.fetch_token", **{"auth.method": "rest"}) as span:
+            try:
+                url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
+
+                data = {
+                    'grant_type': 'client_credentials',
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                    'scope': self.scope
+                }
+
+                response = requests.post(url, data=data, timeout=(3.05, 30))
+
+                if response.status_code == 200:
+                    body = response.json()
+                    return body.get('access_token'), time.time() + int(body.get('expires_in', 3599))
+                else:
+                    print(f"Token request failed: {response.text}")
+                    span.fail(f"HTTP {response.status_code}")
+                    return None
+
+            except Exception as e:
+                print(f"Error in REST token request: {e}")
+                span.fail(e)
                 return None
-                
-        except Exception as e:
-            print(f"Error in REST token request: {e}")
-            return None
 
 # Usage example for testing
 if __name__ == "__main__":
     auth = GraphAuthHelper()
     token = auth.get_access_token()
-    
+
     if token:
         print("✅ Successfully obtained access token")
         print(f"Token starts with: {token[:20]}...")
     else:
         print("❌ Failed to get access token")
-        print("Check your environment variables and Azure app registration")
\ No newline at end of file
+        print("Check your environment variables and Azure app registration")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Graph throttling: retry storms versus Retry-After aware flow control.
+
+Starts a stand-in Graph that answers 429 with Retry-After once more than
+--graph-capacity requests are in flight, and drives it from --workers
+threads sharing one GraphClient:
+
+  unthrottled   429s go straight back to the caller, which retries at once
+  throttled     GraphThrottle waits out Retry-After, adapts concurrency
+
+then repeats both during an outage (every request gets a 503) to show the
+circuit breaker failing fast instead of hammering Graph:
+
+    python -m benchmarks.bench_graph_throttle --workers 16 --requests 20 --graph-capacity 4
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import create_graph_app, start_site
+from graph_client import GraphClient
+from graph_throttle import GraphThrottle, GraphThrottledError
+
+TOKEN = "header.{}.signature".format(
+    base64.urlsafe_b64encode(json.dumps({"tid": "bench-tenant"}).encode()).decode().rstrip("="))
+
+
+class Unthrottled:
+    """No flow control: every response, 429 included, goes back to the caller"""
+
+    def call(self, tenant, send, idempotent=True):
+        return send()
+
+    def stats(self):
+        return {}
+
+
+def start_fakes(args):
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def setup():
+        state["graph"] = create_graph_app(latency=args.graph_latency, max_concurrency=args.graph_capacity,
+                                          retry_after=args.retry_after)
+        _, state["graph_url"] = await start_site(state["graph"])
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(setup())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name="fakes", daemon=True).start()
+    ready.wait()
+    return state
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def one_request(client, retries):
+    """A calendar read; unthrottled callers retry refused requests themselves"""
+    started = time.perf_counter()
+    for _ in range(retries + 1):
+        try:
+            response = client.get("/me/events", token=TOKEN)
+        except GraphThrottledError:
+            return False, time.perf_counter() - started
+        if response.status_code == 200:
+            return True, time.perf_counter() - started
+    return False, time.perf_counter() - started
+
+
+def measure(fakes, throttle, args):
+    client = GraphClient(base_url=f"{fakes['graph_url']}/v1.0", pool_maxsize=args.workers, throttle=throttle)
+    stats = fakes["graph"]["stats"]
+    before = dict(stats)
+    stats["max_inflight"] = 0
+    retries = args.retries if isinstance(throttle, Unthrottled) else 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = list(pool.map(lambda _: one_request(client, retries), range(args.workers * args.requests)))
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    latencies = [latency * 1000 for ok, latency in outcomes if ok] or [0.0]
+    return {
+        "ok": sum(ok for ok, _ in outcomes),
+        "failed": sum(not ok for ok, _ in outcomes),
+        "sent": stats["calls"] + stats["throttled"] + stats["unavailable"]
+                - before["calls"] - before["throttled"] - before["unavailable"],
+        "refused": stats["throttled"] + stats["unavailable"] - before["throttled"] - before["unavailable"],
+        "max_inflight": stats["max_inflight"],
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "elapsed": elapsed,
+        "throttle": throttle.stats()
+    }
+
+
+def make_throttle(args):
+    return GraphThrottle(max_retries=args.retries, max_retry_wait=args.retry_after * 10, rate=1000, burst=1000,
+                         max_concurrency=args.workers, breaker_cooldown=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="requests per worker")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--graph-latency", type=float, default=0.05)
+    parser.add_argument("--graph-capacity", type=int, default=4, help="requests in flight before Graph answers 429")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After the stand-in Graph sends")
+    args = parser.parse_args()
+
+    fakes = start_fakes(args)
+    results = {}
+    results["unthrottled"] = measure(fakes, Unthrottled(), args)
+    results["throttled"] = measure(fakes, make_throttle(args), args)
+    fakes["graph"]["outage"] = True
+    results["outage, unthrottled"] = measure(fakes, Unthrottled(), args)
+    results["outage, throttled"] = measure(fakes, make_throttle(args), args)
+    fakes["graph"]["outage"] = False
+
+    print(f"{args.workers} workers x {args.requests} requests, Graph capacity {args.graph_capacity} in flight, "
+          f"latency {args.graph_latency * 1000:.0f} ms, Retry-After {args.retry_after:g} s")
+    print(f"{'mode':<20} {'ok':>5} {'failed':>6} {'sent':>6} {'refused':>7} {'inflight':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'wall s':>7}")
+    for mode, result in results.items():
+        print(f"{mode:<20} {result['ok']:>5} {result['failed']:>6} {result['sent']:>6} {result['refused']:>7} "
+              f"{result['max_inflight']:>8} {result['p50']:>7.0f} {result['p95']:>7.0f} {result['elapsed']:>7.2f}")
+    print(f"Throttle state after load: {results['throttled']['throttle']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Hit ratio and latency of the LLM response cache on a Teams-style prompt mix.
+
+Replays welcome-style questions and "schedule an interview for X" requests,
+with the casing and punctuation variations users actually type, through
+LLMCache.acomplete in front of a stand-in completion call with a fixed
+latency. Reports exact and normalized hits, LLM calls saved and the time
+per prompt with and without the cache:
+
+    python -m benchmarks.bench_llm_cache --prompts 2000 --candidates 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from llm_cache import LLMCache
+
+QUESTIONS = ["hi", "hello there, how are you?", "what can you do", "can you help me schedule interviews",
+             "thanks", "who are you"]
+SYSTEM = "You are a helpful Teams bot assistant. Be friendly and concise."
+
+
+def variant(rng, text):
+    """The same request as a user might type it"""
+    text = rng.choice([text, text.capitalize(), text.upper(), text.title()])
+    return text + rng.choice(["", "", "?", "!", ".", "  "])
+
+
+def make_prompts(rng, count, candidates):
+    names = [f"Candidate{index}" for index in range(candidates)]
+    prompts = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            prompts.append(variant(rng, rng.choice(QUESTIONS)))
+        else:
+            prompts.append(variant(rng, f"schedule an interview for {rng.choice(names)}"))
+    return prompts
+
+
+async def run(args):
+    calls = {"count": 0}
+
+    async def create(**params):
+        calls["count"] += 1
+        await asyncio.sleep(args.llm_latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Sure, happy to help!"))])
+
+    prompts = make_prompts(random.Random(7), args.prompts, args.candidates)
+    cache = LLMCache(path=os.path.join(tempfile.mkdtemp(), "llm_cache.db"), max_entries=args.max_entries)
+
+    timings = []
+    started = time.perf_counter()
+    for prompt in prompts:
+        begin = time.perf_counter()
+        await cache.acomplete(create, scope="bench-tenant:bench-user", model="gpt-4", temperature=0, max_tokens=150,
+                              messages=[{"role": "system", "content": SYSTEM}, {"role": "user", "content": prompt}])
+        timings.append((time.perf_counter() - begin) * 1000)
+    elapsed = time.perf_counter() - started
+
+    stats = cache.stats()
+    print(f"Prompts:             {args.prompts} ({len(set(prompts))} distinct strings)")
+    print(f"LLM calls:           {calls['count']} (saved {args.prompts - calls['count']})")
+    print(f"Exact hits:          {stats['exact_hits']}")
+    print(f"Normalized hits:     {stats['normalized_hits']}")
+    print(f"Hit ratio:           {stats['hit_ratio']:.1%}")
+    print(f"Time/prompt:         p50 {statistics.median(timings):.2f} ms, mean {statistics.mean(timings):.2f} ms "
+          f"(uncached {args.llm_latency * 1000:.0f} ms)")
+    print(f"Elapsed:             {elapsed:.2f} s vs {args.prompts * args.llm_latency:.2f} s uncached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="stand-in LLM latency in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
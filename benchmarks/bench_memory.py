@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Prompt size and overhead of conversation memory over long sessions.
+
+Replays sessions of scripted turns through ConversationMemory and reports
+the chat history tokens each turn would send, next to what sending the
+whole transcript would cost, plus the time spent in history()/save().
+A fake summarizer with --summary-latency stands in for the LLM call:
+
+    python -m benchmarks.bench_memory --turns 200 --sessions 50
+    python -m benchmarks.bench_memory --db /tmp/memory.db
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from conversation_memory import ConversationMemory, SQLiteSessionStore, extract_summary, message_tokens
+
+PROMPTS = [
+    "Schedule a sync with priya@company.com tomorrow at 3 PM",
+    "What meetings do I have today?",
+    "Move that one to Friday morning instead",
+    "Create tasks for the Q3 report review and the budget draft",
+    "Mark the budget task done",
+    "Show my recent emails",
+    "Who sent the second one?"
+]
+ANSWER = "✅ Done. Here is what I found: " + "meeting details and notes " * 20
+
+
+def run(args):
+    store = SQLiteSessionStore(args.db) if args.db else None
+    memory = ConversationMemory(store=store, token_budget=args.budget)
+
+    def summarize(summary, messages):
+        time.sleep(args.summary_latency)
+        return extract_summary(summary, messages, memory.summary_tokens)
+
+    rng = random.Random(7)
+    full_tokens = {}
+    history_tokens = []
+    transcript_tokens = []
+    timings = []
+    for turn in range(args.turns):
+        for session in range(args.sessions):
+            session_id = f"session-{session}"
+            prompt = rng.choice(PROMPTS)
+            answer = ANSWER[:rng.randint(40, len(ANSWER))]
+
+            started = time.perf_counter()
+            summary, messages = memory.history(session_id)
+            memory.save(session_id, prompt, answer, summarize=summarize if args.summary_latency else None)
+            timings.append((time.perf_counter() - started) * 1000)
+
+            history_tokens.append(sum(map(message_tokens, messages)) + (message_tokens({"content": summary}) if summary else 0))
+            transcript_tokens.append(full_tokens.get(session_id, 0))
+            full_tokens[session_id] = full_tokens.get(session_id, 0) + message_tokens({"content": prompt}) + message_tokens({"content": answer})
+
+    last = slice(-args.sessions, None)
+    print(f"Sessions x turns:      {args.sessions} x {args.turns} (budget {args.budget} tokens)")
+    print(f"History tokens/turn:   avg {statistics.mean(history_tokens):.0f}, max {max(history_tokens)}, "
+          f"last turn {statistics.mean(history_tokens[last]):.0f}")
+    print(f"Full transcript/turn:  avg {statistics.mean(transcript_tokens):.0f}, last turn {statistics.mean(transcript_tokens[last]):.0f}")
+    print(f"Memory overhead/turn:  p50 {statistics.median(timings):.3f} ms, max {max(timings):.3f} ms")
+    print(f"Memory stats:          {memory.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--summary-latency", type=float, default=0.0,
+                        help="seconds per fake LLM summary; 0 summarizes inline without an LLM")
+    parser.add_argument("--db", help="persist sessions to this SQLite file")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Slot finder benchmark over large free/busy fixtures.
+
+Loads (or generates) a getSchedule-shaped fixture with thousands of
+calendars, builds the BusyIndex and times "next N free 60-minute slots"
+queries. Every returned slot is checked against the raw intervals:
+
+    python -m benchmarks.bench_slot_finder --calendars 5000
+    python -m benchmarks.bench_slot_finder --write-fixture schedules.json
+    python -m benchmarks.bench_slot_finder --fixture schedules.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from slot_finder import build_busy_index
+
+START = datetime(2026, 1, 5)
+
+
+def generate_fixture(calendars, days, meetings_per_day, seed):
+    """Synthetic getSchedule response: mostly daytime meetings, some evening ones"""
+    rng = random.Random(seed)
+    value = []
+    for index in range(calendars):
+        items = []
+        for day in range(days):
+            for _ in range(rng.randint(0, meetings_per_day)):
+                hour = rng.choice([9, 10, 11, 13, 14, 15, 16, 18, 19])
+                start = START + timedelta(days=day, hours=hour, minutes=rng.choice([0, 30]))
+                end = start + timedelta(minutes=rng.choice([30, 60]))
+                items.append({
+                    "status": rng.choice(["busy", "busy", "tentative", "free"]),
+                    "start": {"dateTime": start.isoformat(), "timeZone": "UTC"},
+                    "end": {"dateTime": end.isoformat(), "timeZone": "UTC"}
+                })
+        value.append({"scheduleId": f"user{index}@company.com", "scheduleItems": items})
+    return {"value": value}
+
+
+def raw_intervals(fixture):
+    return [
+        (datetime.fromisoformat(item["start"]["dateTime"]), datetime.fromisoformat(item["end"]["dateTime"]))
+        for schedule in fixture["value"]
+        for item in schedule["scheduleItems"]
+        if item["status"] in ("busy", "tentative", "oof")
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", help="getSchedule JSON response to load")
+    parser.add_argument("--write-fixture", help="write the generated fixture to this path")
+    parser.add_argument("--calendars", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--meetings-per-day", type=int, default=1)
+    parser.add_argument("--slots", type=int, default=5, help="slots per query")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture) as f:
+            fixture = json.load(f)
+    else:
+        fixture = generate_fixture(args.calendars, args.days, args.meetings_per_day, args.seed)
+        if args.write_fixture:
+            with open(args.write_fixture, "w") as f:
+                json.dump(fixture, f)
+
+    intervals = raw_intervals(fixture)
+    start = time.perf_counter()
+    index = build_busy_index(fixture)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(args.seed)
+    timings = []
+    results = []
+    for _ in range(args.queries):
+        after = START + timedelta(minutes=rng.randrange(0, args.days * 24 * 60 // 2))
+        t0 = time.perf_counter()
+        slots = index.next_free_slots(after, timedelta(minutes=60), args.slots, day_start=9, day_end=21)
+        timings.append((time.perf_counter() - t0) * 1000)
+        results.append(slots)
+
+    # Verify a sample of answers against the raw intervals
+    for slots in results[:20]:
+        for slot in slots:
+            end = slot + timedelta(minutes=60)
+            assert not any(s < end and slot < e for s, e in intervals), f"slot {slot} overlaps a busy interval"
+
+    timings.sort()
+    print(f"Calendars:        {len(fixture['value'])}")
+    print(f"Busy intervals:   {len(intervals)} raw, {len(index)} merged")
+    print(f"Index build:      {build_ms:.1f} ms")
+    print(f"Queries:          {args.queries} x {args.slots} slots")
+    print(f"Query p50:        {statistics.median(timings):.4f} ms")
+    print(f"Query p99:        {timings[int(len(timings) * 0.99) - 1]:.4f} ms")
+    print(f"Slots found:      {sum(len(slots) for slots in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cold start of the HTTP entry points, against local stand-in services.
+
+Launches each server as a fresh process and times, from process start:
+
+  health   first 200 from /api/health (liveness)
+  ready    first 200 from /api/ready (agent built / bot warmed up)
+  first    latency of the first chat turn once ready
+
+The chat servers are also started with AGENT_WARMUP=false, where agents
+are only built by the first request, to show what warm-up saves it:
+
+    python -m benchmarks.bench_startup --runs 3
+    python -m benchmarks.bench_startup --entries backend,bot --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.suite import bot_turn, configure, post_chat, start_fakes
+
+# Each server runs in its own process; {port} is filled in
+SERVERS = {
+    "backend": "from werkzeug.serving import run_simple\n"
+               "from langchain_backend import app\n"
+               "run_simple('127.0.0.1', {port}, app, threaded=True)",
+    "chat-server": "from aiohttp import web\n"
+                   "from langchain_server import create_app\n"
+                   "web.run_app(create_app(), host='127.0.0.1', port={port}, print=None)",
+    "bot": "from werkzeug.serving import run_simple\n"
+           "from app import app\n"
+           "run_simple('127.0.0.1', {port}, app, threaded=True)",
+    "bot-server": "from aiohttp import web\n"
+                  "from bot_server import create_app\n"
+                  "web.run_app(create_app(), host='127.0.0.1', port={port}, print=None)",
+}
+# Entry points whose agents AGENT_WARMUP controls
+AGENT_ENTRIES = ("backend", "chat-server")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for(session, url, started, timeout):
+    """Seconds from `started` until url answers 200, or None on timeout"""
+    while time.perf_counter() - started < timeout:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            pass
+        await asyncio.sleep(0.01)
+    return None
+
+
+async def start_once(session, name, fakes, warmup, args):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, AGENT_WARMUP="true" if warmup else "false")
+    output = None if args.verbose else subprocess.DEVNULL
+
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVERS[name].format(port=port)], env=env,
+                               stdout=output, stderr=output)
+    try:
+        health = await wait_for(session, f"{url}/api/health", started, args.timeout)
+        ready = await wait_for(session, f"{url}/api/ready", started, args.timeout) if health and warmup else None
+        first = None
+        if health:
+            if name.startswith("bot"):
+                turn = bot_turn(session, url, fakes["connector_url"])
+                text = "schedule an interview for Candidate 1, backend engineer"
+            else:
+                turn = lambda index, text: post_chat(session, url, index, text)
+                text = "What's on my calendar today?"
+            turn_started = time.perf_counter()
+            if await turn(1, text):
+                first = time.perf_counter() - turn_started
+        return {"health": health, "ready": ready, "first": first}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def median_ms(samples):
+    samples = [sample for sample in samples if sample is not None]
+    return f"{statistics.median(samples) * 1000:.0f}" if samples else "-"
+
+
+async def run(args, names):
+    import aiohttp
+
+    fakes = start_fakes(args)
+    configure(args, fakes)
+    results = {}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+        for name in names:
+            for warmup in (True, False) if name in AGENT_ENTRIES else (True,):
+                mode = "warm-up" if warmup else "lazy"
+                print(f"Starting {name} ({mode})...", flush=True)
+                results[(name, mode)] = [await start_once(session, name, fakes, warmup, args) for _ in range(args.runs)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", default=",".join(SERVERS), help="comma-separated entry points")
+    parser.add_argument("--runs", type=int, default=3, help="cold starts per entry point; medians are reported")
+    parser.add_argument("--pool-size", type=int, default=8, help="AGENT_POOL_SIZE for the chat servers")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--graph-latency", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for a server")
+    parser.add_argument("--verbose", action="store_true", help="show the servers' output")
+    args = parser.parse_args()
+    # Settings start_fakes() and configure() expect from the suite
+    args.llm_capacity = args.graph_capacity = None
+    args.llm_error_rate = args.graph_error_rate = 0.0
+    args.retry_after = 1.0
+    args.llm_cache = False
+    args.concurrency = 1
+    args.queue_size = args.graph_cache_ttl = None
+    args.token_latency = 0.0
+    args.tool_calls = "parallel"
+
+    names = [name.strip() for name in args.entries.split(",") if name.strip()]
+    unknown = set(names) - set(SERVERS)
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args, names))
+    print(f"\nMedian of {args.runs} cold starts, LLM latency {args.llm_latency * 1000:.0f} ms")
+    print(f"{'entry':<12} {'mode':<8} {'health ms':>10} {'ready ms':>9} {'first ms':>9}")
+    for (name, mode), runs in results.items():
+        print(f"{name:<12} {mode:<8} {median_ms(run['health'] for run in runs):>10} "
+              f"{median_ms(run['ready'] for run in runs):>9} {median_ms(run['first'] for run in runs):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Local stand-ins for the external services the bot and agent talk to.
+
+Each factory returns an aiohttp application; start_site() serves it on
+localhost and returns the runner plus its base URL. The OpenAI and Graph
+stand-ins can also throttle, fail or go down (see _service_faults).
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+async def start_site(app, host="127.0.0.1", port=0):
+    """Serve an aiohttp app on a free local port and return (runner, url)"""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def create_connector_app(latency=0.0):
+    """Stand-in Bot Framework connector that accepts bot replies"""
+    app = web.Application()
+    app["stats"] = {"replies": 0, "first_reply_at": None, "last_reply_at": None}
+    ids = itertools.count(1)
+
+    async def reply(request):
+        await request.read()
+        if latency:
+            await asyncio.sleep(latency)
+        stats = request.app["stats"]
+        now = time.perf_counter()
+        stats["replies"] += 1
+        stats["first_reply_at"] = stats["first_reply_at"] or now
+        stats["last_reply_at"] = now
+        return web.json_response({"id": f"reply-{next(ids)}"})
+
+    app.router.add_post("/v3/conversations/{conversation_id}/activities", reply)
+    app.router.add_post("/v3/conversations/{conversation_id}/activities/{activity_id}", reply)
+    return app
+
+
+def _completion_chunks(completion_id, model, message, finish_reason):
+    """Split a chat message into streaming chunks, the way OpenAI sends them"""
+    def chunk(delta, finish=None):
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    if "tool_calls" in message:
+        for index, call in enumerate(message["tool_calls"]):
+            yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                         "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            yield chunk({"tool_calls": [{"index": index, "function": {"arguments": call["function"]["arguments"]}}]})
+    elif "function_call" in message:
+        call = message["function_call"]
+        yield chunk({"function_call": {"name": call["name"], "arguments": ""}})
+        yield chunk({"function_call": {"arguments": call["arguments"]}})
+    else:
+        for word in message["content"].split(" "):
+            yield chunk({"content": word + " "})
+    yield chunk({}, finish_reason)
+
+
+def create_openai_app(latency=0.0, content="Happy to help!", choose_function=None, token_latency=0.0,
+                      parallel_tool_calls=True, max_concurrency=None, retry_after=1.0, error_rate=0.0):
+    """Stand-in Azure OpenAI chat completions endpoint.
+
+    `content` is the reply text, or a function of the request body
+    returning it. `choose_function(body)` may return (name, arguments), or
+    a list of them, to answer with calls instead. Requests with
+    "functions" get one function call until the conversation holds a
+    function result. Requests with "tools" get every call not yet answered
+    in one reply, or one call per reply when `parallel_tool_calls` is
+    false. Requests with "stream": true are answered as server-sent chunks,
+    `token_latency` apart. max_concurrency, retry_after and error_rate
+    simulate rate limits and failures (see _service_faults).
+    """
+    app = web.Application(middlewares=[_service_faults(max_concurrency, retry_after, error_rate)])
+    _fault_state(app, {"calls": 0, "function_calls": 0, "tool_calls": 0})
+    # Benchmarks may flip this between runs
+    app["parallel_tool_calls"] = parallel_tool_calls
+
+    async def chat_completions(request):
+        body = await request.json()
+        if latency:
+            await asyncio.sleep(latency)
+        stats = request.app["stats"]
+        stats["calls"] += 1
+        completion_id = f"chatcmpl-{stats['calls']}"
+        model = request.match_info["deployment"]
+
+        message = {"role": "assistant", "content": content(body) if callable(content) else content}
+        finish_reason = "stop"
+        answered = sum(1 for m in body.get("messages", []) if m.get("role") in ("function", "tool"))
+        calls = choose_function(body) if choose_function and (body.get("functions") or body.get("tools")) else None
+        if isinstance(calls, tuple):
+            calls = [calls]
+        if calls and body.get("tools"):
+            if request.app["parallel_tool_calls"]:
+                pending = [] if answered else calls
+            else:
+                pending = calls[answered:answered + 1]
+            if pending:
+                stats["tool_calls"] += len(pending)
+                message = {"role": "assistant", "content": None, "tool_calls": [
+                    {"id": f"call-{stats['calls']}-{index}", "type": "function",
+                     "function": {"name": name, "arguments": json.dumps(arguments)}}
+                    for index, (name, arguments) in enumerate(pending)
+                ]}
+                finish_reason = "tool_calls"
+        elif calls and not answered:
+            stats["function_calls"] += 1
+            name, arguments = calls[0]
+            message = {"role": "assistant", "content": None,
+                       "function_call": {"name": name, "arguments": json.dumps(arguments)}}
+            finish_reason = "function_call"
+
+        if body.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for chunk in _completion_chunks(completion_id, model, message, finish_reason):
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                if token_latency:
+                    await asyncio.sleep(token_latency)
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": finish_reason
+            }],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25}
+        })
+
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    return app
+
+
+def _service_faults(max_concurrency=None, retry_after=1.0, error_rate=0.0, seed=7):
+    """Middleware refusing requests the way a throttled or failing service does.
+
+    Beyond max_concurrency requests in flight the answer is 429 with
+    Retry-After, error_rate of requests get a 500, and while app["outage"]
+    is set every request gets a 503. Refusals are counted in app["stats"].
+    """
+    rng = random.Random(seed)
+
+    def refuse(stats, counter, status, code):
+        stats[counter] += 1
+        return web.json_response({"error": {"code": code, "message": f"Stand-in {code}"}}, status=status,
+                                 headers={"Retry-After": f"{retry_after:g}"})
+
+    @web.middleware
+    async def faults(request, handler):
+        app = request.app
+        stats = app["stats"]
+        if app["outage"]:
+            return refuse(stats, "unavailable", 503, "serviceNotAvailable")
+        if max_concurrency and app["inflight"] >= max_concurrency:
+            return refuse(stats, "throttled", 429, "TooManyRequests")
+        if error_rate and rng.random() < error_rate:
+            return refuse(stats, "errors", 500, "InternalServerError")
+        app["inflight"] += 1
+        stats["max_inflight"] = max(stats["max_inflight"], app["inflight"])
+        try:
+            return await handler(request)
+        finally:
+            app["inflight"] -= 1
+
+    return faults
+
+
+def _fault_state(app, stats):
+    app["stats"] = dict(stats, throttled=0, unavailable=0, errors=0, max_inflight=0)
+    app["outage"] = False
+    app["inflight"] = 0
+
+
+def create_graph_app(latency=0.0, events=3, messages=5, max_concurrency=None, retry_after=1.0, error_rate=0.0):
+    """Stand-in Microsoft Graph (v1.0) for the bot's and agent's mail and calendar calls.
+
+    Serves calendar and inbox delta queries, event create/search/delete,
+    getSchedule and $batch. Calls are counted per endpoint in app["stats"].
+
+    With max_concurrency, requests beyond that many in flight get a 429 with
+    Retry-After, as Graph does when a tenant is throttled; see
+    _service_faults for error_rate and app["outage"].
+    """
+    app = web.Application(middlewares=[_service_faults(max_concurrency, retry_after, error_rate)])
+    _fault_state(app, {"calls": 0, "by_endpoint": {}})
+    ids = itertools.count(1)
+
+    def record(request, endpoint):
+        stats = request.app["stats"]
+        stats["calls"] += 1
+        stats["by_endpoint"][endpoint] = stats["by_endpoint"].get(endpoint, 0) + 1
+
+    def sample_events():
+        return [{
+            "id": f"event-{i}",
+            "subject": f"Sync {i}",
+            "start": {"dateTime": f"2026-01-01T{9 + i:02d}:00:00", "timeZone": "UTC"},
+            "end": {"dateTime": f"2026-01-01T{10 + i:02d}:00:00", "timeZone": "UTC"},
+            "attendees": []
+        } for i in range(events)]
+
+    def sample_messages():
+        return [{
+            "id": f"message-{i}",
+            "subject": f"Update {i}",
+            "isRead": i % 2 == 0,
+            "receivedDateTime": f"2026-01-01T{8 + i:02d}:00:00Z",
+            "from": {"emailAddress": {"name": f"Sender {i}", "address": f"sender{i}@company.com"}}
+        } for i in range(messages)]
+
+    async def pause():
+        if latency:
+            await asyncio.sleep(latency)
+
+    async def delta(request):
+        await pause()
+        record(request, f"GET {request.path}")
+        items = sample_messages() if "messages" in request.path else sample_events()
+        # A delta round ends with a deltaLink; following it returns no changes
+        if "$deltatoken" in request.query_string:
+            items = []
+        return web.json_response({
+            "value": items,
+            "@odata.deltaLink": f"{request.scheme}://{request.host}{request.path}?$deltatoken={next(ids)}"
+        })
+
+    async def list_messages(request):
+        await pause()
+        record(request, "GET /v1.0/me/mailFolders/inbox/messages")
+        top = int(request.query.get("$top", messages))
+        return web.json_response({"value": sample_messages()[:top]})
+
+    async def list_events(request):
+        await pause()
+        record(request, "GET /v1.0/me/events")
+        return web.json_response({"value": sample_events()})
+
+    async def create_event(request):
+        body = await request.json()
+        await pause()
+        record(request, "POST /v1.0/me/events")
+        return web.json_response(dict(body, id=f"event-new-{next(ids)}"), status=201)
+
+    async def delete_event(request):
+        await pause()
+        record(request, "DELETE /v1.0/me/events/{id}")
+        return web.Response(status=204)
+
+    async def get_schedule(request):
+        body = await request.json()
+        await pause()
+        record(request, "POST /v1.0/me/calendar/getSchedule")
+        return web.json_response({"value": [
+            {"scheduleId": address, "availabilityView": "", "scheduleItems": []}
+            for address in body.get("schedules", [])
+        ]})
+
+    async def batch(request):
+        body = await request.json()
+        await pause()
+        record(request, "POST /v1.0/$batch")
+        responses = []
+        for item in body.get("requests", []):
+            method = item["method"].upper()
+            if method == "POST":
+                status, payload = 201, dict(item.get("body") or {}, id=f"event-new-{next(ids)}")
+            elif method == "DELETE":
+                status, payload = 204, None
+            else:
+                status, payload = 200, {"value": sample_events()}
+            responses.append({"id": item["id"], "status": status, "headers": {}, "body": payload})
+        return web.json_response({"responses": responses})
+
+    app.router.add_get("/v1.0/me/calendarView/delta", delta)
+    app.router.add_get("/v1.0/me/mailFolders/inbox/messages/delta", delta)
+    app.router.add_get("/v1.0/me/mailFolders/inbox/messages", list_messages)
+    app.router.add_get("/v1.0/me/events", list_events)
+    app.router.add_post("/v1.0/me/events", create_event)
+    app.router.add_delete("/v1.0/me/events/{event_id}", delete_event)
+    app.router.add_post("/v1.0/me/calendar/getSchedule", get_schedule)
+    app.router.add_post("/v1.0/$batch", batch)
+    return app
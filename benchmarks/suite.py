@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for every chat entry point, against local stand-in services.
+
+Starts stand-in Azure OpenAI, Microsoft Graph and Bot Framework connector
+endpoints with configurable latency, errors and throttling, drives each
+entry point with scripted multi-turn conversations and reports throughput,
+p50/p95/p99 latency and upstream LLM and Graph calls per request:
+
+  agent        OutlookAgent.run() called from worker threads
+  backend      langchain_backend.py (Flask)    POST /api/chat
+  chat-server  langchain_server.py (aiohttp)   POST /api/chat
+  bot          app.py (Flask)                  POST /api/messages, TeamsInterviewBot
+  bot-server   bot_server.py (aiohttp)         POST /api/messages, TeamsInterviewBot
+
+Each entry point runs in a fresh process, so caches and pools start cold
+the same way on every run. Results can be saved and later diffed; with
+--compare the exit status is 1 when a metric regressed past --threshold:
+
+    python -m benchmarks.suite --save benchmarks/results/baseline.json
+    python -m benchmarks.suite --entries agent,backend --compare benchmarks/results/baseline.json
+    python -m benchmarks.suite --llm-error-rate 0.05 --graph-capacity 4 --retry-after 0.5
+
+Pool rejections: a --queue-size below --concurrency makes the chat servers
+answer 429, counted as errors. Tool calls one per LLM reply instead of all
+at once, with every read going to Graph:
+
+    python -m benchmarks.suite --entries chat-server --concurrency 32 --queue-size 8
+    python -m benchmarks.suite --entries agent --tool-calls sequential --graph-cache-ttl 0
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ENTRY_POINTS = ("agent", "backend", "chat-server", "bot", "bot-server")
+
+# Conversations for the LangChain assistant: fast-path commands, tool turns and follow-ups
+AGENT_CONVERSATIONS = (
+    ("What's on my calendar today?", "Anything urgent in my emails?",
+     "Schedule a sync with priya@company.com tomorrow at 3 PM"),
+    ("show my calendar", "show my emails", "Do I have time for lunch with my meetings today?"),
+    ("Cancel the Sync 1 meeting", "What's left on my calendar today?", "thanks, that's all"),
+)
+# Conversations for the Teams bot: small talk and interview requests ({name} is filled in)
+BOT_CONVERSATIONS = (
+    ("hi there", "what can you do?", "schedule an interview for {name} for the backend engineer position"),
+    ("schedule an interview for {name}, frontend developer", "thanks!"),
+)
+
+# Lower is better for every compared metric except throughput
+COMPARED_METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "llm_calls_per_request",
+                    "graph_calls_per_request", "errors")
+
+
+def _token(claims):
+    """Unsigned JWT-shaped token; Graph throttling reads the tenant from it"""
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+TOKEN = _token({"tid": "bench-tenant"})
+
+
+def last_user_message(body):
+    return next((m.get("content") or "" for m in reversed(body["messages"]) if m["role"] == "user"), "")
+
+
+def choose_tools(body):
+    """The tool calls a model would make for the scripted agent turns"""
+    text = last_user_message(body).lower()
+    if "cancel" in text:
+        return [("delete_meeting", {"__arg1": "Sync 1"})]
+    if "schedule" in text:
+        return [("create_meeting", {"subject": "Sync", "participants": ["priya@company.com"],
+                                    "datetime": "tomorrow at 3 PM", "duration": 30})]
+    calls = []
+    if "email" in text or "inbox" in text:
+        calls.append(("read_emails", {"__arg1": ""}))
+    if "calendar" in text or "meeting" in text or "lunch" in text:
+        calls.append(("read_calendar", {"__arg1": ""}))
+    return calls
+
+
+def reply_content(body):
+    """JSON for the bot's extraction prompts, a short answer otherwise"""
+    text = last_user_message(body)
+    if "Extract interview details" in text:
+        return json.dumps({"candidate": "Bench Candidate", "position": "Backend Engineer", "interviewer": "TBD"})
+    return "You have 3 meetings today and nothing urgent in your inbox."
+
+
+def start_fakes(args):
+    """Serve the stand-ins on their own loop so client load does not skew them"""
+    from benchmarks.fakes import create_connector_app, create_graph_app, create_openai_app, start_site
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def setup():
+        state["openai"] = create_openai_app(latency=args.llm_latency, content=reply_content, choose_function=choose_tools,
+                                            token_latency=args.token_latency,
+                                            parallel_tool_calls=args.tool_calls == "parallel",
+                                            max_concurrency=args.llm_capacity, retry_after=args.retry_after,
+                                            error_rate=args.llm_error_rate)
+        state["graph"] = create_graph_app(latency=args.graph_latency, max_concurrency=args.graph_capacity,
+                                          retry_after=args.retry_after, error_rate=args.graph_error_rate)
+        state["connector"] = create_connector_app()
+        for name in ("openai", "graph", "connector"):
+            _, state[f"{name}_url"] = await start_site(state[name])
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(setup())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, name="fakes", daemon=True).start()
+    ready.wait()
+    return state
+
+
+def configure(args, fakes):
+    """Point the bot and agent at the stand-ins; modules read this at import time"""
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    token_cache = os.path.join(workdir, "graph_tokens.json")
+    # A cached app token, so the bot never calls login.microsoftonline.com
+    with open(token_cache, "w") as f:
+        json.dump({"bench||https://graph.microsoft.com/.default": {"token": TOKEN, "expires_on": time.time() + 86400}}, f)
+
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": fakes["openai_url"],
+        "AZURE_OPENAI_KEY": "bench",
+        "GRAPH_BASE_URL": f"{fakes['graph_url']}/v1.0",
+        "GRAPH_ACCESS_TOKEN": TOKEN,
+        "GRAPH_TOKEN_CACHE_PATH": token_cache,
+        "AZURE_TENANT_ID": "bench",
+        # No app id/password: the Bot Framework adapter skips auth against the local connector
+        "MICROSOFT_APP_ID": "",
+        "MICROSOFT_APP_PASSWORD": "",
+        "INTERVIEWER_EMAIL": "interviewer@company.com",
+        "LLM_CACHE_ENABLED": "true" if args.llm_cache else "false",
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "AGENT_POOL_SIZE": str(args.pool_size),
+        "AGENT_QUEUE_SIZE": str(args.queue_size if args.queue_size is not None else max(args.concurrency, args.pool_size)),
+    })
+    os.environ.pop("MEMORY_DB_PATH", None)
+    if args.graph_cache_ttl is not None:
+        os.environ["GRAPH_CACHE_TTL"] = str(args.graph_cache_ttl)
+
+
+def serve_wsgi(app):
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="wsgi", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+async def post_chat(session, url, index, text):
+    async with session.post(f"{url}/api/chat", json={"message": text, "session_id": f"bench-{index}"}) as response:
+        if response.status != 200:
+            return False
+        return not (await response.json()).get("response", "").startswith("❌")
+
+
+def bot_turn(session, url, connector_url):
+    ids = itertools.count(1)
+
+    async def turn(index, text):
+        activity = {
+            "type": "message",
+            "id": f"activity-{next(ids)}",
+            "channelId": "msteams",
+            "serviceUrl": connector_url,
+            "from": {"id": f"user-{index}", "name": "Bench User"},
+            "conversation": {"id": f"conversation-{index}"},
+            "recipient": {"id": "bot", "name": "Interview Bot"},
+            "text": text
+        }
+        async with session.post(f"{url}/api/messages", json=activity) as response:
+            await response.read()
+            return response.status == 200
+
+    return turn
+
+
+async def start_entry(name, session, fakes):
+    """Start an entry point and return (turn, close); turn(index, text) says whether the turn succeeded"""
+    if name == "agent":
+        from outlook_agent import OutlookAgent
+
+        agent = OutlookAgent()
+
+        async def turn(index, text):
+            answer = await asyncio.to_thread(agent.run, text, f"bench-{index}")
+            return not answer.startswith("❌")
+
+        return turn, None
+
+    if name == "chat-server":
+        from benchmarks.fakes import start_site
+        from langchain_server import create_app
+
+        runner, url = await start_site(create_app())
+        return (lambda index, text: post_chat(session, url, index, text)), runner.cleanup
+
+    if name == "bot-server":
+        from benchmarks.fakes import start_site
+        from bot_server import create_app
+
+        runner, url = await start_site(create_app())
+        return bot_turn(session, url, fakes["connector_url"]), runner.cleanup
+
+    if name == "backend":
+        from langchain_backend import app
+
+        url, shutdown = await asyncio.to_thread(serve_wsgi, app)
+        return (lambda index, text: post_chat(session, url, index, text)), shutdown
+
+    from app import app
+
+    url, shutdown = await asyncio.to_thread(serve_wsgi, app)
+    return bot_turn(session, url, fakes["connector_url"]), shutdown
+
+
+def conversations(name, count, offset=0):
+    scripts = BOT_CONVERSATIONS if name.startswith("bot") else AGENT_CONVERSATIONS
+    return [
+        [text.format(name=f"Candidate {index}") for text in scripts[index % len(scripts)]]
+        for index in range(offset, offset + count)
+    ]
+
+
+async def drive(turn, scripts, concurrency, offset=0):
+    """Run the scripts, at most `concurrency` conversations at once; returns (latency ms, ok) per turn"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def converse(index, script):
+        async with semaphore:
+            for text in script:
+                started = time.perf_counter()
+                try:
+                    ok = await turn(index, text)
+                except Exception as e:
+                    print(f"Turn failed: {e}")
+                    ok = False
+                samples.append(((time.perf_counter() - started) * 1000, ok))
+
+    await asyncio.gather(*(converse(offset + index, script) for index, script in enumerate(scripts)))
+    return samples
+
+
+def upstream(stats):
+    """Requests a stand-in received, served or refused"""
+    return stats["calls"] + stats["throttled"] + stats["unavailable"] + stats["errors"]
+
+
+def refused(stats):
+    return stats["throttled"] + stats["unavailable"] + stats["errors"]
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def measure(name, args):
+    import aiohttp
+
+    fakes = start_fakes(args)
+    configure(args, fakes)
+    # Thread-backed entry points (the agent, Flask servers' clients) need one thread per conversation
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency + 4))
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as session:
+        turn, close = await start_entry(name, session, fakes)
+        await drive(turn, conversations(name, args.warmup, offset=10**6), args.concurrency, offset=10**6)
+
+        llm_stats, graph_stats = fakes["openai"]["stats"], fakes["graph"]["stats"]
+        llm_before, graph_before = upstream(llm_stats), upstream(graph_stats)
+        llm_refused, graph_refused = refused(llm_stats), refused(graph_stats)
+        started = time.perf_counter()
+        samples = await drive(turn, conversations(name, args.conversations), args.concurrency)
+        elapsed = time.perf_counter() - started
+
+        if close:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+    requests = len(samples)
+    latencies = [latency for latency, ok in samples if ok] or [0.0]
+    return {
+        "requests": requests,
+        "errors": sum(not ok for _, ok in samples),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "llm_calls_per_request": round((upstream(llm_stats) - llm_before) / requests, 2),
+        "graph_calls_per_request": round((upstream(graph_stats) - graph_before) / requests, 2),
+        "llm_refused": refused(llm_stats) - llm_refused,
+        "graph_refused": refused(graph_stats) - graph_refused
+    }
+
+
+def run_entry(name, args):
+    """Benchmark one entry point; runs in its own process"""
+    return asyncio.run(measure(name, args))
+
+
+def print_results(results):
+    print(f"{'entry':<12} {'reqs':>5} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'LLM/req':>8} {'Graph/req':>9}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['requests']:>5} {result['errors']:>6} {result['throughput_rps']:>7.1f} "
+              f"{result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} "
+              f"{result['llm_calls_per_request']:>8.2f} {result['graph_calls_per_request']:>9.2f}")
+
+
+def compare(baseline, current, threshold):
+    """Print metric changes against a saved run and return the regressions"""
+    if baseline.get("settings") != current["settings"]:
+        print("Note: the baseline was run with different settings; changes may not be comparable")
+    regressions = []
+    print(f"\n{'entry':<12} {'metric':<24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<12} (not in baseline)")
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            worse = -change if metric == "throughput_rps" else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            if flag:
+                regressions.append((name, metric))
+            print(f"{name:<12} {metric:<24} {old:>10.2f} {new:>10.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", default=",".join(ENTRY_POINTS), help="comma-separated entry points")
+    parser.add_argument("--conversations", type=int, default=30, help="scripted conversations per entry point")
+    parser.add_argument("--concurrency", type=int, default=8, help="conversations in progress at once")
+    parser.add_argument("--warmup", type=int, default=2, help="conversations run before measuring")
+    parser.add_argument("--pool-size", type=int, default=8, help="AGENT_POOL_SIZE for the chat servers")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="AGENT_QUEUE_SIZE for the chat servers (default: enough that none are rejected)")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.0, help="delay between streamed tokens, seconds")
+    parser.add_argument("--tool-calls", choices=("parallel", "sequential"), default="parallel",
+                        help="tool calls the model asks for in one reply, or one per reply")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls answered 500")
+    parser.add_argument("--llm-capacity", type=int, default=None, help="LLM calls in flight before 429")
+    parser.add_argument("--graph-latency", type=float, default=0.05)
+    parser.add_argument("--graph-error-rate", type=float, default=0.0, help="share of Graph calls answered 500")
+    parser.add_argument("--graph-capacity", type=int, default=None, help="Graph calls in flight before 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429/503, seconds")
+    parser.add_argument("--llm-cache", action="store_true", help="answer repeated prompts from the LLM cache")
+    parser.add_argument("--graph-cache-ttl", type=float, default=None, help="GRAPH_CACHE_TTL; 0 sends every read to Graph")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="diff results against a JSON file written by --save")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.entries.split(",") if name.strip()]
+    unknown = set(names) - set(ENTRY_POINTS)
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(sorted(unknown))}")
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("entries", "save", "compare", "threshold")}
+    print(f"Settings: {settings}")
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        print(f"Running {name}...", flush=True)
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_entry, (name, args))
+    print()
+    print_results(results)
+
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "settings": settings, "results": results}
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
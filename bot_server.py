@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Async serving mode for the Teams Interview Bot.
+
+Runs the Bot Framework webhook on a single long-lived aiohttp event loop
+with bounded concurrency and graceful shutdown:
+
+    python bot_server.py
+"""
+
+import asyncio
+import os
+
+from aiohttp import web
+from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
+from botbuilder.schema import Activity
+from dotenv import load_dotenv
+
+from llm_cache import get_llm_cache
+from tracing import PROMETHEUS_CONTENT_TYPE, get_metrics
+
+# Load environment variables
+load_dotenv()
+
+BOT_PORT = int(os.getenv("BOT_PORT", "3978"))
+# Maximum activities processed at once; further requests wait in line
+BOT_MAX_CONCURRENCY = int(os.getenv("BOT_MAX_CONCURRENCY", "64"))
+# How long a request may wait for a free slot before getting a 503
+BOT_QUEUE_TIMEOUT = float(os.getenv("BOT_QUEUE_TIMEOUT", "5"))
+# Seconds to let in-flight activities finish on shutdown
+BOT_SHUTDOWN_TIMEOUT = float(os.getenv("BOT_SHUTDOWN_TIMEOUT", "30"))
+
+
+async def messages(request):
+    if "application/json" not in request.headers.get("Content-Type", ""):
+        return web.Response(status=415)
+
+    body = await request.json()
+    activity = Activity().deserialize(body)
+    auth_header = request.headers.get("Authorization", "")
+
+    bot = request.app["bot"]
+    semaphore = request.app["semaphore"]
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=BOT_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return web.Response(status=503, headers={"Retry-After": "1"})
+
+    request.app["stats"]["inflight"] += 1
+    try:
+        response = await request.app["adapter"].process_activity(activity, auth_header, bot.on_turn)
+        if response:
+            return web.json_response(data=response.body, status=response.status)
+        return web.Response(status=200)
+    except Exception as e:
+        print(f"Error: {e}")
+        return web.Response(status=500)
+    finally:
+        request.app["stats"]["inflight"] -= 1
+        semaphore.release()
+
+
+async def health_check(request):
+    return web.json_response({
+        "status": "Teams Interview Bot is running!",
+        "version": "1.0",
+        "inflight": request.app["stats"]["inflight"]
+    })
+
+
+async def liveness(request):
+    """Liveness: the loop is serving; never waits on Azure AD or OpenAI"""
+    return web.json_response({"status": "healthy"})
+
+
+async def ready(request):
+    """Readiness: 503 until the bot's warm-up (Graph token fetch) has succeeded"""
+    warmup = request.app["warmup"]
+    if not warmup.done():
+        return web.json_response({"status": "warming_up"}, status=503)
+    error = "cancelled" if warmup.cancelled() else warmup.exception()
+    # A message since may have fetched the token the warm-up could not
+    if error and not request.app["bot"].graph_token:
+        return web.json_response({"status": "failed", "error": str(error)}, status=503)
+    return web.json_response({"status": "ready", "graph_token": bool(request.app["bot"].graph_token)})
+
+
+async def llm_cache_stats(request):
+    llm_cache = get_llm_cache()
+    return web.json_response({"llm_cache": llm_cache.stats() if llm_cache else None})
+
+
+async def metrics(request):
+    return web.Response(text=get_metrics().render(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
+async def _create_semaphore(app):
+    # Created on startup so it belongs to the serving loop
+    app["semaphore"] = asyncio.Semaphore(app["max_concurrency"])
+
+
+async def _warm_up_bot(app):
+    # Runs alongside the server; a failed token fetch is retried by the first message
+    app["warmup"] = asyncio.create_task(app["bot"].warm_up())
+
+
+async def _drain_inflight(app):
+    """Wait for in-flight activities before the loop is torn down"""
+    deadline = asyncio.get_running_loop().time() + BOT_SHUTDOWN_TIMEOUT
+    stats = app["stats"]
+    while stats["inflight"] and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.1)
+    if stats["inflight"]:
+        print(f"Shutting down with {stats['inflight']} activities still in flight")
+
+
+async def _close_bot(app):
+    app["warmup"].cancel()
+    await app["bot"].close()
+
+
+def create_app(bot=None, adapter=None, max_concurrency=BOT_MAX_CONCURRENCY):
+    """Build the aiohttp application serving /api/messages"""
+    if adapter is None:
+        adapter = BotFrameworkAdapter(BotFrameworkAdapterSettings(
+            app_id=os.getenv("MICROSOFT_APP_ID"),
+            app_password=os.getenv("MICROSOFT_APP_PASSWORD")
+        ))
+    if bot is None:
+        from teams_bot import TeamsInterviewBot
+        bot = TeamsInterviewBot()
+
+    app = web.Application()
+    app["bot"] = bot
+    app["adapter"] = adapter
+    app["max_concurrency"] = max_concurrency
+    # Mutable holder: aiohttp app state should not be reassigned once started
+    app["stats"] = {"inflight": 0}
+
+    app.router.add_post("/api/messages", messages)
+    app.router.add_get("/", health_check)
+    app.router.add_get("/api/health", liveness)
+    app.router.add_get("/api/ready", ready)
+    app.router.add_get("/api/llm-cache/stats", llm_cache_stats)
+    app.router.add_get("/api/metrics", metrics)
+    app.on_startup.append(_create_semaphore)
+    app.on_startup.append(_warm_up_bot)
+    app.on_shutdown.append(_drain_inflight)
+    app.on_cleanup.append(_close_bot)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=BOT_PORT, shutdown_timeout=BOT_SHUTDOWN_TIMEOUT)
@@ -0,0 +1,328 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Tokens of past messages sent with each turn (the summary comes on top)
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+# Longest rolling summary of older messages, in tokens
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))
+# Sessions kept in process (least recently used are dropped first)
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+# Optional SQLite file so sessions survive restarts and are shared by workers
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH")
+# Persisted sessions idle longer than this are deleted
+MEMORY_SESSION_TTL_HOURS = float(os.getenv("MEMORY_SESSION_TTL_HOURS", "168"))
+# Background threads summarizing older messages
+MEMORY_SUMMARY_WORKERS = int(os.getenv("MEMORY_SUMMARY_WORKERS", "2"))
+
+# Per-message overhead of the chat format
+MESSAGE_TOKENS = 4
+# Characters of each message kept by the summarizer-less fallback
+EXTRACT_CHARS = 200
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """cl100k_base, loaded once; False when tiktoken is missing or cannot load it.
+
+    get_encoding() downloads the BPE file on first use, so offline it
+    raises; the length estimate is then used for the life of the process
+    rather than retrying the download on every call.
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base") if tiktoken else False
+                except Exception as e:
+                    print(f"Could not load the tiktoken encoding, estimating tokens from length: {e}")
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """Tokens in text for GPT-4; estimated from length without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is False:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_TOKENS
+
+
+def extract_summary(summary, messages, max_tokens=MEMORY_SUMMARY_TOKENS):
+    """Fallback summarizer: the start of each message, newest kept within max_tokens"""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        content = " ".join(message["content"].split())
+        if len(content) > EXTRACT_CHARS:
+            content = content[:EXTRACT_CHARS] + "..."
+        lines.append(f"{message['role']}: {content}")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class SQLiteSessionStore:
+    """Sessions persisted to SQLite, one row per session.
+
+    Each row carries a version bumped on every write; put() only succeeds
+    against the version the caller read, so concurrent writers never
+    overwrite each other's turns.
+    """
+
+    def __init__(self, path, ttl_hours=MEMORY_SESSION_TTL_HOURS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS conversations (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL DEFAULT '',
+                messages TEXT NOT NULL DEFAULT '[]',
+                updated_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at)")
+        self._conn.commit()
+        self.prune(ttl_hours)
+
+    def version(self, session_id):
+        """Version of the stored session; 0 when there is none"""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM conversations WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, messages, version FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"summary": row[0], "messages": json.loads(row[1]), "version": row[2]}
+
+    def put(self, session_id, state, version):
+        """Write state if the stored session is still at `version`.
+
+        Returns the new version, or None when another writer got there first.
+        """
+        with self._lock:
+            if version:
+                cursor = self._conn.execute(
+                    """UPDATE conversations SET summary = ?, messages = ?, updated_at = ?, version = version + 1
+                    WHERE session_id = ? AND version = ?""",
+                    (state["summary"], json.dumps(state["messages"]), time.time(), session_id, version)
+                )
+            else:
+                cursor = self._conn.execute(
+                    """INSERT OR IGNORE INTO conversations (session_id, summary, messages, updated_at, version)
+                    VALUES (?, ?, ?, ?, 1)""",
+                    (session_id, state["summary"], json.dumps(state["messages"]), time.time())
+                )
+            self._conn.commit()
+        return version + 1 if cursor.rowcount else None
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def prune(self, ttl_hours):
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE updated_at < ?", (time.time() - ttl_hours * 3600,))
+            self._conn.commit()
+
+
+class ConversationMemory:
+    """Per-session chat history with a bounded prompt footprint.
+
+    Each session is a rolling summary plus a window of recent messages.
+    history() returns the summary and the newest messages that fit in
+    `token_budget`, so prompts stop growing with the conversation. Once the
+    window exceeds the budget, save() folds its oldest messages into the
+    summary, down to half the budget so this happens every few turns
+    rather than every turn. Folding with an LLM summarizer runs in the
+    background; without one the summary is extracted inline.
+
+    Sessions live in an LRU of `max_sessions`. With a `store` (a
+    SQLiteSessionStore shared by workers), every read first checks the
+    stored version and reloads a session another worker has written, and
+    every write is a compare-and-set on that version, retried on conflict.
+    """
+
+    def __init__(self, store=None, token_budget=MEMORY_TOKEN_BUDGET, summary_tokens=MEMORY_SUMMARY_TOKENS,
+                 max_sessions=MEMORY_MAX_SESSIONS):
+        self.store = store
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._folding = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MEMORY_SUMMARY_WORKERS, thread_name_prefix="memory")
+        self._stats = {"loads": 0, "saves": 0, "store_reads": 0, "write_conflicts": 0, "evictions": 0,
+                       "summaries": 0, "summary_errors": 0, "history_tokens": 0}
+
+    def history(self, session_id):
+        """Return (summary, recent messages within the token budget) for a session"""
+        with self._lock:
+            state = self._state(session_id)
+            summary = state["summary"]
+            messages = []
+            used = 0
+            for message in reversed(state["messages"]):
+                used += message_tokens(message)
+                if used > self.token_budget and messages:
+                    break
+                messages.append(message)
+            messages.reverse()
+            self._stats["loads"] += 1
+            self._stats["history_tokens"] += sum(map(message_tokens, messages)) + (count_tokens(summary) if summary else 0)
+        return summary, messages
+
+    def save(self, session_id, user_input, answer, summarize=None):
+        """Append a turn; summarize(summary, messages) -> str folds older messages"""
+        turn = [{"role": "user", "content": user_input}, {"role": "assistant", "content": answer}]
+        with self._lock:
+            while True:
+                state = dict(self._state(session_id))
+                state["messages"] = state["messages"] + turn
+                fold = self._overflow(state) if session_id not in self._folding else None
+                if fold and not summarize:
+                    state["summary"] = extract_summary(state["summary"], fold, self.summary_tokens)
+                    state["messages"] = state["messages"][len(fold):]
+                if self._commit(session_id, state):
+                    break
+            self._stats["saves"] += 1
+            if fold and summarize:
+                self._folding.add(session_id)
+            elif fold:
+                self._stats["summaries"] += 1
+
+        if fold and summarize:
+            self._executor.submit(self._fold, session_id, state["summary"], fold, summarize)
+
+    def clear(self, session_id):
+        with self._lock:
+            if self.store:
+                # An empty write rather than a delete keeps the version moving forward for other workers
+                while not self._commit(session_id, dict(self._state(session_id), summary="", messages=[])):
+                    pass
+            else:
+                self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["sessions"] = len(self._sessions)
+        stats["avg_history_tokens"] = stats.pop("history_tokens") / stats["loads"] if stats["loads"] else 0.0
+        return stats
+
+    def _state(self, session_id):
+        """Current session state, reloaded when the store has a newer version; call under _lock"""
+        state = self._sessions.get(session_id)
+        if self.store:
+            version = self.store.version(session_id)
+            if state is None or state["version"] != version:
+                state = self.store.get(session_id) if version else None
+                if state is not None:
+                    self._stats["store_reads"] += 1
+        if state is None:
+            state = {"summary": "", "messages": [], "version": 0}
+        self._remember(session_id, state)
+        return state
+
+    def _commit(self, session_id, state):
+        """Write state through to the store; False if another worker wrote first. Call under _lock"""
+        if self.store:
+            version = self.store.put(session_id, state, state["version"])
+            if version is None:
+                self._stats["write_conflicts"] += 1
+                return False
+            state["version"] = version
+        self._remember(session_id, state)
+        return True
+
+    def _remember(self, session_id, state):
+        self._sessions[session_id] = state
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _overflow(self, state):
+        """Oldest messages to fold so the window drops to half the budget"""
+        tokens = sum(map(message_tokens, state["messages"]))
+        if tokens <= self.token_budget:
+            return None
+        fold = []
+        for message in state["messages"][:-2]:
+            if tokens <= self.token_budget // 2:
+                break
+            fold.append(message)
+            tokens -= message_tokens(message)
+        return fold or None
+
+    def _fold(self, session_id, summary, fold, summarize):
+        try:
+            new_summary = summarize(summary, fold)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            new_summary = None
+
+        with self._lock:
+            self._folding.discard(session_id)
+            if new_summary is None:
+                self._stats["summary_errors"] += 1
+                new_summary = extract_summary(summary, fold, self.summary_tokens)
+            # Without a store an evicted session is gone for good
+            if not self.store and session_id not in self._sessions:
+                return
+            while True:
+                state = dict(self._state(session_id))
+                # Skip if the session was cleared or folded elsewhere meanwhile
+                if state["messages"][:len(fold)] != fold:
+                    return
+                state["summary"] = new_summary
+                state["messages"] = state["messages"][len(fold):]
+                if self._commit(session_id, state):
+                    break
+            self._stats["summaries"] += 1
+
+
+_memory = None
+_memory_pid = None
+_memory_lock = threading.Lock()
+
+
+def get_conversation_memory():
+    """Return the process-wide ConversationMemory, creating it on first use"""
+    global _memory, _memory_pid
+    pid = os.getpid()
+    if _memory is None or _memory_pid != pid:
+        with _memory_lock:
+            if _memory is None or _memory_pid != pid:
+                store = SQLiteSessionStore(MEMORY_DB_PATH) if MEMORY_DB_PATH else None
+                _memory = ConversationMemory(store=store)
+                _memory_pid = pid
+    return _memory
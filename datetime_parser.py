@@ -0,0 +1,151 @@
+import re
+from datetime import datetime, timedelta
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+
+# Hour used for parts of the day and for dates given without a time
+DAYPARTS = {"morning": 9, "noon": 12, "midday": 12, "afternoon": 14, "evening": 18, "tonight": 19, "midnight": 0}
+DEFAULT_HOUR = 14
+
+# Full month names and their standard abbreviations only, so words like
+# "marketing" or "decision" are not read as months
+_MONTH = r"(" + "|".join(MONTHS) + r"|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec)"
+_CLOCK = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_AMPM = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)")
+_RELATIVE = re.compile(r"\bin\s+(\d+)\s+(minute|min|hour|hr|day|week)s?\b")
+_WEEKDAY = re.compile(r"\b(next|this|coming)?\s*(" + "|".join(WEEKDAYS) + r")\b")
+_MONTH_DAY = re.compile(r"\b" + _MONTH + r"\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b")
+_DAY_MONTH = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r"\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m)\b")
+
+
+def _month_number(name):
+    return [m[:3] for m in MONTHS].index(name[:3]) + 1
+
+
+def _upcoming(date, now):
+    """Roll a month/day without a year forward to its next occurrence"""
+    return date if date >= now.date() else date.replace(year=date.year + 1)
+
+
+def _parse_date(text, now):
+    if "day after tomorrow" in text:
+        return (now + timedelta(days=2)).date()
+    if "tomorrow" in text:
+        return (now + timedelta(days=1)).date()
+    if "today" in text or "tonight" in text:
+        return now.date()
+
+    match = _ISO_DATE.search(text)
+    if match:
+        return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3))).date()
+
+    match = _MONTH_DAY.search(text)
+    if match:
+        return _upcoming(now.replace(month=_month_number(match.group(1)), day=int(match.group(2))).date(), now)
+
+    match = _DAY_MONTH.search(text)
+    if match:
+        return _upcoming(now.replace(month=_month_number(match.group(2)), day=int(match.group(1))).date(), now)
+
+    match = _NUMERIC_DATE.search(text)
+    if match:
+        month, day, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        if year:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+            return datetime(year, month, day).date()
+        return _upcoming(now.replace(month=month, day=day).date(), now)
+
+    match = _WEEKDAY.search(text)
+    if match:
+        days_ahead = (WEEKDAYS.index(match.group(2)) - now.weekday()) % 7
+        if days_ahead == 0 and match.group(1) != "this":
+            days_ahead = 7
+        return (now + timedelta(days=days_ahead)).date()
+
+    return None
+
+
+def _parse_time(text):
+    """(hour, minute) of the first valid time in text; "25:00" or "9:75" are skipped"""
+    for match in _AMPM.finditer(text):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if hour <= 12 and minute < 60:
+            return hour % 12 + (12 if match.group(3).startswith("p") else 0), minute
+
+    for match in _CLOCK.finditer(text):
+        hour, minute = int(match.group(1)), int(match.group(2))
+        if hour < 24 and minute < 60:
+            return hour, minute
+
+    for part, hour in DAYPARTS.items():
+        if re.search(rf"\b{part}\b", text):
+            return hour, 0
+
+    for match in re.finditer(r"\bat\s+(\d{1,2})\b", text):
+        hour = int(match.group(1))
+        if hour < 24:
+            # "at 3" almost always means the afternoon during working hours
+            return (hour + 12 if 1 <= hour <= 7 else hour), 0
+
+    return None
+
+
+def parse_datetime(text, now=None, default_hour=DEFAULT_HOUR):
+    """Parse an ISO timestamp or a phrase like "tomorrow at 2 PM".
+
+    Returns a naive datetime, or None if no date or time was recognised.
+    A time without a date means the next occurrence of that time; a date
+    without a time defaults to default_hour.
+    """
+    if not text:
+        return None
+    now = now or datetime.now()
+
+    try:
+        return datetime.fromisoformat(text.strip().replace("Z", ""))
+    except ValueError:
+        pass
+
+    text = text.lower()
+    match = _RELATIVE.search(text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        if unit.startswith("m"):
+            return (now + timedelta(minutes=amount)).replace(second=0, microsecond=0)
+        if unit.startswith("h"):
+            return (now + timedelta(hours=amount)).replace(second=0, microsecond=0)
+        days = amount * 7 if unit == "week" else amount
+        base = now + timedelta(days=days)
+        hour, minute = _parse_time(text) or (default_hour, 0)
+        return base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    try:
+        date = _parse_date(text, now)
+    except ValueError:
+        # e.g. "Feb 30"
+        return None
+    clock = _parse_time(text)
+    if date is None and clock is None:
+        return None
+
+    hour, minute = clock or (default_hour, 0)
+    if date is None:
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return candidate if candidate > now else candidate + timedelta(days=1)
+    return datetime(date.year, date.month, date.day, hour, minute)
+
+
+def parse_duration(text, default=60):
+    """Parse "30 minutes", "1 hour" or "1.5h" into minutes"""
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = _DURATION.search((text or "").lower())
+    if not match:
+        return default
+    amount, unit = float(match.group(1)), match.group(2)
+    return int(amount * 60) if unit.startswith("h") else int(amount)
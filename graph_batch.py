@@ -0,0 +1,126 @@
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from graph_client import get_graph_client
+
+# Graph accepts at most 20 sub-requests per $batch call
+GRAPH_BATCH_LIMIT = 20
+# $batch calls sent at once when a batch spans several chunks
+GRAPH_BATCH_PARALLELISM = 4
+
+
+class GraphBatchError(Exception):
+    """A batch could not be split into valid $batch payloads"""
+
+
+class GraphBatch:
+    """Collects Graph sub-requests and sends them through the $batch endpoint.
+
+    add() returns the sub-request id; execute() returns a dict mapping each
+    id to {"status", "headers", "body"}. Requests linked through depends_on
+    are kept in the same $batch call so Graph runs them in order (a failed
+    dependency yields status 424 for its dependants).
+    """
+
+    def __init__(self, token=None, client=None, limit=GRAPH_BATCH_LIMIT):
+        self.client = client or get_graph_client()
+        self.token = token
+        self.limit = limit
+        self._requests = []
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._requests)
+
+    def add(self, method, url, body=None, depends_on=None, request_id=None):
+        request_id = str(request_id or next(self._ids))
+        request = {"id": request_id, "method": method, "url": url}
+        if body is not None:
+            request["body"] = body
+            request["headers"] = {"Content-Type": "application/json"}
+        if depends_on:
+            request["dependsOn"] = [str(dep) for dep in depends_on]
+        self._requests.append(request)
+        return request_id
+
+    def get(self, url, **kwargs):
+        return self.add("GET", url, **kwargs)
+
+    def post(self, url, body, **kwargs):
+        return self.add("POST", url, body=body, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.add("DELETE", url, **kwargs)
+
+    def execute(self):
+        if not self._requests:
+            return {}
+
+        chunks = self._chunks()
+        results = {}
+        if len(chunks) == 1:
+            results.update(self._send(chunks[0]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(GRAPH_BATCH_PARALLELISM, len(chunks))) as pool:
+                for chunk_results in pool.map(self._send, chunks):
+                    results.update(chunk_results)
+        self._requests = []
+        return results
+
+    def _chunks(self):
+        """Pack dependency groups into chunks of at most `limit` requests"""
+        group_of = {}
+        groups = []
+        for request in self._requests:
+            deps = request.get("dependsOn", [])
+            group = None
+            for dep in deps:
+                if dep not in group_of:
+                    raise GraphBatchError(f"Request {request['id']} depends on unknown request {dep}")
+                dep_group = group_of[dep]
+                if group is None:
+                    group = dep_group
+                elif dep_group is not group:
+                    group.extend(dep_group)
+                    for member in dep_group:
+                        group_of[member["id"]] = group
+                    groups = [g for g in groups if g is not dep_group]
+            if group is None:
+                group = []
+                groups.append(group)
+            group.append(request)
+            group_of[request["id"]] = group
+
+        chunks = []
+        current = []
+        for group in groups:
+            if len(group) > self.limit:
+                raise GraphBatchError(f"{len(group)} dependent requests exceed the $batch limit of {self.limit}")
+            if len(current) + len(group) > self.limit:
+                chunks.append(current)
+                current = []
+            current.extend(group)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _send(self, chunk):
+        response = self.client.post("/$batch", token=self.token, json={"requests": chunk})
+        if response.status_code != 200:
+            # The whole call failed; report it against every sub-request
+            return {
+                request["id"]: {"status": response.status_code, "headers": {}, "body": response.text}
+                for request in chunk
+            }
+
+        results = {}
+        for item in response.json().get("responses", []):
+            body = item.get("body")
+            if isinstance(body, str):
+                try:
+                    body = json.loads(body)
+                except ValueError:
+                    pass
+            results[item["id"]] = {"status": item.get("status"), "headers": item.get("headers", {}), "body": body}
+        return results
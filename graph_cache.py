@@ -0,0 +1,230 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from graph_client import get_graph_client
+
+# Configuration
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "60"))
+GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "256"))
+
+
+def user_key(token, mailbox="me"):
+    """Cache key for a mailbox without keeping the raw token around"""
+    fingerprint = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+    return f"{mailbox}:{fingerprint}"
+
+
+class GraphCacheError(Exception):
+    """Graph returned an error while syncing a cached collection"""
+
+
+class DeltaCache:
+    """TTL + LRU cache of Graph collections kept fresh with delta queries.
+
+    Each entry holds the items of one collection (e.g. a user's inbox) keyed
+    by id, plus the @odata.deltaLink from the last sync. Entries younger
+    than `ttl` are served as-is; older ones are brought up to date by
+    replaying only the changes since the last deltaLink. invalidate() marks
+    entries stale so the next read syncs, without discarding the deltaLink.
+
+    A full sync can be much larger than what the caller shows, so get() can
+    answer a cold miss from a small `seed_url` request instead and run the
+    full sync in the background.
+    """
+
+    def __init__(self, client=None, ttl=GRAPH_CACHE_TTL, max_entries=GRAPH_CACHE_MAX_ENTRIES):
+        self.client = client or get_graph_client()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_locks = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "delta_syncs": 0,
+            "full_syncs": 0,
+            "invalidations": 0,
+            "evictions": 0,
+            "served_age_total": 0.0,
+            "served_age_max": 0.0,
+            "served": 0
+        }
+
+    def get(self, key, delta_url, token, seed_url=None):
+        """Return the cached items for key, syncing through Graph if stale.
+
+        With seed_url, a key that was never synced is answered from that one
+        (non-delta) request while the full delta sync runs in the background.
+        Raises GraphCacheError if Graph rejects the request.
+        """
+        entry = self._lookup(key)
+        if entry is None and seed_url:
+            return self._seed(key, seed_url, delta_url, token)
+        if entry and time.time() - entry["synced_at"] < self.ttl and not entry["stale"]:
+            self._record_served(entry, hit=True)
+            return list(entry["items"].values())
+
+        with self._sync_lock(key):
+            # Another thread may have synced while we waited
+            entry = self._lookup(key)
+            if entry and time.time() - entry["synced_at"] < self.ttl and not entry["stale"]:
+                self._record_served(entry, hit=True)
+                return list(entry["items"].values())
+
+            if entry and entry["delta_link"]:
+                items = dict(entry["items"])
+                delta_link = self._sync(entry["delta_link"], token, items)
+                if delta_link is None:
+                    # Delta token expired (410 Gone); start over
+                    items = {}
+                    delta_link = self._sync(delta_url, token, items, full=True)
+                else:
+                    self._bump("delta_syncs")
+            else:
+                items = {}
+                delta_link = self._sync(delta_url, token, items, full=True)
+
+            entry = {"items": items, "delta_link": delta_link, "synced_at": time.time(), "stale": False}
+            self._store(key, entry)
+            self._record_served(entry, hit=False)
+            return list(items.values())
+
+    def _seed(self, key, seed_url, delta_url, token):
+        with self._sync_lock(key):
+            entry = self._lookup(key)
+            if entry is not None:
+                self._record_served(entry, hit=True)
+                return list(entry["items"].values())
+
+            response = self.client.get(seed_url, token=token)
+            if response.status_code != 200:
+                raise GraphCacheError(response.text)
+            items = {item.get("id"): item for item in response.json().get("value", [])}
+            # No deltaLink yet, so a read after the TTL syncs in full unless the warm-up got there first
+            entry = {"items": items, "delta_link": None, "synced_at": time.time(), "stale": False}
+            self._store(key, entry)
+            self._record_served(entry, hit=False)
+
+        threading.Thread(target=self._warm, args=(key, delta_url, token), name="graph-cache-warm", daemon=True).start()
+        return list(items.values())
+
+    def _warm(self, key, delta_url, token):
+        """Full delta sync for a seeded key, replacing the seed when done"""
+        try:
+            with self._sync_lock(key):
+                entry = self._lookup(key)
+                if entry is not None and entry["delta_link"]:
+                    return
+                items = {}
+                delta_link = self._sync(delta_url, token, items, full=True)
+                self._store(key, {"items": items, "delta_link": delta_link, "synced_at": time.time(), "stale": False})
+        except Exception as e:
+            print(f"Graph cache warm-up failed for {key}: {e}")
+
+    def invalidate(self, prefix):
+        """Mark every entry whose key starts with prefix as stale"""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if key.startswith(prefix):
+                    entry["stale"] = True
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": entries,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+            "delta_syncs": stats["delta_syncs"],
+            "full_syncs": stats["full_syncs"],
+            "invalidations": stats["invalidations"],
+            "evictions": stats["evictions"],
+            "avg_staleness_s": stats["served_age_total"] / stats["served"] if stats["served"] else 0.0,
+            "max_staleness_s": stats["served_age_max"]
+        }
+
+    def _sync(self, url, token, items, full=False):
+        """Apply delta pages starting at url to items; return the new deltaLink"""
+        delta_link = None
+        while url:
+            response = self.client.get(url, token=token)
+            if response.status_code == 410 and not full:
+                return None
+            if response.status_code != 200:
+                raise GraphCacheError(response.text)
+
+            body = response.json()
+            for item in body.get("value", []):
+                if "@removed" in item:
+                    items.pop(item.get("id"), None)
+                else:
+                    items[item.get("id")] = {**items.get(item.get("id"), {}), **item}
+
+            url = body.get("@odata.nextLink")
+            delta_link = body.get("@odata.deltaLink")
+
+        if full:
+            self._bump("full_syncs")
+        return delta_link
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._sync_locks.pop(evicted, None)
+                self._stats["evictions"] += 1
+
+    def _sync_lock(self, key):
+        with self._lock:
+            return self._sync_locks.setdefault(key, threading.Lock())
+
+    def _record_served(self, entry, hit):
+        age = time.time() - entry["synced_at"]
+        with self._lock:
+            self._stats["hits" if hit else "misses"] += 1
+            self._stats["served"] += 1
+            self._stats["served_age_total"] += age
+            self._stats["served_age_max"] = max(self._stats["served_age_max"], age)
+
+    def _bump(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_graph_cache():
+    """Return the process-wide DeltaCache, creating it on first use"""
+    global _cache, _cache_pid
+    pid = os.getpid()
+    if _cache is None or _cache_pid != pid:
+        with _cache_lock:
+            if _cache is None or _cache_pid != pid:
+                # Forked workers build their own; the parent's locks and sync threads don't survive a fork
+                _cache = DeltaCache()
+                _cache_pid = pid
+    return _cache
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from graph_throttle import IDEMPOTENT_METHODS, AsyncGraphThrottle, GraphThrottle, tenant_of
+from tracing import body_size, start_span
+
+# Configuration
+GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+GRAPH_CONNECT_TIMEOUT = float(os.getenv("GRAPH_CONNECT_TIMEOUT", "3.05"))
+GRAPH_READ_TIMEOUT = float(os.getenv("GRAPH_READ_TIMEOUT", "30"))
+GRAPH_POOL_CONNECTIONS = int(os.getenv("GRAPH_POOL_CONNECTIONS", "4"))
+GRAPH_POOL_MAXSIZE = int(os.getenv("GRAPH_POOL_MAXSIZE", "10"))
+
+# Path segments that look like Graph object ids are collapsed so metrics
+# are aggregated per endpoint rather than per event/message.
+_ID_SEGMENT = re.compile(r"/[A-Za-z0-9_=\-]{20,}")
+
+
+class GraphMetrics:
+    """Request counts and latency per Graph endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, method, endpoint, status, elapsed):
+        key = f"{method} {endpoint}"
+        with self._lock:
+            stats = self._stats.setdefault(key, {
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_status": None
+            })
+            elapsed_ms = elapsed * 1000
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_status"] = status
+            if not isinstance(status, int) or status >= 400:
+                stats["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: dict(stats, avg_ms=stats["total_ms"] / stats["count"])
+                for key, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class GraphClient:
+    """Pooled, keep-alive HTTP client for Microsoft Graph.
+
+    One instance is shared by every tool in a worker process so TCP/TLS
+    connections to graph.microsoft.com are reused between calls. Requests
+    go through a GraphThrottle, which retries 429/503 after Retry-After and
+    raises GraphThrottledError when Graph keeps refusing.
+    """
+
+    def __init__(self, base_url=GRAPH_BASE_URL, connect_timeout=GRAPH_CONNECT_TIMEOUT,
+                 read_timeout=GRAPH_READ_TIMEOUT, pool_connections=GRAPH_POOL_CONNECTIONS,
+                 pool_maxsize=GRAPH_POOL_MAXSIZE, throttle=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.metrics = GraphMetrics()
+        self.throttle = throttle or GraphThrottle()
+
+        self.session = requests.Session()
+        # pool_block caps concurrent sockets per host at pool_maxsize
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+
+    def _url(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def _endpoint(self, path):
+        endpoint = path.split("?", 1)[0]
+        if endpoint.startswith(self.base_url):
+            endpoint = endpoint[len(self.base_url):]
+        return _ID_SEGMENT.sub("/{id}", endpoint)
+
+    @staticmethod
+    def _tenant(request_headers):
+        return tenant_of(request_headers.get("Authorization", "").replace("Bearer ", "", 1))
+
+    def request(self, method, path, token=None, headers=None, **kwargs):
+        """Send a request to Graph, throttled per tenant, recording its latency and a span"""
+        request_headers = {}
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        if headers:
+            request_headers.update(headers)
+        kwargs.setdefault("timeout", self.timeout)
+        with start_span("graph.request", **{"http.request.method": method, "http.route": self._endpoint(path)}) as span:
+            response = self.throttle.call(self._tenant(request_headers), lambda: self._send(method, path, request_headers, kwargs),
+                                          idempotent=method.upper() in IDEMPOTENT_METHODS)
+            if span.recording:
+                span.set(**{
+                    "http.response.status_code": response.status_code,
+                    "http.request.body.size": body_size(response.request.body),
+                    "http.response.body.size": len(response.content)
+                })
+                if response.status_code >= 400:
+                    span.fail(f"HTTP {response.status_code}")
+            return response
+
+    def _send(self, method, path, request_headers, kwargs):
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self._url(path), headers=request_headers, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self.metrics.record(method, self._endpoint(path), status, time.perf_counter() - start)
+
+    def get(self, path, token=None, **kwargs):
+        return self.request("GET", path, token=token, **kwargs)
+
+    def post(self, path, token=None, **kwargs):
+        return self.request("POST", path, token=token, **kwargs)
+
+    def patch(self, path, token=None, **kwargs):
+        return self.request("PATCH", path, token=token, **kwargs)
+
+    def delete(self, path, token=None, **kwargs):
+        return self.request("DELETE", path, token=token, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class GraphResponse:
+    """Fully-read Graph response with the parts of the requests API we use"""
+
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text) if self.text else {}
+
+
+class AsyncGraphClient:
+    """aiohttp-based Graph client for code running on an event loop.
+
+    Shares timeout, pool-size, metrics and throttling conventions with
+    GraphClient. The underlying ClientSession is bound to the loop it was
+    created on and is recreated if used from a different loop.
+    """
+
+    def __init__(self, base_url=GRAPH_BASE_URL, connect_timeout=GRAPH_CONNECT_TIMEOUT,
+                 read_timeout=GRAPH_READ_TIMEOUT, pool_maxsize=GRAPH_POOL_MAXSIZE, throttle=None):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.metrics = GraphMetrics()
+        self.throttle = throttle or AsyncGraphThrottle()
+        self._session = None
+        self._loop = None
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._discard_session()
+            # Imported here so the Flask workers, which only use GraphClient, start without aiohttp
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+                headers={"Content-Type": "application/json"}
+            )
+            self._loop = loop
+        return self._session
+
+    def _discard_session(self):
+        """Close the session of a previous loop so its sockets are not leaked"""
+        session, old_loop = self._session, self._loop
+        self._session = self._loop = None
+        if session is None or session.closed:
+            return
+        if old_loop is not None and old_loop.is_running():
+            # Still serving on another thread: close it there
+            asyncio.run_coroutine_threadsafe(session.close(), old_loop)
+            return
+        try:
+            # The loop has stopped, so the coroutine cannot run; closing the connector drops its sockets
+            session.connector.close()
+        except Exception as e:
+            print(f"Error closing a Graph session from a finished event loop: {e}")
+
+    _url = GraphClient._url
+    _endpoint = GraphClient._endpoint
+    _tenant = GraphClient._tenant
+
+    async def request(self, method, path, token=None, headers=None, **kwargs):
+        """Send a request to Graph, throttled per tenant and traced, and return a GraphResponse"""
+        request_headers = {}
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        if headers:
+            request_headers.update(headers)
+        with start_span("graph.request", **{"http.request.method": method, "http.route": self._endpoint(path)}) as span:
+            response = await self.throttle.acall(self._tenant(request_headers), lambda: self._send(method, path, request_headers, kwargs),
+                                                 idempotent=method.upper() in IDEMPOTENT_METHODS)
+            if span.recording:
+                span.set(**{
+                    "http.response.status_code": response.status_code,
+                    "http.request.body.size": body_size(kwargs.get("json", kwargs.get("data"))),
+                    "http.response.body.size": len(response.text)
+                })
+                if response.status_code >= 400:
+                    span.fail(f"HTTP {response.status_code}")
+            return response
+
+    async def _send(self, method, path, request_headers, kwargs):
+        status = "error"
+        start = time.perf_counter()
+        try:
+            async with self._get_session().request(method, self._url(path), headers=request_headers, **kwargs) as response:
+                text = await response.text()
+                status = response.status
+                return GraphResponse(response.status, text, dict(response.headers))
+        finally:
+            self.metrics.record(method, self._endpoint(path), status, time.perf_counter() - start)
+
+    async def get(self, path, token=None, **kwargs):
+        return await self.request("GET", path, token=token, **kwargs)
+
+    async def post(self, path, token=None, **kwargs):
+        return await self.request("POST", path, token=token, **kwargs)
+
+    async def patch(self, path, token=None, **kwargs):
+        return await self.request("PATCH", path, token=token, **kwargs)
+
+    async def delete(self, path, token=None, **kwargs):
+        return await self.request("DELETE", path, token=token, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_client = None
+_client_pid = None
+_async_client = None
+_async_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_graph_client():
+    """Return the process-wide GraphClient, creating it on first use.
+
+    Connection pools must not be shared across fork(), so a worker that was
+    forked from a parent gets its own client.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = GraphClient()
+                _client_pid = pid
+    return _client
+
+
+def get_async_graph_client():
+    """Return the process-wide AsyncGraphClient, creating it on first use"""
+    global _async_client, _async_client_pid
+    pid = os.getpid()
+    if _async_client is None or _async_client_pid != pid:
+        with _client_lock:
+            if _async_client is None or _async_client_pid != pid:
+                _async_client = AsyncGraphClient()
+                _async_client_pid = pid
+    return _async_client
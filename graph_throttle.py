@@ -0,0 +1,321 @@
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+
+# Configuration
+# Attempts after the first for throttled (429/503/504) responses
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "3"))
+# Longest Retry-After we wait out; beyond that the caller gets an error right away
+GRAPH_MAX_RETRY_WAIT = float(os.getenv("GRAPH_MAX_RETRY_WAIT", "10"))
+# Requests per second and burst allowed per tenant
+GRAPH_RATE_LIMIT = float(os.getenv("GRAPH_RATE_LIMIT", "20"))
+GRAPH_RATE_BURST = int(os.getenv("GRAPH_RATE_BURST", "40"))
+# Bounds of the adaptive per-tenant concurrency limit
+GRAPH_MIN_CONCURRENCY = int(os.getenv("GRAPH_MIN_CONCURRENCY", "1"))
+GRAPH_MAX_CONCURRENCY = int(os.getenv("GRAPH_MAX_CONCURRENCY", "16"))
+# Consecutive failures that open the circuit, and how long it stays open
+GRAPH_BREAKER_THRESHOLD = int(os.getenv("GRAPH_BREAKER_THRESHOLD", "5"))
+GRAPH_BREAKER_COOLDOWN = float(os.getenv("GRAPH_BREAKER_COOLDOWN", "30"))
+
+THROTTLED_STATUSES = (429, 503, 504)
+# Graph refuses a 429 before doing any work; a 503/504 may come after a
+# create went through, so only these are retried for non-idempotent methods
+RETRY_SAFE_STATUSES = (429,)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# The concurrency limit is multiplied by this on every throttled response
+DECREASE_FACTOR = 0.5
+# Backoff when a throttled response has no Retry-After
+BASE_BACKOFF = 1.0
+
+
+class GraphThrottledError(Exception):
+    """Graph is throttling or failing for this tenant; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after, reason="throttling requests"):
+        self.retry_after = retry_after
+        super().__init__(f"Microsoft Graph is {reason}; try again in {math.ceil(retry_after)} s")
+
+
+@lru_cache(maxsize=256)
+def tenant_of(token):
+    """Tenant id (tid claim) of an access token, read without verifying it"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get("tid") or "default"
+    except (IndexError, ValueError, AttributeError):
+        return "default"
+
+
+def retry_after(headers, attempt):
+    """Seconds to wait before retrying: Retry-After if Graph sent one, else jittered backoff"""
+    value = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return BASE_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """Requests per second with bursts; pause() holds every caller off until a given time"""
+
+    def __init__(self, rate=GRAPH_RATE_LIMIT, burst=GRAPH_RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class AIMDLimit:
+    """Concurrency limit that grows by one per limit's worth of successes and halves when throttled"""
+
+    def __init__(self, minimum=GRAPH_MIN_CONCURRENCY, maximum=GRAPH_MAX_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(maximum)
+
+    @property
+    def value(self):
+        return max(self.minimum, int(self.limit))
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+
+
+class CircuitBreaker:
+    """Fails fast after `threshold` consecutive failures, then lets one probe through per cooldown"""
+
+    def __init__(self, threshold=GRAPH_BREAKER_THRESHOLD, cooldown=GRAPH_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise GraphThrottledError unless a request may go out now; True for the half-open probe"""
+        with self._lock:
+            if self.state == "closed":
+                return False
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                # This caller is the probe; everyone else keeps failing fast
+                self.state = "half_open"
+                return True
+            raise GraphThrottledError(max(remaining, 1.0), "unavailable")
+
+    def release_probe(self):
+        """Give up a half-open probe that ended without an outcome (e.g. cancelled)
+
+        The next caller becomes the probe instead; otherwise the breaker
+        would stay half-open and fail every request for the tenant.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic() - self.cooldown
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class GraphThrottle:
+    """Client-side flow control for Graph, per tenant.
+
+    Each tenant gets a token bucket (steady rate), an AIMD concurrency
+    limit (backs off when Graph answers 429/503/504, creeps back up on
+    success) and a circuit breaker (after repeated failures, requests fail
+    immediately with GraphThrottledError instead of adding to the load).
+    Throttled requests are retried after Retry-After, and the wait applies
+    to every request for the tenant, so retries do not pile up.
+    """
+
+    def __init__(self, max_retries=GRAPH_MAX_RETRIES, max_retry_wait=GRAPH_MAX_RETRY_WAIT, rate=GRAPH_RATE_LIMIT,
+                 burst=GRAPH_RATE_BURST, min_concurrency=GRAPH_MIN_CONCURRENCY, max_concurrency=GRAPH_MAX_CONCURRENCY,
+                 breaker_threshold=GRAPH_BREAKER_THRESHOLD, breaker_cooldown=GRAPH_BREAKER_COOLDOWN):
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self._settings = (rate, burst, min_concurrency, max_concurrency, breaker_threshold, breaker_cooldown)
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._tenants = {}
+
+    def call(self, tenant, send, idempotent=True):
+        """Return send()'s response, waiting for capacity and retrying throttled responses.
+
+        With idempotent=False (POST, PATCH) only 429s are retried, since a
+        503/504 does not tell whether the request was applied.
+        """
+        state = self._tenant(tenant)
+        for attempt in range(self.max_retries + 1):
+            probe = state["breaker"].check()
+            try:
+                response = self._send(state, send)
+            except Exception:
+                self._record(state, failed=True)
+                raise
+            except BaseException:
+                if probe:
+                    state["breaker"].release_probe()
+                raise
+            wait = self._outcome(state, response, attempt, idempotent)
+            if wait is None:
+                return response
+            time.sleep(wait)
+
+    def _send(self, state, send):
+        time.sleep(state["bucket"].reserve())
+        with self._available:
+            self._available.wait_for(lambda: state["inflight"] < state["limit"].value)
+            state["inflight"] += 1
+        try:
+            return send()
+        finally:
+            with self._available:
+                state["inflight"] -= 1
+                self._available.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                tenant: {
+                    "concurrency_limit": state["limit"].value,
+                    "inflight": state["inflight"],
+                    "breaker": state["breaker"].state,
+                    **state["counts"]
+                }
+                for tenant, state in self._tenants.items()
+            }
+
+    def _tenant(self, tenant):
+        with self._lock:
+            state = self._tenants.get(tenant)
+            if state is None:
+                rate, burst, min_concurrency, max_concurrency, threshold, cooldown = self._settings
+                state = self._tenants[tenant] = {
+                    "bucket": TokenBucket(rate, burst),
+                    "limit": AIMDLimit(min_concurrency, max_concurrency),
+                    "breaker": CircuitBreaker(threshold, cooldown),
+                    "inflight": 0,
+                    "counts": {"requests": 0, "throttled": 0, "retries": 0, "failures": 0}
+                }
+            return state
+
+    def _record(self, state, failed=False, throttled=False):
+        with self._lock:
+            state["counts"]["requests"] += 1
+            if throttled:
+                state["counts"]["throttled"] += 1
+                state["limit"].on_throttle()
+            elif not failed:
+                state["limit"].on_success()
+            if failed or throttled:
+                state["counts"]["failures"] += 1
+        if failed or throttled:
+            state["breaker"].record_failure()
+        else:
+            state["breaker"].record_success()
+
+    def _outcome(self, state, response, attempt, idempotent=True):
+        """None to return the response, else seconds to wait before retrying it.
+
+        Raises GraphThrottledError when the retries or the wait run out.
+        """
+        status = response.status_code
+        if status not in THROTTLED_STATUSES:
+            self._record(state, failed=status >= 500)
+            return None
+        self._record(state, throttled=True)
+        wait = retry_after(response.headers, attempt)
+        state["bucket"].pause(wait)
+        if not idempotent and status not in RETRY_SAFE_STATUSES:
+            return None
+        if attempt >= self.max_retries or wait > self.max_retry_wait:
+            raise GraphThrottledError(wait)
+        with self._lock:
+            state["counts"]["retries"] += 1
+        return wait
+
+
+class AsyncGraphThrottle(GraphThrottle):
+    """GraphThrottle for AsyncGraphClient; waits on the event loop instead of blocking it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = None
+        self._loop = None
+
+    def _async_available(self):
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def acall(self, tenant, send, idempotent=True):
+        """Async call(); send is a coroutine function returning a GraphResponse"""
+        state = self._tenant(tenant)
+        available = self._async_available()
+        for attempt in range(self.max_retries + 1):
+            probe = state["breaker"].check()
+            try:
+                response = await self._asend(state, available, send)
+            except Exception:
+                self._record(state, failed=True)
+                raise
+            except BaseException:
+                # Cancelled, e.g. by a turn timeout: no outcome to record
+                if probe:
+                    state["breaker"].release_probe()
+                raise
+            wait = self._outcome(state, response, attempt, idempotent)
+            if wait is None:
+                return response
+            await asyncio.sleep(wait)
+
+    async def _asend(self, state, available, send):
+        await asyncio.sleep(state["bucket"].reserve())
+        async with available:
+            await available.wait_for(lambda: state["inflight"] < state["limit"].value)
+            state["inflight"] += 1
+        try:
+            return await send()
+        finally:
+            async with available:
+                state["inflight"] -= 1
+                available.notify_all()
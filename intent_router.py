@@ -0,0 +1,117 @@
+import re
+import threading
+
+# Phrases that may wrap an otherwise trivial command
+_FILLER = re.compile(r"\b(please|pls|can you|could you|would you|hey|hi|assistant)\b")
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_SPACES = re.compile(r"\s+")
+# Joins between commands in one message ("my emails and today's meetings")
+_CONJUNCTIONS = re.compile(r"[,;&+]|\b(?:and|also|plus|then)\b", re.IGNORECASE)
+
+# Whole-utterance patterns for commands that map straight to one tool with
+# no arguments. Anything that adds a filter ("emails from John") or an
+# action with parameters is left to the LLM agent.
+INTENT_RULES = [
+    ("read_emails", [
+        r"(show|check|read|list|get|view|open|display)( me)?( my)?( the)?( recent| latest| new| unread| last)? (e-?mails?|inbox|mails?|messages)( today)?",
+        r"(do i have|any|are there)( any)?( new| unread)? (e-?mails?|mails?|messages)",
+        r"(what's|whats|what is) in my (inbox|mail|mailbox)",
+        r"(my )?(recent |latest |new )?(e-?mails?|inbox)"
+    ]),
+    ("read_calendar", [
+        r"(show|check|read|list|get|view|open|display)( me)?( my)?( the)?( today's| todays)? (calendar|schedule|agenda|meetings|events)( for)?( today)?",
+        r"(what|which) (meetings|events) (do i have|have i got|are there)( on)?( for)?( today)?",
+        r"(do i have|any|are there)( any)? (meetings|events)( today)?",
+        r"(what's|whats|what is) on my (calendar|schedule|agenda)( for)?( today)?",
+        r"(my )?(today's |todays )?(calendar|schedule|agenda|meetings)( today)?"
+    ])
+]
+
+
+def normalize(text):
+    """Lowercase and strip punctuation/filler so rules match the core command"""
+    text = text.lower()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _FILLER.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class IntentRouter:
+    """Rule-based classifier for commands that do not need the LLM.
+
+    classify() returns a tool name when the whole input matches one of the
+    rules, otherwise None. classify_all() also accepts compound commands and
+    returns a tool per part. Hit/miss counts are kept for the fast-path hit
+    rate.
+    """
+
+    def __init__(self, rules=INTENT_RULES):
+        self.rules = [
+            (intent, [re.compile(rf"^{pattern}$") for pattern in patterns])
+            for intent, patterns in rules
+        ]
+        self._lock = threading.Lock()
+        self._total = 0
+        self._fast_path = 0
+        self._hits = {}
+
+    def classify(self, text):
+        intent = self._match(text)
+        self._record([intent] if intent else None)
+        return intent
+
+    def classify_all(self, text):
+        """Tools for every part of a compound command, or None unless all parts match"""
+        parts = [part for part in _CONJUNCTIONS.split(text or "") if part.strip()]
+        intents = [self._match(part) for part in parts]
+        if not intents or not all(intents):
+            intents = None
+        else:
+            # "my inbox and my emails" is still one read
+            intents = list(dict.fromkeys(intents))
+        self._record(intents)
+        return intents
+
+    def _match(self, text):
+        normalized = normalize(text or "")
+        for name, patterns in self.rules:
+            if any(pattern.match(normalized) for pattern in patterns):
+                return name
+        return None
+
+    def _record(self, intents):
+        with self._lock:
+            self._total += 1
+            self._fast_path += 1 if intents else 0
+            for intent in intents or []:
+                self._hits[intent] = self._hits.get(intent, 0) + 1
+
+    @property
+    def hit_rate(self):
+        with self._lock:
+            return self._fast_path / self._total if self._total else 0.0
+
+    def stats(self):
+        with self._lock:
+            hits = self._fast_path
+            return {
+                "total": self._total,
+                "fast_path_hits": hits,
+                "llm_fallbacks": self._total - hits,
+                "hit_rate": hits / self._total if self._total else 0.0,
+                "by_intent": dict(self._hits)
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router():
+    """Return the process-wide IntentRouter so hit rates cover every agent"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter()
+    return _router
@@ -1,44 +1,112 @@
-from flask import Flask, request, jsonify
-from outlook_agent import OutlookAgent
+from flask import Flask, Response, request, jsonify
+from agent_pool import AGENT_WARMUP, PoolFullError, get_agent_pool
+from conversation_memory import get_conversation_memory
+from graph_cache import get_graph_cache
+from graph_client import get_graph_client
+from intent_router import get_intent_router
+from llm_cache import get_llm_cache
+from tracing import PROMETHEUS_CONTENT_TYPE, get_metrics
+import json
 import os
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
 
 app = Flask(__name__)
-agent = OutlookAgent()
+# Conversations run on a bounded pool of agents, not one shared instance
+pool = get_agent_pool()
+# Agents are built in the background so the worker answers health checks
+# at once; skip the reloader's watcher process, which serves nothing
+if AGENT_WARMUP and (__name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+    pool.warm_up()
+
+def _pool_full(e):
+    return jsonify({"error": f"Server busy: {e}", "status": "error"}), 429, {"Retry-After": "1"}
 
 @app.route("/api/chat", methods=["POST"])
 def chat():
     try:
         data = request.json
         user_message = data.get("message", "")
+        # Send the returned session_id back to continue the conversation
+        session_id = data.get("session_id") or uuid.uuid4().hex
         
         if not user_message:
             return jsonify({"error": "No message provided"}), 400
         
         # Process with LangChain agent
-        response = agent.run(user_message)
+        response = pool.run(user_message, session_id)
         
         return jsonify({
             "response": response,
+            "session_id": session_id,
             "status": "success"
         })
         
+    except PoolFullError as e:
+        return _pool_full(e)
     except Exception as e:
         return jsonify({
             "error": str(e),
             "status": "error"
         }), 500
 
+@app.route("/api/chat/stream", methods=["GET", "POST"])
+def chat_stream():
+    """Server-Sent Events: a session event, status/tool/token events, then a final or error event.
+
+    POST {"message": ..., "session_id": ...}, or GET ?message=...&session_id=...
+    for EventSource clients.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args
+    user_message = data.get("message", "")
+    session_id = data.get("session_id") or uuid.uuid4().hex
+    
+    if not user_message:
+        return jsonify({"error": "No message provided"}), 400
+    
+    try:
+        stream = pool.stream(user_message, session_id)
+    except PoolFullError as e:
+        return _pool_full(e)
+    
+    def events():
+        yield f"event: session\ndata: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+        for event in stream:
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Stop reverse proxies from buffering the stream
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def forget_session(session_id):
+    get_conversation_memory().clear(session_id)
+    return jsonify({"status": "success"})
+
 @app.route("/api/health", methods=["GET"])
 def health():
+    """Liveness: the worker is up; never waits on the agent"""
     return jsonify({
         "status": "healthy",
         "agent": "OutlookAgent",
         "framework": "LangChain + LangGraph"
     })
 
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness: 503 until an agent has been built, so load balancers hold traffic back"""
+    if pool.ready.is_set():
+        return jsonify({"status": "ready", "pool": pool.stats()})
+    status = "failed" if pool.warmup_error else "warming_up"
+    return jsonify({"status": status, "error": pool.warmup_error, "pool": pool.stats()}), 503
+
 @app.route("/api/tools", methods=["GET"])
 def get_tools():
     return jsonify({
@@ -46,9 +114,47 @@ def get_tools():
             {"name": "create_meeting", "description": "Create calendar meetings"},
             {"name": "read_emails", "description": "Read recent emails"},
             {"name": "read_calendar", "description": "View calendar events"},
-            {"name": "delete_meeting", "description": "Delete meetings"}
+            {"name": "delete_meeting", "description": "Delete meetings"},
+            {"name": "create_meetings", "description": "Create several calendar meetings at once"},
+            {"name": "delete_meetings", "description": "Delete every meeting matching subjects or an attendee"},
+            {"name": "list_tasks", "description": "List tasks from the task manager"},
+            {"name": "search_tasks", "description": "Find tasks by words in their title or description"},
+            {"name": "create_task", "description": "Create a task"},
+            {"name": "create_tasks", "description": "Create several tasks at once"},
+            {"name": "complete_tasks", "description": "Mark one or many tasks done"}
         ]
     })
 
+@app.route("/api/graph/metrics", methods=["GET"])
+def graph_metrics():
+    client = get_graph_client()
+    return jsonify({"graph": client.metrics.snapshot(), "throttle": client.throttle.stats()})
+
+@app.route("/api/router/stats", methods=["GET"])
+def router_stats():
+    return jsonify({"router": get_intent_router().stats()})
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"cache": get_graph_cache().stats()})
+
+@app.route("/api/memory/stats", methods=["GET"])
+def memory_stats():
+    return jsonify({"memory": get_conversation_memory().stats()})
+
+@app.route("/api/llm-cache/stats", methods=["GET"])
+def llm_cache_stats():
+    llm_cache = get_llm_cache()
+    return jsonify({"llm_cache": llm_cache.stats() if llm_cache else None})
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    """Span latency histograms, errors, LLM tokens and payload sizes for Prometheus"""
+    return Response(get_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route("/api/pool/stats", methods=["GET"])
+def pool_stats():
+    return jsonify({"pool": pool.stats()})
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Async serving mode for the LangChain Outlook assistant.
+
+Serves the same API as langchain_backend.py from one aiohttp event loop.
+Requests wait on the loop (not on a thread) while a bounded AgentPool
+works through conversations, and get a 429 once its queue is full:
+
+    python langchain_server.py
+"""
+
+import asyncio
+import json
+import os
+import uuid
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from agent_pool import AGENT_WARMUP, PoolFullError, get_agent_pool
+from conversation_memory import get_conversation_memory
+from llm_cache import get_llm_cache
+from tracing import PROMETHEUS_CONTENT_TYPE, get_metrics
+
+# Load environment variables
+load_dotenv()
+
+CHAT_PORT = int(os.getenv("CHAT_PORT", "5000"))
+# Seconds to let in-flight conversations finish on shutdown
+CHAT_SHUTDOWN_TIMEOUT = float(os.getenv("CHAT_SHUTDOWN_TIMEOUT", "30"))
+
+
+def _pool_full(e):
+    return web.json_response({"error": f"Server busy: {e}", "status": "error"}, status=429,
+                             headers={"Retry-After": "1"})
+
+
+async def _message(request):
+    """Return (message, session_id), minting a session id when none is sent"""
+    if request.method == "POST":
+        try:
+            data = await request.json()
+        except ValueError:
+            data = {}
+    else:
+        data = request.query
+    data = data or {}
+    return data.get("message", ""), data.get("session_id") or uuid.uuid4().hex
+
+
+async def chat(request):
+    user_message, session_id = await _message(request)
+    if not user_message:
+        return web.json_response({"error": "No message provided"}, status=400)
+
+    try:
+        response = await request.app["pool"].arun(user_message, session_id)
+        return web.json_response({"response": response, "session_id": session_id, "status": "success"})
+    except PoolFullError as e:
+        return _pool_full(e)
+    except Exception as e:
+        return web.json_response({"error": str(e), "status": "error"}, status=500)
+
+
+async def chat_stream(request):
+    """Server-Sent Events, as /api/chat/stream in langchain_backend.py"""
+    user_message, session_id = await _message(request)
+    if not user_message:
+        return web.json_response({"error": "No message provided"}, status=400)
+
+    try:
+        events = request.app["pool"].astream(user_message, session_id)
+    except PoolFullError as e:
+        return _pool_full(e)
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    await response.prepare(request)
+    await response.write(f"event: session\ndata: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n".encode())
+    async for event in events:
+        await response.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+    await response.write_eof()
+    return response
+
+
+async def health(request):
+    """Liveness: the loop is serving; never waits on the agent"""
+    return web.json_response({
+        "status": "healthy",
+        "agent": "OutlookAgent",
+        "framework": "LangChain + LangGraph",
+        "pool": request.app["pool"].stats()
+    })
+
+
+async def ready(request):
+    """Readiness: 503 until an agent has been built, so load balancers hold traffic back"""
+    pool = request.app["pool"]
+    if pool.ready.is_set():
+        return web.json_response({"status": "ready", "pool": pool.stats()})
+    status = "failed" if pool.warmup_error else "warming_up"
+    return web.json_response({"status": status, "error": pool.warmup_error, "pool": pool.stats()}, status=503)
+
+
+async def pool_stats(request):
+    return web.json_response({"pool": request.app["pool"].stats()})
+
+
+async def memory_stats(request):
+    return web.json_response({"memory": get_conversation_memory().stats()})
+
+
+async def llm_cache_stats(request):
+    llm_cache = get_llm_cache()
+    return web.json_response({"llm_cache": llm_cache.stats() if llm_cache else None})
+
+
+async def metrics(request):
+    return web.Response(text=get_metrics().render(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
+async def forget_session(request):
+    get_conversation_memory().clear(request.match_info["session_id"])
+    return web.json_response({"status": "success"})
+
+
+async def _warm_up_pool(app):
+    """Build the agents on the pool's workers while the server starts taking health checks"""
+    if AGENT_WARMUP:
+        app["pool"].warm_up()
+
+
+async def _shutdown_pool(app):
+    """Let queued conversations finish without blocking the event loop"""
+    await asyncio.get_running_loop().run_in_executor(None, app["pool"].shutdown)
+
+
+def create_app(pool=None):
+    """Build the aiohttp application serving the chat API"""
+    app = web.Application()
+    app["pool"] = pool or get_agent_pool()
+
+    app.router.add_post("/api/chat", chat)
+    app.router.add_get("/api/chat/stream", chat_stream)
+    app.router.add_post("/api/chat/stream", chat_stream)
+    app.router.add_get("/api/health", health)
+    app.router.add_get("/api/ready", ready)
+    app.router.add_get("/api/pool/stats", pool_stats)
+    app.router.add_get("/api/memory/stats", memory_stats)
+    app.router.add_get("/api/llm-cache/stats", llm_cache_stats)
+    app.router.add_get("/api/metrics", metrics)
+    app.router.add_delete("/api/sessions/{session_id}", forget_session)
+    app.on_startup.append(_warm_up_pool)
+    app.on_shutdown.append(_shutdown_pool)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=CHAT_PORT, shutdown_timeout=CHAT_SHUTDOWN_TIMEOUT)
@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Configuration
+# Opt-in: a cached reply is served for up to LLM_CACHE_TTL, so only
+# deterministic, tool-free completions are ever stored (see cacheable())
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+# SQLite file shared by every worker on the host
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+# Seconds a cached completion is served
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Check the size bound every this many writes rather than on each one
+EVICT_EVERY = 100
+PUNCTUATION = re.compile(r"[^\w\s@.:/-]+")
+
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation and collapse whitespace so trivial rewordings share a key"""
+    return " ".join(PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def cacheable(params):
+    """Only single, non-streamed, temperature-0 completions without tools are reused"""
+    return (not params.get("stream") and params.get("n", 1) == 1 and params.get("temperature", 1) == 0
+            and not params.get("tools") and not params.get("functions"))
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMCache:
+    """Completion cache in SQLite with exact and normalized prompt keys.
+
+    A lookup first tries the exact request (model, parameters and messages
+    verbatim), then the normalized one, where every message is lowercased
+    with punctuation and extra whitespace removed, so "Schedule an
+    interview for John!" and "schedule an interview for john" share an
+    entry. Entries expire after `ttl` seconds and the least recently used
+    are evicted beyond `max_entries`.
+
+    Callers pass a `scope` (tenant and user) that is part of every key, so
+    one user's reply is never served to another.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                exact_key TEXT PRIMARY KEY,
+                normalized_key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_normalized ON llm_cache(normalized_key, accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+        self._writes = 0
+        self._stats = {"exact_hits": 0, "normalized_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "skipped": 0}
+
+    def keys(self, namespace, messages, **params):
+        """(exact, normalized) keys for a request; messages are strings or role/content dicts"""
+        exact = _digest([namespace, params, messages])
+        normalized = _digest([namespace, params, [
+            {**message, "content": normalize_prompt(message.get("content") or "")} if isinstance(message, dict) else normalize_prompt(message)
+            for message in messages
+        ]])
+        return exact, normalized
+
+    def get(self, keys):
+        """Return the cached response for (exact, normalized) keys, or None"""
+        exact, normalized = keys
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT exact_key, response FROM llm_cache WHERE exact_key = ? AND expires_at > ?", (exact, now)
+            ).fetchone()
+            kind = "exact_hits"
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT exact_key, response FROM llm_cache WHERE normalized_key = ? AND expires_at > ? "
+                    "ORDER BY accessed_at DESC LIMIT 1",
+                    (normalized, now)
+                ).fetchone()
+                kind = "normalized_hits"
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE exact_key = ?", (now, row[0]))
+            self._conn.commit()
+            self._stats[kind] += 1
+        return row[1]
+
+    def put(self, keys, response, ttl=None):
+        exact, normalized = keys
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (exact_key, normalized_key, response, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (exact, normalized, response, now + (self.ttl if ttl is None else ttl), now)
+            )
+            self._stats["stores"] += 1
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def complete(self, create, ttl=None, validate=None, scope=None, **params):
+        """Return the message content of create(**params) (a chat.completions.create), cached.
+
+        Responses for which validate(content) is false are returned but not
+        stored. Requests that are not cacheable() bypass the cache.
+        """
+        if not cacheable(params):
+            self._count("skipped")
+            return create(**params).choices[0].message.content
+        messages = params.pop("messages")
+        keys = self.keys(["openai", scope], messages, **params)
+        cached = self.get(keys)
+        if cached is not None:
+            return cached
+        content = create(messages=messages, **params).choices[0].message.content
+        if content is not None and (validate is None or validate(content)):
+            self.put(keys, content, ttl)
+        return content
+
+    async def acomplete(self, create, ttl=None, validate=None, scope=None, **params):
+        """complete() for async clients such as AsyncAzureOpenAI; SQLite work runs off the loop"""
+        if not cacheable(params):
+            self._count("skipped")
+            return (await create(**params)).choices[0].message.content
+        messages = params.pop("messages")
+        keys = self.keys(["openai", scope], messages, **params)
+        cached = await asyncio.to_thread(self.get, keys)
+        if cached is not None:
+            return cached
+        content = (await create(messages=messages, **params)).choices[0].message.content
+        if content is not None and (validate is None or validate(content)):
+            await asyncio.to_thread(self.put, keys, content, ttl)
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        hits = stats["exact_hits"] + stats["normalized_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        return stats
+
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used beyond max_entries; call under _lock"""
+        expired = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM llm_cache WHERE exact_key IN ("
+            "SELECT exact_key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        self._stats["evictions"] += expired + overflow
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _langchain_cache_class():
+    # Importing LangChain takes seconds; only the agent needs this class,
+    # so servers and the Teams bot start without it
+    from langchain_core.caches import BaseCache
+    from langchain_core.load import dumps, loads
+
+    class LangChainLLMCache(BaseCache):
+        """LangChain cache backed by LLMCache, for one model instance's `cache=`.
+
+        LangChain passes the serialized prompt and a description of the model
+        and its parameters, so entries are only reused for identical model
+        settings; `scope` (tenant and user) keeps users apart. Generations
+        with tool calls are never stored.
+        """
+
+        def __init__(self, cache=None, scope=None):
+            self.cache = cache or get_llm_cache()
+            self.scope = scope
+
+        def lookup(self, prompt, llm_string):
+            cached = self.cache.get(self.cache.keys(["langchain", self.scope, llm_string], [prompt]))
+            if cached is None:
+                return None
+            try:
+                return [loads(generation) for generation in json.loads(cached)]
+            except Exception as e:
+                print(f"Error reading cached LLM response: {e}")
+                return None
+
+        def update(self, prompt, llm_string, return_val):
+            if any(_has_tool_calls(generation) for generation in return_val):
+                self.cache._count("skipped")
+                return
+            self.cache.put(self.cache.keys(["langchain", self.scope, llm_string], [prompt]),
+                           json.dumps([dumps(generation) for generation in return_val]))
+
+        def clear(self, **kwargs):
+            self.cache.clear()
+
+    return LangChainLLMCache
+
+
+def _has_tool_calls(generation):
+    message = getattr(generation, "message", None)
+    return message is not None and bool(message.additional_kwargs.get("tool_calls") or getattr(message, "tool_calls", None))
+
+
+def __getattr__(name):
+    """Build LangChainLLMCache on first access (PEP 562)"""
+    if name == "LangChainLLMCache":
+        globals()[name] = _langchain_cache_class()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLMCache, or None when LLM_CACHE_ENABLED is false"""
+    global _cache, _cache_pid
+    if not LLM_CACHE_ENABLED:
+        return None
+    pid = os.getpid()
+    if _cache is None or _cache_pid != pid:
+        with _cache_lock:
+            if _cache is None or _cache_pid != pid:
+                _cache = LLMCache()
+                _cache_pid = pid
+    return _cache
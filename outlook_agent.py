@@ -1,23 +1,238 @@
-from langchain.agents import Tool, AgentExecutor, create_openai_functions_agent
+from langchain.agents import Tool
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.tools import StructuredTool
+from langchain.tools.render import format_tool_to_openai_function
+from langchain.pydantic_v1 import BaseModel, Field
 from langchain_openai import AzureChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List
-import requests
+from typing import Annotated, TypedDict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import json
+import operator
 import os
+import queue
+import re
+import threading
+from urllib.parse import quote
+from conversation_memory import count_tokens, get_conversation_memory
 from datetime import datetime, timedelta
+from datetime_parser import parse_datetime, parse_duration
+from graph_batch import GraphBatch
+from graph_cache import GraphCacheError, get_graph_cache, user_key
+from graph_client import get_graph_client
+from intent_router import get_intent_router
+from llm_cache import LangChainLLMCache, get_llm_cache
+from task_client import TaskServiceError, get_task_client
+from tracing import start_span
 
 # Configuration
 AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY")
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 GRAPH_ACCESS_TOKEN = os.getenv("GRAPH_ACCESS_TOKEN")
+# How far back the cached inbox view reaches
+EMAIL_WINDOW_DAYS = int(os.getenv("EMAIL_WINDOW_DAYS", "7"))
+# Emails read_emails returns
+EMAILS_SHOWN = 5
+# Most tasks complete_tasks will close from one search (the API page cap)
+TASKS_MATCH_LIMIT = int(os.getenv("TASKS_MATCH_LIMIT", "500"))
+# LLM turns per request before the agent gives up
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "6"))
+# Tool calls from one LLM turn run at once on this many threads per agent
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+
+SUMMARY_PROMPT = """Update the summary of a conversation between a user and their Outlook assistant.
+Keep names, email addresses, dates, meeting subjects, task ids and anything still pending.
+Answer with the summary only, in under {words} words.
+
+Summary so far:
+{summary}
+
+New messages:
+{transcript}"""
 
 class AgentState(TypedDict):
-    messages: List[dict]
+    # Chat history, the user's message, then model replies and tool results
+    messages: Annotated[List[BaseMessage], operator.add]
     user_input: str
+    intents: Optional[List[str]]
+    steps: int
+    streaming: bool
     result: str
 
+class MeetingInput(BaseModel):
+    subject: str = Field(default="Meeting", description="Meeting title")
+    participants: List[str] = Field(default_factory=list, description="Attendee email addresses")
+    datetime: str = Field(default="", description="Start time as ISO 8601 or a phrase like 'tomorrow at 2 PM'")
+    duration: int = Field(default=60, description="Length in minutes")
+
+class BulkMeetingInput(BaseModel):
+    meetings: List[MeetingInput] = Field(description="Meetings to create")
+
+class BulkDeleteInput(BaseModel):
+    subjects: List[str] = Field(default_factory=list, description="Delete meetings whose subject contains any of these")
+    attendee: str = Field(default="", description="Only meetings with this attendee (email or name)")
+    start: str = Field(default="", description="Start of the search window, e.g. 'today' or 'next Monday'")
+    end: str = Field(default="", description="End of the search window; defaults to 7 days after start")
+
+class TaskInput(BaseModel):
+    title: str = Field(description="Task title")
+    description: str = Field(default="", description="Task details")
+    due_date: str = Field(default="", description="Due date as ISO 8601 or a phrase like 'next Friday 5 PM'")
+    assignee: str = Field(default="", description="Assignee email address")
+
+class BulkTaskInput(BaseModel):
+    tasks: List[TaskInput] = Field(description="Tasks to create")
+
+class TaskListInput(BaseModel):
+    completed: Optional[bool] = Field(default=None, description="True for done tasks, False for open tasks, omit for all")
+    assignee: str = Field(default="", description="Only tasks assigned to this email")
+    limit: int = Field(default=20, description="Maximum number of tasks to return")
+
+class TaskSearchInput(BaseModel):
+    query: str = Field(description="Words to look for in task titles and descriptions")
+    include_completed: bool = Field(default=False, description="Also return tasks that are already done")
+    limit: int = Field(default=10, description="Maximum number of tasks to return")
+
+class CompleteTasksInput(BaseModel):
+    task_ids: List[int] = Field(default_factory=list, description="Ids of the tasks to mark done")
+    query: str = Field(default="", description="Instead of ids, mark done every open task matching this search")
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+SUBJECT_PATTERN = re.compile(r"[\"'](.+?)[\"']|\b(?:about|titled|called|regarding|re:)\s+(.+?)(?=\s+(?:with|on|at|tomorrow|today|next|for \d)\b|$)", re.IGNORECASE)
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """Forward LLM tokens and tool activity of one run to a queue as events"""
+
+    def __init__(self, events):
+        self.events = events
+        self._tools = {}
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.events.put({"type": "status", "content": "Thinking..."})
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.events.put({"type": "status", "content": "Thinking..."})
+
+    def on_llm_new_token(self, token, **kwargs):
+        # Function-call chunks carry no content
+        if token:
+            self.events.put({"type": "token", "content": token})
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        name = serialized.get("name", "tool")
+        self._tools[run_id] = name
+        self.events.put({"type": "tool_start", "tool": name, "input": input_str})
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        self.events.put({"type": "tool_end", "tool": self._tools.pop(run_id, "tool"), "output": str(output)})
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        self.events.put({"type": "tool_end", "tool": self._tools.pop(run_id, "tool"), "output": f"❌ Error: {error}"})
+
+def _estimate_tokens(text):
+    """count_tokens() for span attributes, falling back to a length estimate"""
+    try:
+        return count_tokens(text)
+    except Exception:
+        return len(text) // 4 + 1
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Trace every LLM and tool call of one run as a child span of the run's span.
+
+    Tool spans are made current in the thread running the tool, so Graph
+    requests it sends nest under it. Streaming calls report no token
+    usage; then counts are estimated from the text.
+    """
+
+    run_inline = True
+
+    def __init__(self, parent):
+        self.parent = parent
+        self._spans = {}
+
+    def on_chat_model_start(self, serialized, messages, run_id=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        prompt = "\n".join(str(message.content) for batch in messages for message in batch)
+        span = start_span("llm.chat", parent=self.parent, **{
+            "gen_ai.system": "az.ai.openai",
+            "gen_ai.request.model": params.get("deployment_name") or params.get("model") or params.get("model_name"),
+            "gen_ai.prompt.size": len(prompt)
+        })
+        self._spans[run_id] = (span, prompt)
+
+    def on_llm_end(self, response, run_id=None, **kwargs):
+        span, prompt = self._spans.pop(run_id, (None, ""))
+        if span is None or not span.recording:
+            return
+        # Tracing must never fail the agent turn, and the span always ends
+        try:
+            generations = [generation for batch in response.generations for generation in batch]
+            completion = "".join(generation.text for generation in generations)
+            for generation in generations:
+                # Tool calls count towards the completion, as the API bills them
+                calls = generation.message.additional_kwargs.get("tool_calls") if hasattr(generation, "message") else None
+                if calls:
+                    completion += json.dumps(calls)
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            if usage:
+                span.set(**{"gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+                            "gen_ai.usage.output_tokens": usage.get("completion_tokens")})
+            else:
+                span.set(**{"gen_ai.usage.input_tokens": _estimate_tokens(prompt),
+                            "gen_ai.usage.output_tokens": _estimate_tokens(completion), "gen_ai.usage.estimated": True})
+            span.set(**{"gen_ai.completion.size": len(completion)})
+        except Exception as e:
+            print(f"Could not record LLM usage on the trace: {e}")
+        finally:
+            span.end()
+
+    def on_llm_error(self, error, run_id=None, **kwargs):
+        span, _ = self._spans.pop(run_id, (None, ""))
+        if span is not None:
+            span.end(error)
+
+    def on_tool_start(self, serialized, input_str, run_id=None, **kwargs):
+        name = serialized.get("name", "tool")
+        span = start_span(f"tool.{name}", parent=self.parent, **{"gen_ai.tool.name": name, "tool.input.size": len(input_str or "")})
+        self._spans[run_id] = (span.__enter__(), None)
+
+    def on_tool_end(self, output, run_id=None, **kwargs):
+        span, _ = self._spans.pop(run_id, (None, None))
+        if span is None:
+            return
+        output = str(output)
+        span.set(**{"tool.output.size": len(output)})
+        # Tools report failures in their answer rather than raising
+        if output.startswith("❌"):
+            span.fail(output[:200])
+        span.__exit__(None, None, None)
+
+    def on_tool_error(self, error, run_id=None, **kwargs):
+        span, _ = self._spans.pop(run_id, (None, None))
+        if span is not None:
+            span.__exit__(type(error), error, None)
+
+def _odata_string(value):
+    """An OData string literal for a query URL: ' doubled, then URL-encoded"""
+    return "'" + quote(value.replace("'", "''"), safe="") + "'"
+
+def _merge_chunks(chunks) -> AIMessage:
+    """Assemble streamed chunks into one message, joining tool call deltas by index"""
+    content = ""
+    calls = {}
+    for chunk in chunks:
+        content += chunk.content or ""
+        for delta in chunk.additional_kwargs.get("tool_calls") or []:
+            call = calls.setdefault(delta.get("index", len(calls)), {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+            call["id"] = delta.get("id") or call["id"]
+            function = delta.get("function") or {}
+            call["function"]["name"] += function.get("name") or ""
+            call["function"]["arguments"] += function.get("arguments") or ""
+    additional_kwargs = {"tool_calls": [calls[index] for index in sorted(calls)]} if calls else {}
+    return AIMessage(content=content, additional_kwargs=additional_kwargs)
+
 class OutlookAgent:
     def __init__(self):
         self.llm = AzureChatOpenAI(
@@ -25,14 +240,37 @@ class OutlookAgent:
             api_key=AZURE_OPENAI_KEY,
             api_version="2024-02-01",
             deployment_name="gpt-4",
-            temperature=0.1
+            temperature=0.1,
+            # Tokens reach stream() callbacks as they arrive; invoke() still returns whole messages
+            streaming=True,
+            # The tool-calling agent always asks the model
+            cache=False
+        )
+        # Summaries are deterministic and call no tools, so only they may come
+        # from the LLM cache (when enabled), kept apart per mailbox
+        llm_cache = get_llm_cache()
+        self.summary_llm = AzureChatOpenAI(
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            api_key=AZURE_OPENAI_KEY,
+            api_version="2024-02-01",
+            deployment_name="gpt-4",
+            temperature=0,
+            cache=LangChainLLMCache(llm_cache, scope=user_key(GRAPH_ACCESS_TOKEN)) if llm_cache is not None else False
         )
         
+        # Shared pooled Graph session for all tools
+        self.graph = get_graph_client()
+        # Mail/calendar reads are cached and kept fresh with delta queries
+        self.cache = get_graph_cache()
+        # Task manager API (backend-flask)
+        self.tasks = get_task_client()
+        
         self.tools = [
-            Tool(
+            StructuredTool.from_function(
                 name="create_meeting",
-                description="Create a calendar meeting. Input: JSON with subject, participants, datetime, duration",
-                func=self.create_meeting
+                description="Create a calendar meeting with a subject, participant emails, start time and duration in minutes",
+                func=lambda **fields: self.create_meeting(fields),
+                args_schema=MeetingInput
             ),
             Tool(
                 name="read_emails",
@@ -48,124 +286,300 @@ class OutlookAgent:
                 name="delete_meeting",
                 description="Delete a meeting by subject. Input: meeting subject",
                 func=self.delete_meeting
+            ),
+            StructuredTool.from_function(
+                name="create_meetings",
+                description="Create several calendar meetings in one call",
+                func=lambda meetings: self.create_meetings(meetings),
+                args_schema=BulkMeetingInput
+            ),
+            StructuredTool.from_function(
+                name="delete_meetings",
+                description="Delete every meeting in a time window matching subjects and/or an attendee, e.g. all meetings with Sarah this week",
+                func=lambda **criteria: self.delete_meetings(**criteria),
+                args_schema=BulkDeleteInput
+            ),
+            StructuredTool.from_function(
+                name="list_tasks",
+                description="List tasks from the task manager, optionally only open or done ones, or one assignee's",
+                func=lambda **filters: self.list_tasks(**filters),
+                args_schema=TaskListInput
+            ),
+            StructuredTool.from_function(
+                name="search_tasks",
+                description="Find tasks by words in their title or description, e.g. 'Q3 report'",
+                func=lambda **criteria: self.search_tasks(**criteria),
+                args_schema=TaskSearchInput
+            ),
+            StructuredTool.from_function(
+                name="create_task",
+                description="Create a task with a title, optional description, due date and assignee",
+                func=lambda **fields: self.create_tasks([fields]),
+                args_schema=TaskInput
+            ),
+            StructuredTool.from_function(
+                name="create_tasks",
+                description="Create several tasks in one call",
+                func=lambda tasks: self.create_tasks(tasks),
+                args_schema=BulkTaskInput
+            ),
+            StructuredTool.from_function(
+                name="complete_tasks",
+                description="Mark one or many tasks done in a single call, by ids or by a search query",
+                func=lambda **selection: self.complete_tasks(**selection),
+                args_schema=CompleteTasksInput
             )
         ]
         
         self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an Outlook assistant. Help users manage their calendar and emails.
+            ("system", """You are an Outlook assistant. Help users manage their calendar, emails and tasks.
             
             Available tools:
             - create_meeting: Create calendar events
             - read_emails: View recent emails
             - read_calendar: View today's meetings
             - delete_meeting: Delete meetings
+            - create_meetings / delete_meetings: Create or delete many meetings at once
+            - list_tasks / search_tasks: View or find tasks in the task manager
+            - create_task / create_tasks: Add one or many tasks
+            - complete_tasks: Mark any number of tasks done in one call; never call it once per task
             
-            Always use tools to perform actions. Be helpful and concise."""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad")
+            Always use tools to perform actions. When a request needs several independent
+            tools, call them all in the same turn. Be helpful and concise."""),
+            MessagesPlaceholder(variable_name="messages")
+        ])
+        
+        # OpenAI tools (not functions) so one reply can ask for several tool calls
+        self.llm_with_tools = self.llm.bind(tools=[
+            {"type": "function", "function": format_tool_to_openai_function(tool)} for tool in self.tools
         ])
+        self.tool_executor = ThreadPoolExecutor(max_workers=AGENT_TOOL_CONCURRENCY, thread_name_prefix="tool")
         
-        self.agent = create_openai_functions_agent(self.llm, self.tools, self.prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+        # Obvious commands skip the LLM and go straight to their tool
+        self.router = get_intent_router()
+        # Per-session chat history, shared by every agent in the process
+        self.memory = get_conversation_memory()
         
         # Create LangGraph workflow
         self.workflow = self.create_workflow()
 
-    def create_meeting(self, input_str: str) -> str:
+    def _parse_meeting_text(self, text: str) -> dict:
+        """Extract meeting fields from free text without an LLM call"""
+        subject_match = SUBJECT_PATTERN.search(text)
+        subject = next((group for group in subject_match.groups() if group), None) if subject_match else None
+        return {
+            "subject": subject.strip() if subject else "Meeting",
+            "participants": [email.rstrip(".") for email in EMAIL_PATTERN.findall(text)],
+            "datetime": text,
+            "duration": parse_duration(text)
+        }
+
+    def _build_event(self, meeting) -> dict:
+        """Turn MeetingInput fields, a JSON string or free text into a Graph event"""
+        if hasattr(meeting, "dict"):
+            meeting_data = meeting.dict()
+        elif isinstance(meeting, dict):
+            meeting_data = dict(meeting)
+        elif meeting.strip().startswith('{'):
+            meeting_data = json.loads(meeting)
+        else:
+            meeting_data = self._parse_meeting_text(meeting)
+        
+        # Resolve phrases like "tomorrow at 2 PM" locally; default to tomorrow 2 PM
+        start = parse_datetime(meeting_data.get("datetime"))
+        if start is None:
+            tomorrow = datetime.now() + timedelta(days=1)
+            start = tomorrow.replace(hour=14, minute=0, second=0, microsecond=0)
+        duration = parse_duration(meeting_data.get("duration", 60))
+        
+        return {
+            "subject": meeting_data.get("subject") or "Meeting",
+            "start": {"dateTime": start.isoformat(), "timeZone": "UTC"},
+            "end": {"dateTime": (start + timedelta(minutes=duration)).isoformat(), "timeZone": "UTC"},
+            "attendees": [{"emailAddress": {"address": email}, "type": "required"} for email in meeting_data.get("participants", [])]
+        }
+
+    def create_meeting(self, meeting) -> str:
+        """Create an event from MeetingInput fields, a JSON string or free text"""
         try:
-            # Parse input or use LLM to extract details
-            if isinstance(input_str, str) and not input_str.startswith('{'):
-                # Use LLM to extract meeting details
-                extraction_prompt = f"""
-                Extract meeting details from: "{input_str}"
-                Return JSON: {{"subject": "...", "participants": ["email"], "datetime": "ISO format", "duration": 60}}
-                """
-                response = self.llm.invoke(extraction_prompt)
-                meeting_data = json.loads(response.content)
-            else:
-                meeting_data = json.loads(input_str)
-            
-            # Default datetime if not provided
-            if not meeting_data.get("datetime"):
-                tomorrow = datetime.now() + timedelta(days=1)
-                meeting_data["datetime"] = tomorrow.replace(hour=14, minute=0, second=0).isoformat()
-            
-            event = {
-                "subject": meeting_data.get("subject", "Meeting"),
-                "start": {"dateTime": meeting_data["datetime"], "timeZone": "UTC"},
-                "end": {"dateTime": (datetime.fromisoformat(meeting_data["datetime"]) + timedelta(minutes=meeting_data.get("duration", 60))).isoformat(), "timeZone": "UTC"},
-                "attendees": [{"emailAddress": {"address": email}, "type": "required"} for email in meeting_data.get("participants", [])]
-            }
-            
-            headers = {"Authorization": f"Bearer {GRAPH_ACCESS_TOKEN}", "Content-Type": "application/json"}
-            response = requests.post("https://graph.microsoft.com/v1.0/me/events", headers=headers, json=event)
+            event = self._build_event(meeting)
+            response = self.graph.post("/me/events", token=GRAPH_ACCESS_TOKEN, json=event)
             
             if response.status_code == 201:
-                return f"✅ Meeting created: {meeting_data.get('subject', 'Meeting')}"
+                self.cache.invalidate(f"{user_key(GRAPH_ACCESS_TOKEN)}:calendar")
+                return f"✅ Meeting created: {event['subject']}"
             else:
                 return f"❌ Failed to create meeting: {response.text}"
                 
         except Exception as e:
             return f"❌ Error: {str(e)}"
 
-    def read_emails(self, input_str: str = "") -> str:
+    def create_meetings(self, meetings) -> str:
+        """Create many meetings with $batch instead of one request each"""
         try:
-            headers = {"Authorization": f"Bearer {GRAPH_ACCESS_TOKEN}", "Content-Type": "application/json"}
-            response = requests.get("https://graph.microsoft.com/v1.0/me/messages?$top=5&$select=subject,from,isRead", headers=headers)
+            batch = GraphBatch(token=GRAPH_ACCESS_TOKEN, client=self.graph)
+            events = {}
+            for meeting in meetings:
+                event = self._build_event(meeting)
+                events[batch.post("/me/events", event)] = event
             
-            if response.status_code == 200:
-                emails = response.json().get("value", [])
-                if not emails:
-                    return "📧 No emails found"
-                
-                result = "📧 Recent Emails:\n"
-                for email in emails:
-                    status = "🔵" if not email.get("isRead") else "⚪"
-                    sender = email.get("from", {}).get("emailAddress", {}).get("name", "Unknown")
-                    subject = email.get("subject", "No subject")
-                    result += f"{status} {sender}: {subject}\n"
-                
-                return result
+            results = batch.execute()
+            self.cache.invalidate(f"{user_key(GRAPH_ACCESS_TOKEN)}:calendar")
+            
+            lines = []
+            for request_id, event in events.items():
+                status = results.get(request_id, {}).get("status")
+                if status == 201:
+                    lines.append(f"✅ Meeting created: {event['subject']}")
+                else:
+                    lines.append(f"❌ Failed to create meeting: {event['subject']} ({status})")
+            return "\n".join(lines) or "No meetings to create"
+        
+        except Exception as e:
+            return f"❌ Error: {str(e)}"
+
+    def delete_meetings(self, subjects=None, attendee="", start="", end="") -> str:
+        """Delete all meetings in a window matching any subject and/or an attendee.
+
+        Costs two $batch round-trips (search, then delete) regardless of how
+        many meetings match, plus one request per further page of a search.
+        """
+        try:
+            window_start = parse_datetime(start, default_hour=0) or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            window_end = parse_datetime(end, default_hour=0)
+            if window_end is None:
+                window_end = window_start + timedelta(days=7)
+            elif window_end.hour == 0 and window_end.minute == 0:
+                # A bare end date includes that whole day
+                window_end += timedelta(days=1)
+            calendar_view = (
+                f"/me/calendarView?startDateTime={window_start.isoformat()}&endDateTime={window_end.isoformat()}"
+                "&$select=id,subject,attendees&$top=100"
+            )
+            
+            # Round-trip 1: one search per subject, batched together
+            search = GraphBatch(token=GRAPH_ACCESS_TOKEN, client=self.graph)
+            if subjects:
+                search_ids = [
+                    search.get(f"{calendar_view}&$filter=contains(subject,{_odata_string(subject)})")
+                    for subject in subjects
+                ]
             else:
-                return f"❌ Failed to read emails: {response.text}"
+                search_ids = [search.get(calendar_view)]
+            search_results = search.execute()
+            
+            events = []
+            for search_id in search_ids:
+                result = search_results.get(search_id, {})
+                if result.get("status") != 200:
+                    return f"❌ Failed to search meetings: {result.get('body')}"
+                events.extend(result["body"].get("value", []))
+                # The batch returns the first page; follow the rest so no match is left behind
+                next_link = result["body"].get("@odata.nextLink")
+                while next_link:
+                    response = self.graph.get(next_link, token=GRAPH_ACCESS_TOKEN)
+                    if response.status_code != 200:
+                        return f"❌ Failed to search meetings: {response.text}"
+                    page = response.json()
+                    events.extend(page.get("value", []))
+                    next_link = page.get("@odata.nextLink")
+            
+            matches = {}
+            for event in events:
+                if attendee and not any(
+                    attendee.lower() in (a.get("emailAddress", {}).get("address", "") + " " + a.get("emailAddress", {}).get("name", "")).lower()
+                    for a in event.get("attendees", [])
+                ):
+                    continue
+                matches[event["id"]] = event.get("subject", "No subject")
+            
+            if not matches:
+                return "❌ No matching meetings found"
+            
+            # Round-trip 2: delete every match
+            deletes = GraphBatch(token=GRAPH_ACCESS_TOKEN, client=self.graph)
+            delete_ids = {deletes.delete(f"/me/events/{event_id}"): subject for event_id, subject in matches.items()}
+            delete_results = deletes.execute()
+            self.cache.invalidate(f"{user_key(GRAPH_ACCESS_TOKEN)}:calendar")
+            
+            lines = []
+            for request_id, subject in delete_ids.items():
+                status = delete_results.get(request_id, {}).get("status")
+                if status == 204:
+                    lines.append(f"✅ Meeting deleted: {subject}")
+                else:
+                    lines.append(f"❌ Failed to delete meeting: {subject} ({status})")
+            return "\n".join(lines)
+        
+        except Exception as e:
+            return f"❌ Error: {str(e)}"
+
+    def read_emails(self, input_str: str = "") -> str:
+        try:
+            since = (datetime.utcnow() - timedelta(days=EMAIL_WINDOW_DAYS)).strftime("%Y-%m-%dT00:00:00Z")
+            delta_url = (
+                "/me/mailFolders/inbox/messages/delta"
+                f"?$select=subject,from,isRead,receivedDateTime&$filter=receivedDateTime+ge+{since}"
+                "&$orderby=receivedDateTime+desc"
+            )
+            # A mailbox's first read fetches just the emails shown; the delta baseline is built in the background
+            seed_url = (
+                f"/me/mailFolders/inbox/messages?$top={EMAILS_SHOWN}&$select=subject,from,isRead,receivedDateTime"
+                "&$orderby=receivedDateTime+desc"
+            )
+            messages = self.cache.get(f"{user_key(GRAPH_ACCESS_TOKEN)}:inbox:{since[:10]}", delta_url, GRAPH_ACCESS_TOKEN,
+                                      seed_url=seed_url)
+            
+            emails = sorted(messages, key=lambda email: email.get("receivedDateTime", ""), reverse=True)[:EMAILS_SHOWN]
+            if not emails:
+                return "📧 No emails found"
+            
+            result = "📧 Recent Emails:\n"
+            for email in emails:
+                status = "🔵" if not email.get("isRead") else "⚪"
+                sender = email.get("from", {}).get("emailAddress", {}).get("name", "Unknown")
+                subject = email.get("subject", "No subject")
+                result += f"{status} {sender}: {subject}\n"
+            
+            return result
                 
+        except GraphCacheError as e:
+            return f"❌ Failed to read emails: {e}"
         except Exception as e:
             return f"❌ Error: {str(e)}"
 
     def read_calendar(self, input_str: str = "") -> str:
         try:
-            headers = {"Authorization": f"Bearer {GRAPH_ACCESS_TOKEN}", "Content-Type": "application/json"}
-            today = datetime.now().isoformat()
-            tomorrow = (datetime.now() + timedelta(days=1)).isoformat()
+            # The delta window is fixed per day so each day gets its own cache entry
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            tomorrow = today + timedelta(days=1)
+            delta_url = f"/me/calendarView/delta?startDateTime={today.isoformat()}&endDateTime={tomorrow.isoformat()}"
+            cache_key = f"{user_key(GRAPH_ACCESS_TOKEN)}:calendar:{today.date().isoformat()}"
             
-            response = requests.get(f"https://graph.microsoft.com/v1.0/me/calendarview?startDateTime={today}&endDateTime={tomorrow}", headers=headers)
+            events = self.cache.get(cache_key, delta_url, GRAPH_ACCESS_TOKEN)
+            events = sorted(events, key=lambda event: event.get("start", {}).get("dateTime", ""))
+            if not events:
+                return "📅 No meetings today"
             
-            if response.status_code == 200:
-                events = response.json().get("value", [])
-                if not events:
-                    return "📅 No meetings today"
-                
-                result = "📅 Today's Meetings:\n"
-                for event in events:
-                    subject = event.get("subject", "No subject")
-                    start_time = event.get("start", {}).get("dateTime", "")
-                    if start_time:
-                        time_obj = datetime.fromisoformat(start_time.replace('Z', ''))
-                        time_str = time_obj.strftime("%I:%M %p")
-                        result += f"🕐 {time_str}: {subject}\n"
-                
-                return result
-            else:
-                return f"❌ Failed to read calendar: {response.text}"
+            result = "📅 Today's Meetings:\n"
+            for event in events:
+                subject = event.get("subject", "No subject")
+                start_time = event.get("start", {}).get("dateTime", "")
+                if start_time:
+                    time_obj = datetime.fromisoformat(start_time.replace('Z', ''))
+                    time_str = time_obj.strftime("%I:%M %p")
+                    result += f"🕐 {time_str}: {subject}\n"
+            
+            return result
                 
+        except GraphCacheError as e:
+            return f"❌ Failed to read calendar: {e}"
         except Exception as e:
             return f"❌ Error: {str(e)}"
 
     def delete_meeting(self, subject: str) -> str:
         try:
-            headers = {"Authorization": f"Bearer {GRAPH_ACCESS_TOKEN}", "Content-Type": "application/json"}
-            response = requests.get(f"https://graph.microsoft.com/v1.0/me/events?$filter=contains(subject,'{subject}')", headers=headers)
+            response = self.graph.get(f"/me/events?$filter=contains(subject,{_odata_string(subject)})", token=GRAPH_ACCESS_TOKEN)
             
             if response.status_code == 200:
                 events = response.json().get("value", [])
@@ -173,9 +587,10 @@ class OutlookAgent:
                     return f"❌ No meeting found with subject: {subject}"
                 
                 event_id = events[0].get("id")
-                delete_response = requests.delete(f"https://graph.microsoft.com/v1.0/me/events/{event_id}", headers=headers)
+                delete_response = self.graph.delete(f"/me/events/{event_id}", token=GRAPH_ACCESS_TOKEN)
                 
                 if delete_response.status_code == 204:
+                    self.cache.invalidate(f"{user_key(GRAPH_ACCESS_TOKEN)}:calendar")
                     return f"✅ Meeting deleted: {events[0].get('subject')}"
                 else:
                     return f"❌ Failed to delete meeting: {delete_response.text}"
@@ -185,21 +600,207 @@ class OutlookAgent:
         except Exception as e:
             return f"❌ Error: {str(e)}"
 
+    def _format_tasks(self, title, tasks) -> str:
+        lines = [title]
+        for task in tasks:
+            status = "✅" if task["completed"] else "⬜"
+            details = ", ".join(part for part in (
+                f"due {task['due_date']}" if task.get("due_date") else "",
+                task.get("assignee") or ""
+            ) if part)
+            lines.append(f"{status} #{task['id']} {task['title']}" + (f" ({details})" if details else ""))
+        return "\n".join(lines)
+
+    def list_tasks(self, completed=None, assignee="", limit=20) -> str:
+        try:
+            tasks, next_after = self.tasks.list_tasks(completed=completed, assignee=assignee or None, limit=limit)
+            if not tasks:
+                return "📋 No tasks found"
+            result = self._format_tasks("📋 Tasks:", tasks)
+            if next_after:
+                result += "\n... more tasks available"
+            return result
+        except TaskServiceError as e:
+            return f"❌ Failed to list tasks: {e}"
+
+    def search_tasks(self, query, include_completed=False, limit=10) -> str:
+        try:
+            tasks = self.tasks.search_tasks(query, completed=None if include_completed else False, limit=limit)
+            if not tasks:
+                return f"🔍 No tasks matching: {query}"
+            return self._format_tasks(f"🔍 Tasks matching '{query}':", tasks)
+        except TaskServiceError as e:
+            return f"❌ Failed to search tasks: {e}"
+
+    def create_tasks(self, tasks) -> str:
+        """Create one or many tasks with a single request to the task service"""
+        try:
+            payload = []
+            for task in tasks:
+                fields = task.dict() if hasattr(task, "dict") else dict(task)
+                due = parse_datetime(fields.get("due_date"))
+                payload.append({
+                    "title": fields["title"],
+                    "description": fields.get("description") or None,
+                    "due_date": due.isoformat(timespec="seconds") if due else None,
+                    "assignee": fields.get("assignee") or None
+                })
+            created = self.tasks.create_tasks(payload)
+            return "\n".join(f"✅ Task created: #{task['id']} {task['title']}" for task in created) or "No tasks to create"
+        except TaskServiceError as e:
+            return f"❌ Failed to create tasks: {e}"
+
+    def complete_tasks(self, task_ids=None, query="") -> str:
+        """Mark tasks done by id, or every open task matching a search, in one batch"""
+        try:
+            task_ids = list(task_ids or [])
+            if query:
+                matches = self.tasks.search_tasks(query, completed=False, limit=TASKS_MATCH_LIMIT)
+                task_ids += [task["id"] for task in matches]
+            if not task_ids:
+                return "❌ No matching tasks to complete"
+            completed = self.tasks.complete_tasks(task_ids)
+            if not completed:
+                return "✅ Those tasks were already done"
+            return f"✅ Marked {len(completed)} task{'s' if len(completed) != 1 else ''} done: " + ", ".join(f"#{task_id}" for task_id in completed)
+        except TaskServiceError as e:
+            return f"❌ Failed to complete tasks: {e}"
+
     def create_workflow(self):
+        """route -> fast_path | agent <-> tools.
+
+        The agent node asks the LLM what to do; every tool call in its reply
+        runs at once in the tools node, and the results go back to the agent
+        in one turn. langgraph 0.0.26 cannot add branches per call at run
+        time, so the tools node fans out on a thread pool and merges the
+        results in call order.
+        """
         workflow = StateGraph(AgentState)
+        tools_by_name = {tool.name: tool for tool in self.tools}
         
-        def process_input(state: AgentState):
-            user_input = state["user_input"]
-            result = self.agent_executor.invoke({"input": user_input, "chat_history": []})
-            return {"result": result["output"]}
+        def classify_intent(state: AgentState):
+            return {"intents": self.router.classify_all(state["user_input"])}
         
-        workflow.add_node("process", process_input)
-        workflow.set_entry_point("process")
-        workflow.add_edge("process", END)
+        # Nodes take the run config so per-call callbacks (stream()) reach the tools and LLM
+        def run_tools_directly(state: AgentState, config):
+            tools = [tools_by_name[intent] for intent in state["intents"]]
+            results = self.tool_executor.map(lambda tool: tool.invoke("", config=config), tools)
+            return {"result": "\n".join(results)}
+        
+        def call_model(state: AgentState, config):
+            messages = self.prompt.format_messages(messages=state["messages"])
+            if state["streaming"]:
+                # Tokens reach the callbacks as they arrive; tool call deltas are joined here
+                message = _merge_chunks(self.llm_with_tools.stream(messages, config=config))
+            else:
+                message = self.llm_with_tools.invoke(messages, config=config)
+            steps = state["steps"] + 1
+            result = message.content or ""
+            if message.additional_kwargs.get("tool_calls") and steps >= AGENT_MAX_STEPS:
+                result = f"❌ Error: Stopped after {steps} steps without an answer"
+            return {"messages": [message], "steps": steps, "result": result}
+        
+        def run_tool_calls(state: AgentState, config):
+            def run_call(call):
+                name = call["function"]["name"]
+                try:
+                    if name not in tools_by_name:
+                        raise ValueError(f"Unknown tool {name}")
+                    arguments = json.loads(call["function"].get("arguments") or "{}")
+                    output = tools_by_name[name].invoke(arguments, config=config)
+                except Exception as e:
+                    output = f"❌ Error: {str(e)}"
+                return ToolMessage(content=str(output), tool_call_id=call["id"])
+            
+            calls = state["messages"][-1].additional_kwargs["tool_calls"]
+            return {"messages": list(self.tool_executor.map(run_call, calls))}
+        
+        def next_step(state: AgentState):
+            if state["messages"][-1].additional_kwargs.get("tool_calls") and state["steps"] < AGENT_MAX_STEPS:
+                return "tools"
+            return "end"
+        
+        workflow.add_node("route", classify_intent)
+        workflow.add_node("fast_path", run_tools_directly)
+        workflow.add_node("agent", call_model)
+        workflow.add_node("tools", run_tool_calls)
+        workflow.set_entry_point("route")
+        workflow.add_conditional_edges(
+            "route",
+            lambda state: "fast_path" if state.get("intents") else "agent",
+            {"fast_path": "fast_path", "agent": "agent"}
+        )
+        workflow.add_conditional_edges("agent", next_step, {"tools": "tools", "end": END})
+        workflow.add_edge("tools", "agent")
+        workflow.add_edge("fast_path", END)
         
         return workflow.compile()
 
-    def run(self, user_input: str) -> str:
-        state = {"user_input": user_input, "messages": [], "result": ""}
-        result = self.workflow.invoke(state)
-        return result["result"]
\ No newline at end of file
+    def _summarize(self, summary, messages) -> str:
+        """Fold older messages into the rolling summary kept by conversation memory"""
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = SUMMARY_PROMPT.format(words=self.memory.summary_tokens * 3 // 4, summary=summary or "(none)", transcript=transcript)
+        with start_span("memory.summarize", **{"memory.messages": len(messages)}) as span:
+            return self.summary_llm.invoke(prompt, config={"callbacks": [TracingCallbackHandler(span)]}).content.strip()
+
+    def _initial_state(self, user_input, session_id=None, streaming=False) -> AgentState:
+        """Workflow state with the session's summary and recent messages before the user's message"""
+        messages = []
+        if session_id:
+            summary, recent = self.memory.history(session_id)
+            if summary:
+                messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+            for message in recent:
+                message_class = HumanMessage if message["role"] == "user" else AIMessage
+                messages.append(message_class(content=message["content"]))
+        messages.append(HumanMessage(content=user_input))
+        return {"user_input": user_input, "messages": messages, "intents": None, "steps": 0, "streaming": streaming, "result": ""}
+
+    def _remember(self, session_id, user_input, answer):
+        if session_id:
+            self.memory.save(session_id, user_input, answer, summarize=self._summarize)
+
+    def _finish_span(self, span, result):
+        span.set(**{"agent.steps": result["steps"], "agent.fast_path": bool(result["intents"]), "agent.output.size": len(result["result"])})
+        if result["result"].startswith("❌"):
+            span.fail(result["result"][:200])
+
+    def run(self, user_input: str, session_id: Optional[str] = None) -> str:
+        """Answer a message; with a session_id, earlier turns of that session are remembered"""
+        with start_span("agent.run", **{"session.id": session_id, "agent.input.size": len(user_input)}) as span:
+            state = self._initial_state(user_input, session_id)
+            result = self.workflow.invoke(state, config={"callbacks": [TracingCallbackHandler(span)]})
+            self._finish_span(span, result)
+            self._remember(session_id, user_input, result["result"])
+            return result["result"]
+
+    def stream(self, user_input: str, session_id: Optional[str] = None):
+        """Run like run(), yielding progress events as they happen.
+
+        Events are dicts with a "type" of "status", "tool_start", "tool_end",
+        "token" (a piece of the answer), and finally "final" with the whole
+        answer or "error".
+        """
+        events = queue.Queue()
+        span = start_span("agent.stream", **{"session.id": session_id, "agent.input.size": len(user_input)})
+        
+        def worker():
+            try:
+                with span:
+                    state = self._initial_state(user_input, session_id, streaming=True)
+                    callbacks = [StreamingCallbackHandler(events), TracingCallbackHandler(span)]
+                    result = self.workflow.invoke(state, config={"callbacks": callbacks})
+                    self._finish_span(span, result)
+                    self._remember(session_id, user_input, result["result"])
+                events.put({"type": "final", "content": result["result"]})
+            except Exception as e:
+                events.put({"type": "error", "content": f"❌ Error: {str(e)}"})
+            finally:
+                events.put(None)
+        
+        threading.Thread(target=worker, name="agent-stream", daemon=True).start()
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
\ No newline at end of file
@@ -0,0 +1,157 @@
+import asyncio
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Time zone interviews are scheduled in (an IANA name Graph also accepts);
+# free/busy, slot search and the created events all use it
+INTERVIEW_TIME_ZONE = os.getenv("INTERVIEW_TIME_ZONE", "UTC")
+# Hours of the day interviews may be placed in, in INTERVIEW_TIME_ZONE
+INTERVIEW_DAY_START = int(os.getenv("INTERVIEW_DAY_START", "18"))
+INTERVIEW_DAY_END = int(os.getenv("INTERVIEW_DAY_END", "21"))
+# Candidate start times are aligned to this many minutes
+SLOT_STEP_MINUTES = int(os.getenv("SLOT_STEP_MINUTES", "30"))
+# How far ahead to look for free slots
+SLOT_SEARCH_DAYS = int(os.getenv("SLOT_SEARCH_DAYS", "14"))
+
+# getSchedule accepts a limited number of addresses per call
+GET_SCHEDULE_LIMIT = 20
+BUSY_STATUSES = {"busy", "oof", "tentative"}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(moment):
+    return (moment - _EPOCH).total_seconds()
+
+
+def _datetime(seconds):
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+class BusyIndex:
+    """Union of busy intervals across many calendars.
+
+    Intervals are merged once into two sorted arrays (starts and ends), so
+    checking a candidate slot is a single bisect no matter how many
+    calendars contributed to the index.
+    """
+
+    def __init__(self, intervals=()):
+        merged = []
+        for start, end in sorted((_seconds(s), _seconds(e)) for s, e in intervals if e > s):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def _conflict(self, start, end):
+        """End of the busy interval overlapping [start, end), or None"""
+        index = bisect_right(self._ends, start)
+        if index < len(self._starts) and self._starts[index] < end:
+            return self._ends[index]
+        return None
+
+    def is_free(self, start, end):
+        return self._conflict(_seconds(start), _seconds(end)) is None
+
+    def add(self, start, end):
+        """Mark [start, end) busy, merging with neighbouring intervals"""
+        start, end = _seconds(start), _seconds(end)
+        lo = bisect_right(self._ends, start)
+        if lo > 0 and self._ends[lo - 1] == start:
+            lo -= 1
+        hi = lo
+        while hi < len(self._starts) and self._starts[hi] <= end:
+            hi += 1
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def next_free_slots(self, after, duration=timedelta(minutes=60), count=1,
+                        day_start=INTERVIEW_DAY_START, day_end=INTERVIEW_DAY_END,
+                        step=timedelta(minutes=SLOT_STEP_MINUTES), horizon=timedelta(days=SLOT_SEARCH_DAYS)):
+        """Return up to `count` non-overlapping free slot start times after `after`"""
+        length = duration.total_seconds()
+        step_s = step.total_seconds()
+        limit = _seconds(after + horizon)
+        t = _seconds(after)
+        slots = []
+
+        while len(slots) < count and t < limit:
+            # Align to the step grid
+            t = -(-t // step_s) * step_s
+            moment = _datetime(t)
+            window_start = moment.replace(hour=day_start, minute=0, second=0, microsecond=0)
+            window_end = moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=day_end)
+            if moment < window_start:
+                t = _seconds(window_start)
+                continue
+            if moment + duration > window_end:
+                t = _seconds(window_start + timedelta(days=1))
+                continue
+
+            busy_until = self._conflict(t, t + length)
+            if busy_until is not None:
+                t = busy_until
+                continue
+
+            slots.append(moment)
+            t += length
+        return slots
+
+
+def interview_now():
+    """The current time in INTERVIEW_TIME_ZONE, naive like the slots"""
+    return datetime.now(ZoneInfo(INTERVIEW_TIME_ZONE)).replace(tzinfo=None)
+
+
+def _parse_graph_time(value):
+    return datetime.fromisoformat(value.replace("Z", ""))
+
+
+def build_busy_index(schedule_response):
+    """Build a BusyIndex from a getSchedule response body"""
+    intervals = []
+    for schedule in schedule_response.get("value", []):
+        for item in schedule.get("scheduleItems", []):
+            if item.get("status", "busy") in BUSY_STATUSES:
+                intervals.append((
+                    _parse_graph_time(item["start"]["dateTime"]),
+                    _parse_graph_time(item["end"]["dateTime"])
+                ))
+    return BusyIndex(intervals)
+
+
+async def fetch_busy_index(graph, headers, schedules, start, end, time_zone=INTERVIEW_TIME_ZONE):
+    """Fetch free/busy for every address with getSchedule and index it.
+
+    start and end are naive times in time_zone, and the busy intervals come
+    back in it too. Addresses are sent GET_SCHEDULE_LIMIT at a time; all
+    chunks run concurrently. Raises RuntimeError if Graph rejects a request.
+    """
+    # Without this header scheduleItems come back in UTC
+    headers = {**headers, "Prefer": f'outlook.timezone="{time_zone}"'}
+
+    async def fetch(chunk):
+        response = await graph.post("/me/calendar/getSchedule", headers=headers, json={
+            "schedules": chunk,
+            "startTime": {"dateTime": start.isoformat(), "timeZone": time_zone},
+            "endTime": {"dateTime": end.isoformat(), "timeZone": time_zone},
+            "availabilityViewInterval": SLOT_STEP_MINUTES
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f"getSchedule failed: {response.text}")
+        return response.json().get("value", [])
+
+    chunks = [schedules[i:i + GET_SCHEDULE_LIMIT] for i in range(0, len(schedules), GET_SCHEDULE_LIMIT)]
+    results = await asyncio.gather(*(fetch(chunk) for chunk in chunks))
+    return build_busy_index({"value": [schedule for result in results for schedule in result]})
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-from outlook_agent import OutlookAgent
+import uuid
+from tracing import start_span
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,11 +14,28 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize agent
-@st.cache_resource
+# Initialize agent; LangChain is imported here, so the page renders before it loads
+@st.cache_resource(show_spinner="Loading the assistant...")
 def get_agent():
+    from outlook_agent import OutlookAgent
     return OutlookAgent()
 
+def stream_response(agent, prompt, status):
+    """Yield answer text for st.write_stream; show tool activity in `status`"""
+    streamed = False
+    for event in agent.stream(prompt, st.session_state.session_id):
+        if event["type"] == "token":
+            streamed = True
+            yield event["content"]
+        elif event["type"] == "status":
+            status.update(label=event["content"])
+        elif event["type"] == "tool_start":
+            status.update(label=f"🔧 Running {event['tool']}...")
+            status.write(f"🔧 {event['tool']}")
+        elif event["type"] in ("final", "error") and not streamed:
+            # Fast-path commands and errors arrive whole rather than as tokens
+            yield event["content"]
+
 def main():
     st.title("📧 Outlook AI Assistant")
     st.markdown("Manage your calendar and emails with natural language commands")
@@ -51,9 +69,11 @@ def main():
     with col1:
         st.header("💬 Chat with Assistant")
         
-        # Initialize chat history
+        # Initialize chat history; the agent remembers it under session_id
         if "messages" not in st.session_state:
             st.session_state.messages = []
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         
         # Display chat messages
         for message in st.session_state.messages:
@@ -67,20 +87,21 @@ def main():
             with st.chat_message("user"):
                 st.markdown(prompt)
             
-            # Get agent response
+            # Stream the agent response as it is produced
             with st.chat_message("assistant"):
-                with st.spinner("Processing your request..."):
-                    try:
-                        agent = get_agent()
-                        response = agent.run(prompt)
-                        st.markdown(response)
-                        
-                        # Add assistant response to chat history
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    except Exception as e:
-                        error_msg = f"❌ Error: {str(e)}"
-                        st.error(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                status = st.status("Processing your request...")
+                try:
+                    agent = get_agent()
+                    response = st.write_stream(stream_response(agent, prompt, status))
+                    status.update(label="Done", state="complete")
+                    
+                    # Add assistant response to chat history
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                except Exception as e:
+                    error_msg = f"❌ Error: {str(e)}"
+                    status.update(label="Failed", state="error")
+                    st.error(error_msg)
+                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
     
     with col2:
         st.header("🚀 Quick Actions")
@@ -90,6 +111,7 @@ def main():
             try:
                 agent = get_agent()
                 result = agent.read_emails("")
+                agent.memory.save(st.session_state.session_id, "Check my emails", result)
                 st.session_state.messages.append({"role": "user", "content": "Check my emails"})
                 st.session_state.messages.append({"role": "assistant", "content": result})
                 st.rerun()
@@ -100,6 +122,7 @@ def main():
             try:
                 agent = get_agent()
                 result = agent.read_calendar("")
+                agent.memory.save(st.session_state.session_id, "Show my calendar", result)
                 st.session_state.messages.append({"role": "user", "content": "Show my calendar"})
                 st.session_state.messages.append({"role": "assistant", "content": result})
                 st.rerun()
@@ -130,7 +153,8 @@ def main():
                         }
                         
                         agent = get_agent()
-                        result = agent.create_meeting(str(meeting_data))
+                        result = agent.create_meeting(meeting_data)
+                        agent.memory.save(st.session_state.session_id, f"Create meeting: {subject}", result)
                         
                         st.session_state.messages.append({"role": "user", "content": f"Create meeting: {subject}"})
                         st.session_state.messages.append({"role": "assistant", "content": result})
@@ -142,7 +166,9 @@ def main():
         
         # Clear chat button
         if st.button("🗑️ Clear Chat", use_container_width=True):
+            get_agent().memory.clear(st.session_state.session_id)
             st.session_state.messages = []
+            st.session_state.session_id = uuid.uuid4().hex
             st.rerun()
 
     # Footer
@@ -150,4 +176,6 @@ def main():
     st.markdown("Built with LangChain, LangGraph & Streamlit | Powered by Azure OpenAI & Microsoft Graph")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Streamlit reruns the whole script on every interaction
+    with start_span("streamlit.rerun"):
+        main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuration
+TASKS_API_URL = os.getenv("TASKS_API_URL", "http://localhost:5001")
+TASKS_API_TIMEOUT = float(os.getenv("TASKS_API_TIMEOUT", "10"))
+TASKS_POOL_MAXSIZE = int(os.getenv("TASKS_POOL_MAXSIZE", "10"))
+
+
+class TaskServiceError(Exception):
+    """The task service rejected a request or could not be reached"""
+
+
+class TaskClient:
+    """Pooled HTTP client for the backend-flask task API.
+
+    Bulk operations map to the API's batch endpoints, so marking fifty
+    tasks done is one request (and one SQL statement), not fifty.
+    """
+
+    def __init__(self, base_url=TASKS_API_URL, timeout=TASKS_API_TIMEOUT, pool_maxsize=TASKS_POOL_MAXSIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.RequestException as e:
+            raise TaskServiceError(f"Task service unavailable: {e}") from e
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise TaskServiceError(message)
+        return response.json() if response.content else None
+
+    def list_tasks(self, completed=None, assignee=None, after=0, limit=50):
+        """Return (tasks, next_after)"""
+        params = {"after": after, "limit": limit}
+        if completed is not None:
+            params["completed"] = "true" if completed else "false"
+        if assignee:
+            params["assignee"] = assignee
+        data = self._request("GET", "/tasks", params=params)
+        return data["tasks"], data["next_after"]
+
+    def search_tasks(self, query, completed=None, limit=20):
+        params = {"q": query, "limit": limit}
+        if completed is not None:
+            params["completed"] = "true" if completed else "false"
+        return self._request("GET", "/tasks/search", params=params)["tasks"]
+
+    def create_task(self, task):
+        return self._request("POST", "/tasks", json=task)
+
+    def create_tasks(self, tasks):
+        return self._request("POST", "/tasks/bulk", json={"tasks": tasks})["tasks"]
+
+    def complete_tasks(self, task_ids):
+        """Mark tasks done; returns the ids that were still open"""
+        return self._request("POST", "/tasks/complete", json={"ids": list(task_ids)})["completed"]
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_task_client():
+    """Return the process-wide TaskClient, creating it on first use"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = TaskClient()
+                _client_pid = pid
+    return _client
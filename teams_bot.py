@@ -1,25 +1,105 @@
 from botbuilder.core import ActivityHandler, TurnContext, MessageFactory
 from botbuilder.schema import ChannelAccount, Activity, ActivityTypes
-from datetime import datetime, timedelta
+from datetime import timedelta
+import asyncio
+import contextvars
+import csv
+import io
 import json
 import os
-import requests
-from openai import AzureOpenAI
+import re
+from openai import AsyncAzureOpenAI
 from auth_helper import GraphAuthHelper
+from graph_client import get_async_graph_client
+from llm_cache import get_llm_cache
+from slot_finder import INTERVIEW_DAY_START, INTERVIEW_TIME_ZONE, SLOT_SEARCH_DAYS, fetch_busy_index, interview_now
+from tracing import start_span
+
+# Per-call and per-turn time budgets (seconds)
+BOT_LLM_TIMEOUT = float(os.getenv("BOT_LLM_TIMEOUT", "30"))
+BOT_GRAPH_TIMEOUT = float(os.getenv("BOT_GRAPH_TIMEOUT", "20"))
+BOT_TURN_TIMEOUT = float(os.getenv("BOT_TURN_TIMEOUT", "60"))
+BOT_BULK_TURN_TIMEOUT = float(os.getenv("BOT_BULK_TURN_TIMEOUT", "300"))
+
+# Bulk scheduling: calendar events created at once, interviews per evening
+BULK_SCHEDULING_CONCURRENCY = int(os.getenv("BULK_SCHEDULING_CONCURRENCY", "5"))
+BULK_INTERVIEWS_PER_EVENING = int(os.getenv("BULK_INTERVIEWS_PER_EVENING", "3"))
+
+# Attendees whose calendars must be free for an interview
+HR_EMAIL = os.getenv("HR_EMAIL", "hr@company.com")
+INTERVIEWER_EMAIL = os.getenv("INTERVIEWER_EMAIL")
+
+# A bulk entry is a bulleted/numbered line or a comma-separated row
+ENTRY_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+# Tenant and user of the turn being handled; LLM cache entries are kept per user
+_cache_scope = contextvars.ContextVar("cache_scope", default=None)
+
+def _user_scope(activity):
+    conversation = activity.conversation
+    user = activity.from_property
+    tenant = getattr(conversation, "tenant_id", None) if conversation else None
+    user_id = (getattr(user, "aad_object_id", None) or user.id) if user else None
+    return f"{tenant or 'default'}:{user_id or 'anonymous'}"
+
+def _is_json(content):
+    """Only cache extraction replies that parse"""
+    try:
+        json.loads(content)
+        return True
+    except ValueError:
+        return False
+
+def _is_json_array(content):
+    content = content.strip().strip("`")
+    return "[" in content and _is_json(content[content.index("["):])
 
 class TeamsInterviewBot(ActivityHandler):
     def __init__(self):
         # Azure OpenAI configuration
-        self.azure_openai_client = AzureOpenAI(
+        self.azure_openai_client = AsyncAzureOpenAI(
             api_key=os.getenv("AZURE_OPENAI_KEY"),
             api_version="2024-02-01",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            timeout=BOT_LLM_TIMEOUT
         )
+        # Repeated prompts are answered from disk instead of GPT-4
+        self.llm_cache = get_llm_cache()
         
         # Graph API authentication
         self.auth_helper = GraphAuthHelper()
+        self.graph = get_async_graph_client()
+        # Fetched by warm_up() or the first message, not here, so building
+        # the bot never blocks server startup on Azure AD
         self.graph_token = None
-        self._refresh_token()
+    
+    async def warm_up(self):
+        """Fetch the Graph token ahead of the first message without blocking the event loop"""
+        self.graph_token = self.auth_helper.get_cached_token()
+        if not self.graph_token:
+            await asyncio.to_thread(self._refresh_token)
+    
+    async def _complete(self, validate=None, **params):
+        """Return the reply text of a chat completion, through the LLM cache when enabled"""
+        if self.llm_cache is None:
+            return (await self._create(**params)).choices[0].message.content
+        return await self.llm_cache.acomplete(self._create, validate=validate, scope=_cache_scope.get(), **params)
+    
+    async def _create(self, **params):
+        """chat.completions.create in an llm.chat span with token usage and payload sizes"""
+        with start_span("llm.chat", **{
+            "gen_ai.system": "az.ai.openai",
+            "gen_ai.request.model": params.get("model"),
+            "gen_ai.prompt.size": sum(len(message.get("content") or "") for message in params.get("messages", []))
+        }) as span:
+            response = await self.azure_openai_client.chat.completions.create(**params)
+            if response.usage:
+                span.set(**{
+                    "gen_ai.usage.input_tokens": response.usage.prompt_tokens,
+                    "gen_ai.usage.output_tokens": response.usage.completion_tokens
+                })
+            span.set(**{"gen_ai.completion.size": len(response.choices[0].message.content or "")})
+            return response
     
     def _refresh_token(self):
         """Refresh the Graph API access token"""
@@ -27,10 +107,13 @@ class TeamsInterviewBot(ActivityHandler):
         if not self.graph_token:
             print("Warning: Could not obtain Graph API token")
     
-    def _get_headers(self):
+    async def _get_headers(self):
         """Get headers with fresh token"""
+        # Cached tokens are refreshed ahead of expiry by the auth helper
+        self.graph_token = self.auth_helper.get_cached_token()
         if not self.graph_token:
-            self._refresh_token()
+            # Token acquisition is blocking I/O; keep it off the event loop
+            await asyncio.to_thread(self._refresh_token)
         
         return {
             "Authorization": f"Bearer {self.graph_token}",
@@ -38,8 +121,22 @@ class TeamsInterviewBot(ActivityHandler):
         }
         
     async def on_message_activity(self, turn_context: TurnContext):
-        user_message = turn_context.activity.text.lower()
+        user_message = (turn_context.activity.text or "").lower()
+        _cache_scope.set(_user_scope(turn_context.activity))
         
+        with start_span("bot.turn", **{"bot.message.size": len(user_message)}) as span:
+            try:
+                entries = await self._get_bulk_entries(turn_context)
+                span.set(**{"bot.bulk_entries": len(entries or [])})
+                if entries:
+                    await asyncio.wait_for(self._handle_bulk_scheduling(turn_context, entries), timeout=BOT_BULK_TURN_TIMEOUT)
+                else:
+                    await asyncio.wait_for(self._handle_message(turn_context, user_message), timeout=BOT_TURN_TIMEOUT)
+            except asyncio.TimeoutError as e:
+                span.fail(e)
+                await turn_context.send_activity(MessageFactory.text("⏱️ That took too long to process. Please try again."))
+    
+    async def _handle_message(self, turn_context: TurnContext, user_message: str):
         # Check if user wants to schedule an interview
         if any(keyword in user_message for keyword in ["interview", "schedule", "meeting", "6 pm", "6pm"]):
             await self._handle_interview_scheduling(turn_context, user_message)
@@ -53,8 +150,8 @@ class TeamsInterviewBot(ActivityHandler):
             # Extract interview details using AI
             interview_details = await self._extract_interview_details(message)
             
-            # Schedule at 6 PM today or tomorrow
-            interview_time = self._get_6pm_slot()
+            # Next free evening slot for the interviewer and HR
+            interview_time = (await self._find_slots(1))[0]
             
             # Create calendar event
             meeting_result = await self._create_interview_meeting(
@@ -64,7 +161,7 @@ class TeamsInterviewBot(ActivityHandler):
             )
             
             if meeting_result["success"]:
-                response = f"✅ Interview scheduled for {interview_time.strftime('%B %d at 6:00 PM')}!\n\n" \
+                response = f"✅ Interview scheduled for {interview_time.strftime('%B %d at %I:%M %p')} ({INTERVIEW_TIME_ZONE})!\n\n" \
                           f"📋 Details:\n" \
                           f"• Candidate: {interview_details.get('candidate', 'TBD')}\n" \
                           f"• Position: {interview_details.get('position', 'TBD')}\n" \
@@ -90,26 +187,166 @@ class TeamsInterviewBot(ActivityHandler):
         If not mentioned, use "TBD" as default.
         """
         
-        response = self.azure_openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        
         try:
-            return json.loads(response.choices[0].message.content)
+            content = await asyncio.wait_for(
+                self._complete(
+                    validate=_is_json,
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    # Deterministic, so the reply may be cached
+                    temperature=0
+                ),
+                timeout=BOT_LLM_TIMEOUT
+            )
+            return json.loads(content)
+        except asyncio.CancelledError:
+            raise
         except:
             return {"candidate": "TBD", "position": "TBD", "interviewer": "TBD"}
     
-    def _get_6pm_slot(self):
-        now = datetime.now()
-        today_6pm = now.replace(hour=18, minute=0, second=0, microsecond=0)
+    async def _get_bulk_entries(self, turn_context: TurnContext):
+        """Return candidate entries if the message is a bulk request, else None.
+
+        Entries come from an attached CSV file or from an interview message
+        with two or more bulleted, numbered or comma-separated lines.
+        """
+        for attachment in turn_context.activity.attachments or []:
+            content = attachment.content if isinstance(attachment.content, dict) else {}
+            if content.get("fileType") == "csv" and content.get("downloadUrl"):
+                response = await asyncio.wait_for(self.graph.get(content["downloadUrl"]), timeout=BOT_GRAPH_TIMEOUT)
+                if response.status_code == 200:
+                    return [line for line in response.text.splitlines() if line.strip()]
+        
+        text = turn_context.activity.text or ""
+        if not any(keyword in text.lower() for keyword in ["interview", "candidate"]):
+            return None
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        entries = [ENTRY_MARKER.sub("", line) for line in lines if ENTRY_MARKER.match(line) or "," in line]
+        return entries if len(entries) >= 2 else None
+    
+    async def _handle_bulk_scheduling(self, turn_context: TurnContext, entries):
+        try:
+            candidates = await self._extract_bulk_interview_details(entries)
+            slots = await self._find_slots(len(candidates))
+            requester = turn_context.activity.from_property.name
+            
+            # Create all events concurrently, but only a few at a time
+            semaphore = asyncio.Semaphore(BULK_SCHEDULING_CONCURRENCY)
+            
+            async def schedule(details, slot):
+                async with semaphore:
+                    return await self._create_interview_meeting(details, slot, requester)
+            
+            results = await asyncio.gather(*(schedule(details, slot) for details, slot in zip(candidates, slots)))
+            
+            lines = []
+            for details, slot, result in zip(candidates, slots, results):
+                label = f"{details.get('candidate', 'TBD')} ({details.get('position', 'TBD')})"
+                if result["success"]:
+                    lines.append(f"✅ {label}: {slot.strftime('%B %d at %I:%M %p')} ({INTERVIEW_TIME_ZONE})")
+                else:
+                    lines.append(f"❌ {label}: {result['error']}")
+            
+            scheduled = sum(1 for result in results if result["success"])
+            response = f"📋 Scheduled {scheduled} of {len(candidates)} interviews:\n\n" + "\n".join(lines)
         
-        # If it's already past 6 PM today, schedule for tomorrow
-        if now >= today_6pm:
-            return today_6pm + timedelta(days=1)
+        except Exception as e:
+            response = f"❌ Error scheduling interviews: {str(e)}"
+        
+        await turn_context.send_activity(MessageFactory.text(response))
+    
+    async def _extract_bulk_interview_details(self, entries):
+        """Extract candidate details for every entry with at most one LLM call"""
+        # Well-formed CSV (with or without a header) needs no LLM at all
+        rows = list(csv.reader(io.StringIO("\n".join(entries))))
+        if rows and rows[0] and rows[0][0].strip().lower() in ("candidate", "name", "candidate name"):
+            rows = rows[1:]
+        if rows and all(len(row) >= 2 and all(field.strip() for field in row[:2]) for row in rows):
+            return [
+                {
+                    "candidate": row[0].strip(),
+                    "position": row[1].strip(),
+                    "interviewer": row[2].strip() if len(row) > 2 and row[2].strip() else "TBD"
+                }
+                for row in rows
+            ]
+        
+        numbered = "\n".join(f"{index}. {entry}" for index, entry in enumerate(entries, 1))
+        prompt = f"""
+        Extract interview details from each of these {len(entries)} entries:
+        {numbered}
+        
+        Return only a JSON array with one object per entry, in the same order, each with:
+        - candidate: candidate name (if mentioned)
+        - position: job position (if mentioned)
+        - interviewer: interviewer name (if mentioned)
+        
+        If not mentioned, use "TBD" as default.
+        """
+        
+        try:
+            content = await asyncio.wait_for(
+                self._complete(
+                    validate=_is_json_array,
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    # Deterministic, so the reply may be cached
+                    temperature=0
+                ),
+                timeout=BOT_LLM_TIMEOUT
+            )
+            content = content.strip().strip("`")
+            details = json.loads(content[content.index("["):])
+            if len(details) == len(entries):
+                return details
+        except asyncio.CancelledError:
+            raise
+        except:
+            pass
+        
+        return [{"candidate": entry, "position": "TBD", "interviewer": "TBD"} for entry in entries]
+    
+    async def _find_slots(self, count):
+        """Next `count` free, non-overlapping one-hour slots for all attendees.
+
+        Free/busy for every attendee comes from one getSchedule call; if that
+        fails we fall back to fixed evening slots. Times are naive, in
+        INTERVIEW_TIME_ZONE.
+        """
+        schedules = [email for email in (INTERVIEWER_EMAIL, HR_EMAIL) if email]
+        now = interview_now()
+        try:
+            headers = await self._get_headers()
+            index = await asyncio.wait_for(
+                fetch_busy_index(self.graph, headers, schedules, now, now + timedelta(days=SLOT_SEARCH_DAYS)),
+                timeout=BOT_GRAPH_TIMEOUT
+            )
+            slots = index.next_free_slots(now, timedelta(hours=1), count)
+            if len(slots) == count:
+                return slots
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Free/busy lookup failed, using fixed slots: {e}")
+        return self._allocate_slots(count)
+    
+    def _allocate_slots(self, count):
+        """Consecutive, non-overlapping one-hour slots from the next INTERVIEW_DAY_START"""
+        first = self._next_evening_slot()
+        return [
+            first + timedelta(days=index // BULK_INTERVIEWS_PER_EVENING, hours=index % BULK_INTERVIEWS_PER_EVENING)
+            for index in range(count)
+        ]
+    
+    def _next_evening_slot(self):
+        now = interview_now()
+        today_start = now.replace(hour=INTERVIEW_DAY_START, minute=0, second=0, microsecond=0)
+        
+        # If today's window has already started, schedule for tomorrow
+        if now >= today_start:
+            return today_start + timedelta(days=1)
         else:
-            return today_6pm
+            return today_start
     
     async def _create_interview_meeting(self, details, interview_time, requester):
         try:
@@ -129,16 +366,16 @@ class TeamsInterviewBot(ActivityHandler):
                 },
                 "start": {
                     "dateTime": interview_time.isoformat(),
-                    "timeZone": "UTC"
+                    "timeZone": INTERVIEW_TIME_ZONE
                 },
                 "end": {
                     "dateTime": end_time.isoformat(),
-                    "timeZone": "UTC"
+                    "timeZone": INTERVIEW_TIME_ZONE
                 },
                 "attendees": [
                     {
                         "emailAddress": {
-                            "address": "hr@company.com",  # Replace with actual HR email
+                            "address": HR_EMAIL,
                             "name": "HR Team"
                         },
                         "type": "required"
@@ -147,13 +384,14 @@ class TeamsInterviewBot(ActivityHandler):
                 "isOnlineMeeting": True,
                 "onlineMeetingProvider": "teamsForBusiness"
             }
+            if INTERVIEWER_EMAIL:
+                event["attendees"].append({"emailAddress": {"address": INTERVIEWER_EMAIL}, "type": "required"})
             
-            headers = self._get_headers()
+            headers = await self._get_headers()
             
-            response = requests.post(
-                "https://graph.microsoft.com/v1.0/me/events",
-                headers=headers,
-                json=event
+            response = await asyncio.wait_for(
+                self.graph.post("/me/events", headers=headers, json=event),
+                timeout=BOT_GRAPH_TIMEOUT
             )
             
             if response.status_code == 201:
@@ -161,27 +399,39 @@ class TeamsInterviewBot(ActivityHandler):
             else:
                 return {"success": False, "error": response.text}
                 
+        except asyncio.TimeoutError:
+            return {"success": False, "error": "Timed out creating the calendar event"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def _get_ai_response(self, message: str):
         try:
-            response = self.azure_openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a helpful Teams bot assistant. Be friendly and concise. If someone mentions scheduling interviews or meetings, offer to help schedule them at 6 PM."
-                    },
-                    {"role": "user", "content": message}
-                ],
-                temperature=0.7,
-                max_tokens=150
+            content = await asyncio.wait_for(
+                self._complete(
+                    model="gpt-4",
+                    messages=[
+                        {
+                            "role": "system", 
+                            "content": "You are a helpful Teams bot assistant. Be friendly and concise. If someone mentions scheduling interviews or meetings, offer to schedule them in the first slot when the interviewer and HR are both free."
+                        },
+                        {"role": "user", "content": message}
+                    ],
+                    temperature=0.7,
+                    max_tokens=150
+                ),
+                timeout=BOT_LLM_TIMEOUT
             )
-            return response.choices[0].message.content
+            return content
+        except asyncio.TimeoutError:
+            return "I'm having trouble processing that right now. The AI service timed out."
         except Exception as e:
             return f"I'm having trouble processing that right now. Error: {str(e)}"
     
+    async def close(self):
+        """Release pooled HTTP connections held by the bot"""
+        await self.graph.close()
+        await self.azure_openai_client.close()
+    
     async def on_members_added_activity(self, members_added: [ChannelAccount], turn_context: TurnContext):
         for member in members_added:
             if member.id != turn_context.activity.recipient.id:
@@ -189,10 +439,11 @@ class TeamsInterviewBot(ActivityHandler):
                 👋 Hi! I'm your interview scheduling assistant!
                 
                 I can help you:
-                • Schedule interviews at 6 PM
+                • Schedule interviews in the first evening slot everyone is free
+                • Schedule many interviews at once (one candidate per line, or a CSV file)
                 • Create calendar events
                 • Answer questions
                 
-                Just mention "schedule interview" or "6 PM" and I'll help you set it up!
+                Just mention "schedule interview" and I'll find a time and set it up!
                 """
                 await turn_context.send_activity(MessageFactory.text(welcome_message))
\ No newline at end of file
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StandInResponse:
+    """The parts of a requests.Response the throttle looks at"""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+
+class StandInGraph:
+    """A local Graph stand-in answering queued (status, headers) replies, 200 once they run out"""
+
+    def __init__(self):
+        self.replies = []
+        self.requests = []
+        self._lock = threading.Lock()
+        graph = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self):
+                with graph._lock:
+                    graph.requests.append((self.command, self.path))
+                    status, headers = graph.replies.pop(0) if graph.replies else (200, {})
+                body = json.dumps({"value": []} if status == 200 else {"error": {"code": str(status)}}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _reply
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1.0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self, method="GET", path="/me/events"):
+        """A send() for GraphThrottle.call that makes one request to the stand-in"""
+        def send():
+            request = urllib.request.Request(self.url + path, method=method, data=b"{}" if method == "POST" else None)
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return StandInResponse(response.status, dict(response.headers), response.read().decode())
+            except urllib.error.HTTPError as e:
+                return StandInResponse(e.code, dict(e.headers), e.read().decode())
+        return send
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def graph():
+    server = StandInGraph()
+    yield server
+    server.close()
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from agent_pool import AgentPool
+
+
+class SlowAgents:
+    """Agent factory: the first agent builds at once, the rest wait for `release`"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.built = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.built += 1
+            first = self.built == 1
+        if not first:
+            self.release.wait(5)
+        return Agent()
+
+
+class Agent:
+    def run(self, user_input, session_id=None):
+        return f"answer to {user_input}"
+
+
+@pytest.fixture
+def factory():
+    factory = SlowAgents()
+    yield factory
+    factory.release.set()
+
+
+def test_first_agent_serves_requests_while_the_rest_warm_up(factory):
+    pool = AgentPool(factory=factory, size=3, queue_size=4)
+    try:
+        pool.warm_up()
+        assert pool.ready.wait(2)
+        future = pool.submit(lambda agent: agent.run("hi"))
+        assert future.result(timeout=2) == "answer to hi"
+    finally:
+        factory.release.set()
+        pool.shutdown()
+
+
+def test_pool_builds_at_most_size_agents(factory):
+    factory.release.set()
+    pool = AgentPool(factory=factory, size=3, queue_size=20)
+    try:
+        pool.warm_up()
+        futures = [pool.submit(lambda agent: agent.run("hi")) for _ in range(20)]
+        assert [future.result(timeout=2) for future in futures] == ["answer to hi"] * 20
+        assert factory.built == 3
+        assert pool.stats()["agents"] == 3
+    finally:
+        pool.shutdown()
+
+
+def test_failed_warm_up_is_reported_and_frees_its_slot():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no endpoint")
+        return Agent()
+
+    pool = AgentPool(factory=factory, size=1, queue_size=1)
+    try:
+        pool.warm_up()
+        # The single worker runs the warm-up first, then builds an agent for this request
+        assert pool.run("hi") == "answer to hi"
+        assert pool.warmup_error == "no endpoint"
+        assert pool.stats()["agents"] == 1
+    finally:
+        pool.shutdown()
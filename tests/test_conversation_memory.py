@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+import conversation_memory
+from conversation_memory import ConversationMemory, SQLiteSessionStore, count_tokens
+
+
+class OfflineTiktoken:
+    """tiktoken in a container without network access: the BPE download fails"""
+
+    def __init__(self):
+        self.loads = 0
+
+    def get_encoding(self, name):
+        self.loads += 1
+        raise ConnectionError(f"could not download {name}.tiktoken")
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    tiktoken = OfflineTiktoken()
+    monkeypatch.setattr(conversation_memory, "tiktoken", tiktoken)
+    monkeypatch.setattr(conversation_memory, "_encoding", None)
+    return tiktoken
+
+
+def test_count_tokens_falls_back_once_when_the_encoding_cannot_load(offline):
+    assert count_tokens("a" * 40) == 11
+    assert count_tokens("hello") == 2
+    assert offline.loads == 1
+
+
+def test_history_works_without_the_encoding(offline):
+    memory = ConversationMemory(token_budget=50)
+    memory.save("session", "What's on my calendar?", "Three meetings today.")
+    summary, messages = memory.history("session")
+    assert summary == ""
+    assert [message["content"] for message in messages] == ["What's on my calendar?", "Three meetings today."]
+    assert offline.loads == 1
+
+
+def test_count_tokens_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(conversation_memory, "tiktoken", None)
+    monkeypatch.setattr(conversation_memory, "_encoding", None)
+    assert count_tokens("abcdefgh") == 3
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two workers' memories sharing one SQLite file, each with its own connection"""
+    path = str(tmp_path / "memory.db")
+    return tuple(ConversationMemory(store=SQLiteSessionStore(path), token_budget=10000) for _ in range(2))
+
+
+def contents(memory, session_id="session"):
+    return [message["content"] for message in memory.history(session_id)[1]]
+
+
+def test_workers_see_each_others_turns(workers):
+    first, second = workers
+    first.save("session", "q1", "a1")
+    assert contents(second) == ["q1", "a1"]
+    second.save("session", "q2", "a2")
+    # The first worker's cached copy is stale; it must not serve it or overwrite the second turn
+    assert contents(first) == ["q1", "a1", "q2", "a2"]
+    first.save("session", "q3", "a3")
+    assert contents(second) == ["q1", "a1", "q2", "a2", "q3", "a3"]
+
+
+def test_concurrent_saves_keep_every_turn(workers):
+    def talk(memory, name):
+        for index in range(20):
+            memory.save("session", f"{name}-q{index}", f"{name}-a{index}")
+
+    threads = [threading.Thread(target=talk, args=(memory, name)) for memory, name in zip(workers * 2, "abcd")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = workers[0].store.get("session")["messages"]
+    assert len(stored) == 160
+    # Each writer's turns stay in order and paired
+    for name in "abcd":
+        assert [m["content"] for m in stored if m["content"].startswith(name)] == \
+            [f"{name}-{kind}{index}" for index in range(20) for kind in "qa"]
+
+
+def test_clear_reaches_other_workers(workers):
+    first, second = workers
+    first.save("session", "q1", "a1")
+    assert contents(second) == ["q1", "a1"]
+    first.clear("session")
+    assert contents(second) == []
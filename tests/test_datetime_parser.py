@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from datetime_parser import parse_datetime, parse_duration
+
+# A Sunday morning
+NOW = datetime(2026, 10, 18, 10, 0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2026-10-20T09:30:00Z", datetime(2026, 10, 20, 9, 30)),
+    ("tomorrow at 2 PM", datetime(2026, 10, 19, 14, 0)),
+    ("day after tomorrow morning", datetime(2026, 10, 20, 9, 0)),
+    ("today at 16:45", datetime(2026, 10, 18, 16, 45)),
+    ("at 3", datetime(2026, 10, 18, 15, 0)),
+    ("9am", datetime(2026, 10, 19, 9, 0)),
+    ("March 3", datetime(2027, 3, 3, 14, 0)),
+    ("Dec 24 at noon", datetime(2026, 12, 24, 12, 0)),
+    ("sept 9", datetime(2027, 9, 9, 14, 0)),
+    ("3rd of december at 5pm", datetime(2026, 12, 3, 17, 0)),
+    ("12/25", datetime(2026, 12, 25, 14, 0)),
+    # ISO input is taken as-is
+    ("2026-11-02", datetime(2026, 11, 2, 0, 0)),
+])
+def test_dates_and_times(text, expected):
+    assert parse_datetime(text, now=NOW) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("in 30 minutes", datetime(2026, 10, 18, 10, 30)),
+    ("in 2 hours", datetime(2026, 10, 18, 12, 0)),
+    ("in 3 days at 9am", datetime(2026, 10, 21, 9, 0)),
+    ("in 1 week", datetime(2026, 10, 25, 14, 0)),
+])
+def test_relative(text, expected):
+    assert parse_datetime(text, now=NOW) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("monday at 10am", datetime(2026, 10, 19, 10, 0)),
+    ("next friday", datetime(2026, 10, 23, 14, 0)),
+    # The same weekday means today only with "this"
+    ("this sunday evening", datetime(2026, 10, 18, 18, 0)),
+    ("sunday", datetime(2026, 10, 25, 14, 0)),
+    ("next sunday", datetime(2026, 10, 25, 14, 0)),
+])
+def test_weekdays(text, expected):
+    assert parse_datetime(text, now=NOW) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Words that start like a month are not months
+    ("3 marketing calls tomorrow", datetime(2026, 10, 19, 14, 0)),
+    ("Mark 10", None),
+    ("2 decision items", None),
+    ("Augustine review", None),
+])
+def test_words_that_look_like_months(text, expected):
+    assert parse_datetime(text, now=NOW) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("25:00", None),
+    ("9:75", None),
+    ("13pm", None),
+    ("tomorrow at 25:00", datetime(2026, 10, 19, 14, 0)),
+    ("in 2 days at 24:30", datetime(2026, 10, 20, 14, 0)),
+    ("Feb 30", None),
+    ("2026-13-40", None),
+])
+def test_invalid_times_and_dates_do_not_raise(text, expected):
+    assert parse_datetime(text, now=NOW) == expected
+
+
+def test_duration():
+    assert parse_duration("30 minutes") == 30
+    assert parse_duration("1.5h") == 90
+    assert parse_duration("soon") == 60
+    assert parse_duration(45) == 45
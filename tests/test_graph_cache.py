@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from graph_cache import DeltaCache, get_graph_cache  # noqa: E402
+
+
+class Reply:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class StandInClient:
+    """Answers the seed request with the newest messages and the delta request with the whole window"""
+
+    def __init__(self, messages=50, delta_delay=0.0):
+        self.messages = [{"id": str(i), "subject": f"Update {i}"} for i in range(messages)]
+        self.delta_delay = delta_delay
+        self.urls = []
+        self.delta_done = threading.Event()
+
+    def get(self, url, token=None):
+        self.urls.append(url)
+        if "/delta" in url:
+            time.sleep(self.delta_delay)
+            self.delta_done.set()
+            return Reply({"value": self.messages, "@odata.deltaLink": "/delta?$deltatoken=1"})
+        return Reply({"value": self.messages[:5]})
+
+
+def test_cold_read_is_answered_from_the_seed_request():
+    client = StandInClient(delta_delay=0.3)
+    cache = DeltaCache(client=client, ttl=60)
+    started = time.monotonic()
+    items = cache.get("inbox", "/messages/delta", "token", seed_url="/messages?$top=5")
+    assert time.monotonic() - started < 0.3
+    assert len(items) == 5
+    assert client.urls[0] == "/messages?$top=5"
+
+    # The background sync replaces the seed with the full window
+    assert client.delta_done.wait(2)
+    time.sleep(0.05)
+    assert len(cache.get("inbox", "/messages/delta", "token", seed_url="/messages?$top=5")) == 50
+    assert cache.stats()["full_syncs"] == 1
+
+
+def test_without_seed_url_a_cold_read_syncs_in_full():
+    client = StandInClient()
+    cache = DeltaCache(client=client, ttl=60)
+    assert len(cache.get("inbox", "/messages/delta", "token")) == 50
+    assert client.urls == ["/messages/delta"]
+
+
+def test_get_graph_cache_is_rebuilt_after_a_fork(monkeypatch):
+    cache = get_graph_cache()
+    assert get_graph_cache() is cache
+    monkeypatch.setattr("graph_cache._cache_pid", -1)
+    assert get_graph_cache() is not cache
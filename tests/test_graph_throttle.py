@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import pytest
+
+from graph_throttle import AIMDLimit, AsyncGraphThrottle, CircuitBreaker, GraphThrottle, GraphThrottledError, retry_after
+
+
+def make_throttle(cls=GraphThrottle, **kwargs):
+    settings = dict(max_retries=3, max_retry_wait=5, rate=1000, burst=1000, max_concurrency=16,
+                    breaker_threshold=3, breaker_cooldown=0.2)
+    settings.update(kwargs)
+    return cls(**settings)
+
+
+def test_retry_after_waits_for_the_header(graph):
+    graph.replies = [(429, {"Retry-After": "0.3"})]
+    throttle = make_throttle()
+    started = time.monotonic()
+    response = throttle.call("tenant", graph.send())
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.3
+    assert len(graph.requests) == 2
+    stats = throttle.stats()["tenant"]
+    assert stats["throttled"] == 1 and stats["retries"] == 1
+
+
+def test_retry_after_pauses_the_whole_tenant(graph):
+    graph.replies = [(429, {"Retry-After": "0.3"})]
+    throttle = make_throttle()
+    throttle.call("tenant", graph.send())
+    # The pause was already waited out by the retry, so new requests go straight through
+    started = time.monotonic()
+    throttle.call("tenant", graph.send())
+    assert time.monotonic() - started < 0.3
+
+
+def test_retry_after_beyond_max_wait_raises_without_retrying(graph):
+    graph.replies = [(429, {"Retry-After": "30"})]
+    with pytest.raises(GraphThrottledError) as error:
+        make_throttle(max_retry_wait=5).call("tenant", graph.send())
+    assert error.value.retry_after == 30
+    assert len(graph.requests) == 1
+
+
+def test_retries_run_out(graph):
+    graph.replies = [(503, {"Retry-After": "0"})] * 3
+    with pytest.raises(GraphThrottledError):
+        make_throttle(max_retries=2, breaker_threshold=10).call("tenant", graph.send())
+    assert len(graph.requests) == 3
+
+
+def test_retry_after_without_header_backs_off():
+    for attempt in range(3):
+        wait = retry_after({}, attempt)
+        assert 0.5 * 2 ** attempt <= wait <= 2 ** attempt
+    assert retry_after({"retry-after": "7"}, 0) == 7
+
+
+def test_non_idempotent_requests_are_not_retried_on_503(graph):
+    graph.replies = [(503, {"Retry-After": "0"})]
+    response = make_throttle().call("tenant", graph.send("POST"), idempotent=False)
+    assert response.status_code == 503
+    assert graph.requests == [("POST", "/v1.0/me/events")]
+
+
+def test_non_idempotent_requests_are_retried_on_429(graph):
+    graph.replies = [(429, {"Retry-After": "0"})]
+    response = make_throttle().call("tenant", graph.send("POST"), idempotent=False)
+    assert response.status_code == 200
+    assert len(graph.requests) == 2
+
+
+def test_aimd_halves_on_throttle_and_grows_additively():
+    limit = AIMDLimit(minimum=1, maximum=16)
+    limit.on_throttle()
+    assert limit.value == 8
+    # About one step per limit's worth of successes
+    for _ in range(8):
+        limit.on_success()
+    assert limit.value == 8
+    limit.on_success()
+    assert limit.value == 9
+    for _ in range(10):
+        limit.on_throttle()
+    assert limit.value == 1
+
+
+def test_throttled_responses_lower_the_tenants_concurrency(graph):
+    graph.replies = [(429, {"Retry-After": "0"}), (429, {"Retry-After": "0"})]
+    throttle = make_throttle()
+    throttle.call("tenant", graph.send())
+    assert throttle.stats()["tenant"]["concurrency_limit"] == 4
+    throttle.call("other", graph.send())
+    assert throttle.stats()["other"]["concurrency_limit"] == 16
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_probe(graph):
+    graph.replies = [(500, {})] * 3
+    throttle = make_throttle()
+    for _ in range(3):
+        assert throttle.call("tenant", graph.send()).status_code == 500
+    assert throttle.stats()["tenant"]["breaker"] == "open"
+
+    with pytest.raises(GraphThrottledError):
+        throttle.call("tenant", graph.send())
+    assert len(graph.requests) == 3
+
+    time.sleep(0.25)
+    assert throttle.call("tenant", graph.send()).status_code == 200
+    assert throttle.stats()["tenant"]["breaker"] == "closed"
+
+
+def test_breaker_reopens_when_the_probe_fails():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.15)
+    assert breaker.check() is True
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    with pytest.raises(GraphThrottledError):
+        breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(GraphThrottledError):
+        breaker.check()
+
+
+def test_cancelled_probe_does_not_wedge_the_breaker(graph):
+    throttle = make_throttle(AsyncGraphThrottle, breaker_threshold=1, breaker_cooldown=0.1)
+    graph.replies = [(500, {})]
+
+    async def send_via(send):
+        return await asyncio.to_thread(send)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        await throttle.acall("tenant", lambda: send_via(graph.send()))
+        assert throttle.stats()["tenant"]["breaker"] == "open"
+        await asyncio.sleep(0.15)
+        # The probe is cancelled, as by the Teams bot's turn timeout
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(throttle.acall("tenant", hang), timeout=0.05)
+        assert throttle.stats()["tenant"]["breaker"] == "open"
+        assert throttle.stats()["tenant"]["inflight"] == 0
+        # The next caller probes right away and closes the breaker
+        response = await throttle.acall("tenant", lambda: send_via(graph.send()))
+        assert response.status_code == 200
+        assert throttle.stats()["tenant"]["breaker"] == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_interrupted_sync_probe_is_released(graph):
+    throttle = make_throttle(breaker_threshold=1, breaker_cooldown=0.1)
+    graph.replies = [(500, {})]
+    throttle.call("tenant", graph.send())
+    time.sleep(0.15)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        throttle.call("tenant", interrupted)
+    assert throttle.call("tenant", graph.send()).status_code == 200
+    assert throttle.stats()["tenant"]["breaker"] == "closed"
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm_cache import LLMCache, cacheable
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(path=str(tmp_path / "llm_cache.db"))
+
+
+@pytest.fixture
+def llm():
+    calls = []
+
+    def create(**params):
+        calls.append(params)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"reply {len(calls)}"))])
+
+    create.calls = calls
+    return create
+
+
+def ask(cache, llm, text, scope="tenant:alice", **params):
+    params.setdefault("temperature", 0)
+    return cache.complete(llm, scope=scope, model="gpt-4", messages=[{"role": "user", "content": text}], **params)
+
+
+def test_normalized_prompts_share_an_entry(cache, llm):
+    assert ask(cache, llm, "Schedule an interview for John!") == "reply 1"
+    assert ask(cache, llm, "schedule an interview for john") == "reply 1"
+    assert len(llm.calls) == 1
+
+
+def test_users_never_share_entries(cache, llm):
+    ask(cache, llm, "schedule an interview for john", scope="tenant:alice")
+    assert ask(cache, llm, "schedule an interview for john", scope="tenant:bob") == "reply 2"
+    assert ask(cache, llm, "schedule an interview for john", scope="other-tenant:alice") == "reply 3"
+
+
+@pytest.mark.parametrize("params", [
+    {"temperature": 0.7},
+    {"temperature": None},
+    {"stream": True},
+    {"n": 2},
+    {"tools": [{"type": "function", "function": {"name": "read_calendar"}}]},
+])
+def test_non_deterministic_and_tool_calls_bypass_the_cache(cache, llm, params):
+    ask(cache, llm, "what's on my calendar today", **params)
+    ask(cache, llm, "what's on my calendar today", **params)
+    assert len(llm.calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_default_temperature_is_not_cacheable():
+    assert not cacheable({"model": "gpt-4"})
+    assert cacheable({"model": "gpt-4", "temperature": 0})
+
+
+def test_invalid_replies_are_not_stored(cache, llm):
+    cache.complete(llm, validate=lambda content: False, scope="s", temperature=0, messages=[{"role": "user", "content": "x"}])
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from slot_finder import BusyIndex, build_busy_index, fetch_busy_index, interview_now
+
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "slot_finder_cases.json")) as f:
+    CASES = json.load(f)
+
+
+def get_schedule(calendars):
+    """A getSchedule response body with one schedule per calendar; times in UTC with a Z suffix"""
+    return {"value": [
+        {
+            "scheduleId": f"person{index}@company.com",
+            "scheduleItems": [
+                {"status": item[2] if len(item) > 2 else "busy",
+                 "start": {"dateTime": item[0] + "Z", "timeZone": "UTC"},
+                 "end": {"dateTime": item[1] + "Z", "timeZone": "UTC"}}
+                for item in items
+            ]
+        }
+        for index, items in enumerate(calendars)
+    ]}
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_next_free_slots(case):
+    index = build_busy_index(get_schedule(case["calendars"]))
+    if "intervals" in case:
+        assert len(index) == case["intervals"]
+    slots = index.next_free_slots(
+        datetime.fromisoformat(case["after"]),
+        duration=timedelta(minutes=case.get("duration", 60)),
+        count=case.get("count", 1),
+        day_start=case.get("day_start", 18),
+        day_end=case.get("day_end", 21),
+        step=timedelta(minutes=30),
+        horizon=timedelta(days=case.get("horizon_days", 14))
+    )
+    assert [slot.isoformat() for slot in slots] == case["expected"]
+
+
+def test_slots_do_not_overlap_each_other():
+    slots = BusyIndex().next_free_slots(datetime(2026, 10, 19, 9), duration=timedelta(minutes=45), count=4,
+                                        day_start=18, day_end=21, step=timedelta(minutes=30))
+    assert [slot.strftime("%d %H:%M") for slot in slots] == ["19 18:00", "19 19:00", "19 20:00", "20 18:00"]
+
+
+def test_add_merges_overlapping_and_adjacent_intervals():
+    index = BusyIndex([(datetime(2026, 10, 19, 18), datetime(2026, 10, 19, 19)),
+                       (datetime(2026, 10, 19, 20), datetime(2026, 10, 19, 21))])
+    index.add(datetime(2026, 10, 19, 19), datetime(2026, 10, 19, 20))
+    assert len(index) == 1
+    assert not index.is_free(datetime(2026, 10, 19, 19, 30), datetime(2026, 10, 19, 19, 45))
+    assert index.is_free(datetime(2026, 10, 19, 21), datetime(2026, 10, 19, 22))
+
+
+def test_empty_and_inverted_intervals_are_ignored():
+    index = BusyIndex([(datetime(2026, 10, 19, 18), datetime(2026, 10, 19, 18)),
+                       (datetime(2026, 10, 19, 19), datetime(2026, 10, 19, 18))])
+    assert len(index) == 0
+    assert index.is_free(datetime(2026, 10, 19, 18), datetime(2026, 10, 19, 19))
+
+
+class Reply:
+    status_code = 200
+    text = ""
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class RecordingGraph:
+    """Records getSchedule calls and answers with no busy time"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def post(self, path, headers=None, json=None):
+        self.calls.append((path, headers, json))
+        return Reply({"value": [{"scheduleId": address, "scheduleItems": []} for address in json["schedules"]]})
+
+
+def test_get_schedule_uses_one_time_zone_throughout():
+    graph = RecordingGraph()
+    start = datetime(2026, 10, 19, 9)
+    index = asyncio.run(fetch_busy_index(graph, {"Authorization": "Bearer token"}, ["hr@company.com"],
+                                         start, start + timedelta(days=1), time_zone="Asia/Kolkata"))
+    assert len(index) == 0
+    (path, headers, body), = graph.calls
+    assert path == "/me/calendar/getSchedule"
+    # Busy times must come back in the zone the window was given in
+    assert headers == {"Authorization": "Bearer token", "Prefer": 'outlook.timezone="Asia/Kolkata"'}
+    assert body["startTime"] == {"dateTime": "2026-10-19T09:00:00", "timeZone": "Asia/Kolkata"}
+    assert body["endTime"] == {"dateTime": "2026-10-20T09:00:00", "timeZone": "Asia/Kolkata"}
+
+
+def test_interview_now_is_in_the_interview_time_zone(monkeypatch):
+    monkeypatch.setattr("slot_finder.INTERVIEW_TIME_ZONE", "Asia/Kolkata")
+    expected = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=5, minutes=30)
+    assert abs((interview_now() - expected).total_seconds()) < 5
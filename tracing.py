@@ -0,0 +1,318 @@
+import bisect
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # Spans are still timed, aggregated and exported locally
+    otel_trace = None
+
+# Configuration
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# Local span exporter: none, console (stderr) or file (JSON lines in TRACE_FILE)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "outlook-teams-assistant")
+
+# Histogram buckets for span durations, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Span attributes that also feed the token and payload counters
+TOKEN_ATTRIBUTES = {"gen_ai.usage.input_tokens": "input", "gen_ai.usage.output_tokens": "output"}
+SIZE_ATTRIBUTES = {
+    "http.request.body.size": "out", "http.response.body.size": "in",
+    "gen_ai.prompt.size": "out", "gen_ai.completion.size": "in",
+    "tool.input.size": "out", "tool.output.size": "in"
+}
+METRIC_HELP = {
+    "span_duration_seconds": ("histogram", "Time spent in traced operations"),
+    "span_errors_total": ("counter", "Traced operations that failed"),
+    "llm_tokens_total": ("counter", "LLM tokens by direction (estimated when the API reports none)"),
+    "payload_bytes_total": ("counter", "Request (out) and response (in) payload sizes of traced operations")
+}
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_otel_tracer = otel_trace.get_tracer(SERVICE_NAME) if otel_trace else None
+
+
+def body_size(body):
+    """Size of a request or response body: bytes, text or a JSON-serializable object"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    try:
+        return len(json.dumps(body, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class Span:
+    """A timed operation in a trace, shaped like an OpenTelemetry span.
+
+    Use it as a context manager to make it the parent of spans started
+    inside (including in asyncio tasks created there), or call end()
+    yourself for operations that start and finish in callbacks. When the
+    opentelemetry API is installed every span is mirrored to it, so an
+    SDK configured by the deployment exports them too.
+    """
+
+    recording = True
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.error = None
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = None
+        self._ended = False
+        self._otel = None
+        if _otel_tracer is not None:
+            context = otel_trace.set_span_in_context(parent._otel) if parent is not None and parent._otel else None
+            self._otel = _otel_tracer.start_span(name, context=context, attributes=_otel_attributes(self.attributes))
+            span_context = self._otel.get_span_context()
+            if span_context.is_valid:
+                self.trace_id = format(span_context.trace_id, "032x")
+                self.span_id = format(span_context.span_id, "016x")
+
+    def set(self, **attributes):
+        """Add attributes; dotted OpenTelemetry names can be passed with **{"a.b": value}"""
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.attributes.update(attributes)
+        if self._otel is not None:
+            self._otel.set_attributes(_otel_attributes(attributes))
+        return self
+
+    def fail(self, error):
+        """Mark the span failed when it ends, e.g. for an error response rather than an exception"""
+        self.error = error
+        return self
+
+    def end(self, error=None):
+        """Finish the span once; `error` (an exception or message) marks it failed"""
+        if self._ended:
+            return
+        self._ended = True
+        duration = time.perf_counter() - self._started
+        error = error if error is not None else self.error
+        if error is not None:
+            self.error = error
+            self.attributes["error.type"] = type(error).__name__ if isinstance(error, BaseException) else "error"
+        if self._otel is not None:
+            if error is not None:
+                if isinstance(error, BaseException):
+                    self._otel.record_exception(error)
+                self._otel.set_status(Status(StatusCode.ERROR, str(error)))
+            self._otel.end()
+        get_metrics().record_span(self, duration)
+        _export(self, duration)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current_span.reset(self._token)
+        if exc is not None and not isinstance(exc, Exception):
+            # Control flow such as task cancellation or st.rerun(), not a failure
+            self.attributes["exception.type"] = exc_type.__name__
+            exc = None
+        self.end(exc)
+        return False
+
+    def to_dict(self, duration):
+        """The span in the OpenTelemetry console exporter's JSON layout"""
+        end_time = self.start_time + duration
+        return {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.trace_id}", "span_id": f"0x{self.span_id}"},
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _timestamp(self.start_time),
+            "end_time": _timestamp(end_time),
+            "duration_ms": round(duration * 1000, 3),
+            "status": {"status_code": "ERROR", "description": str(self.error)} if self.error is not None else {"status_code": "OK"},
+            "attributes": self.attributes,
+            "resource": {"service.name": SERVICE_NAME}
+        }
+
+
+class _NoopSpan:
+    """Stands in for Span when TRACING_ENABLED is false"""
+
+    recording = False
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attributes):
+        return self
+
+    def fail(self, error):
+        return self
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def start_span(name, parent=None, **attributes):
+    """Start a span under `parent`, or under the current span when none is given.
+
+    Attribute names follow OpenTelemetry conventions; pass dotted names
+    with **{"http.request.method": "GET"}.
+    """
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    if parent is None:
+        parent = _current_span.get()
+    return Span(name, parent if isinstance(parent, Span) else None, attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def _otel_attributes(attributes):
+    """OpenTelemetry accepts only primitive attribute values"""
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value) for key, value in attributes.items()}
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+_export_lock = threading.Lock()
+_export_file = None
+
+
+def _export(span, duration):
+    """Write a finished span to stderr or TRACE_FILE as one JSON line"""
+    global _export_file
+    if TRACE_EXPORTER not in ("console", "file"):
+        return
+    line = json.dumps(span.to_dict(duration), default=str)
+    try:
+        with _export_lock:
+            if TRACE_EXPORTER == "console":
+                print(line, file=sys.stderr)
+            else:
+                if _export_file is None:
+                    _export_file = open(TRACE_FILE, "a", buffering=1, encoding="utf-8")
+                _export_file.write(line + "\n")
+    except OSError as e:
+        print(f"Could not export span {span.name}: {e}")
+
+
+class MetricsRegistry:
+    """Aggregates of finished spans, rendered in the Prometheus text format.
+
+    Every span feeds a duration histogram and an error counter labelled
+    with its name; token usage and payload size attributes feed
+    llm_tokens_total and payload_bytes_total.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def record_span(self, span, duration):
+        with self._lock:
+            histogram = self._histograms.get(span.name)
+            if histogram is None:
+                histogram = self._histograms[span.name] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(self.buckets, duration)
+            if index < len(self.buckets):
+                histogram["buckets"][index] += 1
+            histogram["sum"] += duration
+            histogram["count"] += 1
+            if span.error is not None:
+                self._add("span_errors_total", 1, (("span", span.name),))
+            for attribute, direction in TOKEN_ATTRIBUTES.items():
+                if attribute in span.attributes:
+                    model = str(span.attributes.get("gen_ai.request.model", ""))
+                    self._add("llm_tokens_total", span.attributes[attribute], (("direction", direction), ("model", model)))
+            for attribute, direction in SIZE_ATTRIBUTES.items():
+                if attribute in span.attributes:
+                    self._add("payload_bytes_total", span.attributes[attribute], (("direction", direction), ("span", span.name)))
+
+    def _add(self, metric, value, labels):
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {name: dict(histogram, buckets=list(histogram["buckets"])) for name, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = _metric_header("span_duration_seconds")
+        for name, histogram in sorted(histograms.items()):
+            label = f'span="{_escape(name)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(f'span_duration_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            lines.append(f'span_duration_seconds_bucket{{{label},le="+Inf"}} {histogram["count"]}')
+            lines.append(f"span_duration_seconds_sum{{{label}}} {histogram['sum']:.6f}")
+            lines.append(f"span_duration_seconds_count{{{label}}} {histogram['count']}")
+
+        by_metric = {}
+        for (metric, labels), value in counters.items():
+            by_metric.setdefault(metric, []).append((labels, value))
+        for metric, samples in sorted(by_metric.items()):
+            lines.extend(_metric_header(metric))
+            for labels, value in sorted(samples):
+                rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{metric}{{{rendered}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _metric_header(metric):
+    kind, text = METRIC_HELP[metric]
+    return [f"# HELP {metric} {text}", f"# TYPE {metric} {kind}"]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = None
+_metrics_pid = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide MetricsRegistry; a forked worker starts its own"""
+    global _metrics, _metrics_pid
+    pid = os.getpid()
+    if _metrics is None or _metrics_pid != pid:
+        with _metrics_lock:
+            if _metrics is None or _metrics_pid != pid:
+                _metrics = MetricsRegistry()
+                _metrics_pid = pid
+    return _metrics